@@ -5,16 +5,18 @@
 # http://opensource.org/licenses/GPL-3.0
 # Copyright (c) 2015-16, Neil Freeman <contact@fakeisthenewreal.org>
 # pylint: disable=redefined-builtin
-from . import bounding, draw, errors, projection, style, svg, svgis, transform
+from . import bounding, cache, draw, errors, projection, store, style, svg, svgis, transform
 from .svgis import SVGIS, map
 
 __version__ = '0.5.3'
 
 __all__ = [
     'bounding',
+    'cache',
     'draw',
     'errors',
     'projection',
+    'store',
     'style',
     'svg',
     'svgis',
@@ -118,6 +118,19 @@ def covers(b1, b2):
     return b1[0] <= b2[0] and b1[1] <= b2[1] and b1[2] >= b2[2] and b1[3] >= b2[3]
 
 
+def disjoint(b1, b2):
+    """Check if two bounding boxes don't meet.
+
+    Args:
+        b1 (tuple): a bounding box (minx, miny, maxx, maxy)
+        b2 (tuple): a bounding box
+
+    Returns:
+        bool: ``True`` if no points in ``b2`` are inside ``b1``.
+    """
+    return b1[0] > b2[2] or b1[1] > b2[3] or b1[2] < b2[0] or b1[3] < b2[1]
+
+
 def transform(bounds, **kwargs):
     """
     Project a bounding box, taking care to not slice off the sides.
@@ -144,3 +157,54 @@ def transform(bounds, **kwargs):
     densebounds = ring(bounds)
     xbounds, ybounds = list(zip(*transformer.itransform(densebounds)))
     return min(xbounds), min(ybounds), max(xbounds), max(ybounds)
+
+
+def _points(coordinates):
+    '''Yield the (x, y) pairs in a nested sequence of coordinates.'''
+    if len(coordinates) and isinstance(coordinates[0], (int, float)):
+        yield coordinates[0], coordinates[1]
+        return
+
+    for c in coordinates:
+        yield from _points(c)
+
+
+def geometry(geom):
+    """
+    Find the bounding box of a GeoJSON-like geometry.
+
+    Args:
+        geom (dict): A GeoJSON-like geometry object.
+
+    Returns:
+        tuple: A bounding box (minx, miny, maxx, maxy), or ``None`` if the geometry is empty.
+    """
+    if geom['type'] == 'GeometryCollection':
+        boxes = [b for b in (geometry(g) for g in geom['geometries']) if b]
+        if not boxes:
+            return None
+        xmins, ymins, xmaxs, ymaxs = zip(*boxes)
+        return min(xmins), min(ymins), max(xmaxs), max(ymaxs)
+
+    try:
+        xs, ys = zip(*_points(geom['coordinates']))
+    except ValueError:
+        return None
+
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def vertices(geom):
+    """
+    Count the vertices in a GeoJSON-like geometry.
+
+    Args:
+        geom (dict): A GeoJSON-like geometry object.
+
+    Returns:
+        int
+    """
+    if geom['type'] == 'GeometryCollection':
+        return sum(vertices(g) for g in geom['geometries'])
+
+    return sum(1 for _ in _points(geom['coordinates']))
@@ -0,0 +1,264 @@
+'''Cache a layer's coordinates in memory-mapped numpy files for fast repeated reading'''
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
+import json
+import logging
+import os.path
+
+import fiona
+from pyproj.crs import CRS
+
+from . import bounding
+from .errors import SvgisError
+
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+LOG = logging.getLogger('svgis')
+
+META = 'svgis-cache.json'
+
+# Geometry type codes. Every geometry is stored as parts made of rings made of coordinates.
+TYPES = ('Point', 'MultiPoint', 'LineString', 'MultiLineString', 'Polygon', 'MultiPolygon')
+
+ARRAYS = ('coords', 'ring_offsets', 'part_offsets', 'geom_offsets', 'types', 'bbox', 'ids')
+
+# Numpy types of attribute columns, by fiona field type (without its width). Anything else is stored as text.
+FIELD_DTYPES = {'int': 'int64', 'float': 'float64', 'bool': 'bool'}
+
+
+def is_cache(path):
+    '''Check if a path is a coordinate cache directory.'''
+    return isinstance(path, str) and os.path.isfile(os.path.join(path, META))
+
+
+def _parts(geom):
+    '''Convert a geometry's coordinates to a list of parts, each a list of rings.'''
+    kind = geom['type']
+    coordinates = geom['coordinates']
+    if kind == 'Point':
+        return [[[coordinates]]]
+    if kind in ('MultiPoint', 'LineString'):
+        return [[coordinates]]
+    if kind in ('MultiLineString', 'Polygon'):
+        return [coordinates]
+    if kind == 'MultiPolygon':
+        return coordinates
+
+    raise SvgisError(f'Unable to cache geometry of type: {kind}')
+
+
+def _column(values, kind):
+    '''An array of the values of a field, with missing values filled in, and a mask of the missing values.'''
+    missing = np.array([v is None for v in values], dtype=bool)
+    dtype = FIELD_DTYPES.get(kind.split(':')[0].rstrip('0123456789'), 'str')
+    try:
+        column = np.array([(0 if dtype != 'str' else '') if v is None else v for v in values], dtype=dtype)
+    except (TypeError, ValueError):
+        column = np.array(['' if v is None else str(v) for v in values], dtype='str')
+
+    return column, missing
+
+
+def write(path, directory, fields=None):
+    """
+    Read a layer and write its coordinates, geometry structure and attributes to a cache directory.
+    Attributes are saved as one array for each field, so they can be memory-mapped like the coordinates.
+
+    Args:
+        path (str): A fiona-readable file.
+        directory (str): Directory to write the cache to, created if it doesn't exist.
+        fields (Sequence): Fields to keep in the attribute table (default: all fields).
+
+    Returns:
+        ``int`` the number of features cached.
+    """
+    coords, ring_offsets, part_offsets, geom_offsets, types, boxes = [], [0], [0], [0], [], []
+    ids, values = [], []
+    count = 0
+
+    with fiona.Env():
+        with fiona.open(path) as layer:
+            properties = layer.schema['properties']
+            fields = [f for f in (fields or properties) if f in properties]
+            meta = {
+                'name': layer.name,
+                'crs': CRS(layer.crs).to_wkt() if layer.crs else None,
+                'bounds': layer.bounds,
+                'schema': dict(layer.schema, properties={f: properties[f] for f in fields}),
+                'fields': fields,
+                'uncached': [f for f in properties if f not in fields],
+            }
+
+            for _, feature in layer.items():
+                geom = feature.get('geometry')
+                ids.append(feature.get('id'))
+                values.append([feature['properties'].get(f) for f in fields])
+
+                try:
+                    parts = _parts(geom) if geom else []
+                except SvgisError as err:
+                    LOG.warning('caching feature %s as NULL: %s', feature.get('id'), err)
+                    parts = []
+
+                for part in parts:
+                    for ring in part:
+                        coords.extend((c[0], c[1]) for c in ring)
+                        ring_offsets.append(len(coords))
+                    part_offsets.append(len(ring_offsets) - 1)
+
+                geom_offsets.append(len(part_offsets) - 1)
+                types.append(TYPES.index(geom['type']) if parts else -1)
+                boxes.append(bounding.geometry(geom) if parts else (np.nan,) * 4)
+                count += 1
+
+    os.makedirs(directory, exist_ok=True)
+    arrays = {
+        'coords': np.array(coords, dtype=float).reshape(-1, 2),
+        'ring_offsets': np.array(ring_offsets, dtype=np.int64),
+        'part_offsets': np.array(part_offsets, dtype=np.int64),
+        'geom_offsets': np.array(geom_offsets, dtype=np.int64),
+        'types': np.array(types, dtype=np.int8),
+        'bbox': np.array(boxes, dtype=float).reshape(-1, 4),
+        'ids': np.array(['' if i is None else str(i) for i in ids], dtype='str'),
+    }
+    for j, field in enumerate(fields):
+        column = _column([v[j] for v in values], meta['schema']['properties'][field])
+        arrays[f'field{j}'], arrays[f'missing{j}'] = column
+
+    for name, arr in arrays.items():
+        np.save(os.path.join(directory, name + '.npy'), arr)
+
+    with open(os.path.join(directory, META), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    LOG.info('cached %d features of %s to %s', count, meta['name'], directory)
+    return count
+
+
+class Layer:
+
+    """
+    Read a coordinate cache with an interface similar to a ``fiona.Collection``.
+
+    Coordinates and attributes are memory-mapped, and the coordinates of each feature are views
+    into the cache, so reading a feature doesn't copy or decode anything.
+
+    The ``uncached`` attribute lists the fields of the original layer that weren't kept in the cache.
+
+    Args:
+        directory (str): A cache directory created with :func:`write`.
+    """
+
+    prepared = False
+
+    def __init__(self, directory):
+        self.path = directory
+        try:
+            with open(os.path.join(directory, META), encoding='utf-8') as f:
+                meta = json.load(f)
+            names = ARRAYS + tuple(f'{a}{j}' for j in range(len(meta['fields'])) for a in ('field', 'missing'))
+            arrays = {n: np.load(os.path.join(directory, n + '.npy'), mmap_mode='r') for n in names}
+        except (IOError, ValueError) as err:
+            raise SvgisError(f'Unable to read cache {directory}: {err}') from err
+
+        self.name = meta['name']
+        self.crs = meta['crs']
+        self.bounds = tuple(meta['bounds'])
+        self.schema = meta['schema']
+        self.uncached = meta.get('uncached', [])
+        self._fields = meta['fields']
+        self._ids = arrays['ids']
+        self._columns = [(arrays[f'field{j}'], arrays[f'missing{j}']) for j in range(len(self._fields))]
+        self._coords = arrays['coords']
+        self._ring_offsets = arrays['ring_offsets']
+        self._part_offsets = arrays['part_offsets']
+        self._geom_offsets = arrays['geom_offsets']
+        self._types = arrays['types']
+        self._bbox = arrays['bbox']
+
+    def __repr__(self):
+        return f'Layer(path={self.path})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._types)
+
+    def __getitem__(self, i):
+        return self._feature(i)
+
+    def close(self):
+        '''Nothing to close, memory maps are released when the arrays are garbage collected.'''
+
+    def _geometry(self, i):
+        code = self._types[i]
+        if code < 0:
+            return None
+
+        kind = TYPES[code]
+        parts = [
+            [
+                self._coords[self._ring_offsets[r] : self._ring_offsets[r + 1]]
+                for r in range(self._part_offsets[p], self._part_offsets[p + 1])
+            ]
+            for p in range(self._geom_offsets[i], self._geom_offsets[i + 1])
+        ]
+
+        if kind == 'Point':
+            coordinates = parts[0][0][0]
+        elif kind in ('MultiPoint', 'LineString'):
+            coordinates = parts[0][0]
+        elif kind in ('MultiLineString', 'Polygon'):
+            coordinates = parts[0]
+        else:
+            coordinates = parts
+
+        return {'type': kind, 'coordinates': coordinates}
+
+    def _feature(self, i):
+        values = (None if missing[i] else column[i].item() for column, missing in self._columns)
+        return {
+            'id': str(self._ids[i]),
+            'properties': dict(zip(self._fields, values)),
+            'geometry': self._geometry(i),
+        }
+
+    def _select(self, bbox=None):
+        '''Indices of the features whose bounding boxes intersect bbox.'''
+        if not bbox:
+            return np.arange(len(self))
+
+        minx, miny, maxx, maxy = bbox
+        box = self._bbox
+        mask = (box[:, 2] >= minx) & (box[:, 0] <= maxx) & (box[:, 3] >= miny) & (box[:, 1] <= maxy)
+        return np.flatnonzero(mask)
+
+    def count(self, bbox=None):
+        '''Count the features whose bounding boxes intersect bbox, without reading them.'''
+        return len(self._select(bbox))
+
+    def items(self, *args, bbox=None):
+        """
+        Iterate over (index, feature) tuples.
+
+        Args:
+            args: optional start, stop and step arguments, as in ``itertools.islice``.
+            bbox (tuple): Only return features whose bounding boxes intersect this box.
+        """
+        indices = self._select(bbox)
+
+        if args:
+            indices = indices[slice(*args)]
+
+        for i in indices:
+            yield int(i), self._feature(i)
@@ -5,31 +5,40 @@
 # http://www.opensource.org/licenses/GNU General Public License v3 (GPLv3)-license
 # Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
 import logging
+import re
 import sys
 import warnings
 
 import click
 import fiona.crs
 
-from . import __version__, bounding
+from . import __version__, bounding, cache
 from . import graticule as _graticule
-from . import projection
+from . import projection, transform
 from . import style as _style
 from . import svgis
 from .utils import DEFAULT_GEOID
 
 none = {'flag_value': None, 'expose_value': False, 'help': '(not enabled)'}
 
+try:
+    # pylint: disable=unused-import
+    import numpy
+except ImportError:
+    numpy = None
 try:
     # pylint: disable=unused-import
     import shapely
+except ImportError:
+    shapely = None
 
+if numpy or shapely:
     clipkwargs = {
         'default': True,
         'flag_value': True,
         'help': "Clip shapes to bounds. Slightly slower, produces smaller files (default: clip).",
     }
-except ImportError:
+else:
     clipkwargs = none
 
 try:
@@ -48,6 +57,15 @@ try:
 except ImportError:
     simplifykwargs = none
 
+methodkwargs = {
+    'type': click.Choice(sorted(transform.SIMPLIFIERS)),
+    'default': 'vw',
+    'help': (
+        'Method for --simplify: Visvalingam-Whyatt, Douglas-Peucker (requires shapely 2), '
+        'or Visvalingam-Whyatt along the shared borders of a polygon coverage (default: vw)'
+    ),
+}
+
 CLICKARGS = {'context_settings': dict(help_option_names=['-h', '--help'])}
 
 csskwargs = {
@@ -88,6 +106,18 @@ def validate_posint(_, __, value):
     return value
 
 
+def validate_size(_, __, value):
+    """Validate a size in bytes, with an optional K, M or G suffix"""
+    if value is None:
+        return None
+
+    match = re.fullmatch(r'(\d+)\s*([kmg]?)b?', str(value).strip().lower())
+    if not match:
+        raise click.BadParameter("Should be a number of bytes, optionally followed by K, M or G")
+
+    return int(match.group(1)) * 1024 ** ' kmg'.index(match.group(2) or ' ')
+
+
 @main.command()
 @inp
 @outp
@@ -181,7 +211,65 @@ def bounds(layer, crs, latlon=False):
     help='Geodata fields to add as data-* attributes (comma-separated)',
 )
 @click.option('-j', '--crs', metavar='KEYWORD', type=str, help=crs_help)
+@click.option(
+    '--sort',
+    'sort_field',
+    type=str,
+    metavar='[LAYER:]FIELD',
+    multiple=True,
+    help='Draw features in order of FIELD, prefix with "-" for descending order',
+)
+@click.option(
+    '--hilbert',
+    default=False,
+    flag_value=True,
+    help='Draw features in order along a Hilbert curve, for better compression',
+)
+@click.option(
+    '--sample',
+    metavar='FRACTION',
+    type=click.FloatRange(0, 1, min_open=True),
+    help='Draw about FRACTION of the features in each layer, for quick previews',
+)
+@click.option(
+    '--max-features',
+    metavar='N',
+    type=click.IntRange(min=1),
+    help='Draw at most N features from each layer, for quick previews',
+)
+@click.option('--seed', type=int, default=0, help='Seed for picking samples (default: 0)')
 @click.option('-s', '--simplify', **simplifykwargs)
+@click.option('--simplify-method', **methodkwargs)
+@click.option(
+    '--auto-simplify',
+    default=False,
+    flag_value=True,
+    help='Simplify geometries by as much as can\'t be seen at the output scale (overrides --simplify)',
+)
+@click.option(
+    '--min-size',
+    metavar='SIZE',
+    type=click.FloatRange(min=0),
+    help='Skip line and polygon features smaller than SIZE, in output units',
+)
+@click.option(
+    '--cull-to-point',
+    default=False,
+    flag_value=True,
+    help='Draw features smaller than --min-size as points, rather than skipping them',
+)
+@click.option(
+    '--max-vertices',
+    metavar='N',
+    type=click.IntRange(min=4),
+    help='Simplify features with more than N vertices down to about N',
+)
+@click.option(
+    '--max-bytes',
+    metavar='SIZE',
+    callback=validate_size,
+    help='Simplify as little as possible to keep the drawing under SIZE bytes (e.g. 5M)',
+)
 @click.option(
     '-P',
     '--precision',
@@ -191,9 +279,47 @@ def bounds(layer, crs, latlon=False):
     callback=validate_posint,
     help='Rounding precision for coordinates (default: 5)',
 )
+@click.option(
+    '--prefetch',
+    metavar='N',
+    type=click.IntRange(min=0),
+    default=0,
+    help='Read up to N features ahead on a background thread (default: 0, off)',
+)
+@click.option(
+    '--project-unique',
+    default=False,
+    flag_value=True,
+    help='Project each distinct coordinate of a batch of features once, for polygon coverages',
+)
+@click.option(
+    '--max-memory',
+    metavar='SIZE',
+    callback=validate_size,
+    help='Keep about SIZE bytes (e.g. 512M) of drawing in memory, spooling the rest to temporary files',
+)
 @click.option('--clip/--no-clip', ' /-n', **clipkwargs)
+@click.option(
+    '--snap/--no-snap',
+    default=True,
+    help='Round coordinates to the output precision before clipping and simplifying (default: snap)',
+)
 @click.option('--inline/--no-inline', '-l/ ', **csskwargs)
 @click.option('--viewbox/--no-viewbox', ' /-x', default=False, help='Draw SVG using a ViewBox (default: no ViewBox)')
+@click.option(
+    '-t',
+    '--tight',
+    default=False,
+    flag_value=True,
+    help='Fit the drawing to the drawn features, rather than the bounds (default: fit to bounds)',
+)
+@click.option('-z', '--compress', default=False, flag_value=True, help='Compress output with gzip (svgz)')
+@click.option(
+    '--explain',
+    default=False,
+    flag_value=True,
+    help='Estimate the size of the drawing and the time it will take, without drawing',
+)
 @click.option('-q', '--quiet', default=False, flag_value=True, help='Ignore warnings')
 @click.option('-v', '--verbose', default=False, count=True, help='Talk a lot')
 def draw(layer, output, **kwargs):
@@ -210,8 +336,103 @@ def draw(layer, output, **kwargs):
         log.handlers[0].setLevel(logging.ERROR)
         log.setLevel(logging.ERROR)
 
-    click.echo(svgis.map(layer, **kwargs).encode('utf-8'), file=output)
+    if kwargs.pop('explain', None):
+        kwargs.pop('compress', None)
+        click.echo(_format_explain(svgis.explain(layer, **kwargs)).encode('utf-8'), file=output)
+        return
+
     log.info('writing %s', output.name)
+    svgis.map_to(output, layer, **kwargs)
+
+
+def _format_explain(report):
+    '''Format the estimates from svgis.explain as a table.'''
+    stages = list(report['seconds'])
+    header = ['layer', 'features', 'in bounds', 'sampled', 'vertices', 'drawn', 'bytes'] + [f'{s} (s)' for s in stages]
+    rows = [
+        [
+            layer['name'],
+            f"{layer['features']:,}" if layer['features'] is not None else '?',
+            f"{layer['in_bounds']:,}",
+            f"{layer['sampled']:,}",
+            f"{layer['vertices']:,}",
+            f"{layer['drawn_vertices']:,}",
+            f"{layer['bytes']:,}",
+        ]
+        + [f"{layer['seconds'].get(s, 0):.3f}" for s in stages]
+        for layer in report['layers']
+    ]
+    rows.append(
+        ['total', '', '', '', '', '', f"{report['bytes']:,}"] + [f"{report['seconds'][s]:.3f}" for s in stages]
+    )
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    lines = [
+        '  '.join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(r, widths)))
+        for r in [header] + rows
+    ]
+    width, height = report['size']
+    lines.append(f'size: {width:.0f} x {height:.0f}, about {sum(report["seconds"].values()):.1f}s')
+    return '\n'.join(lines)
+
+
+# Prepare
+@main.command()
+@click.argument('layer', nargs=-1, type=str, required=True)
+@click.option('-o', '--output', type=click.Path(dir_okay=False), required=True, help='SQLite store to write')
+@click.option('-f', '--scale', type=int, default=None, help='Scale for the map (units are divided by this number)')
+@click.option('-j', '--crs', metavar='KEYWORD', type=str, help=crs_help)
+@click.option('-s', '--simplify', **simplifykwargs)
+@click.option('--simplify-method', **methodkwargs)
+@click.option(
+    '--lod',
+    is_flag=True,
+    default=False,
+    help='Save the effective area of every vertex instead of simplifying, to draw with any --simplify',
+)
+def prepare(layer, output, **kwargs):
+    """
+    Project, scale and simplify layers once, saving the results to a store.
+    Draw them with the same options and a path like store://STORE/LAYERNAME.
+    """
+    # pylint: disable=redefined-outer-name
+    scale = kwargs.pop('scale', None)
+    lod = kwargs.pop('lod', False)
+    drawing = svgis.SVGIS(layer, scalar=(1.0 / scale) if scale else 1.0, **kwargs)
+    for path in drawing.prepare(output, lod=lod):
+        click.echo(path)
+
+
+# Cache
+@main.command('cache')
+@click.argument('layer', type=str)
+@click.option('-o', '--output', type=click.Path(file_okay=False), required=True, help='Cache directory to write')
+@click.option('-i', '--id-field', type=str, metavar='FIELD', help='Geodata field to use as ID')
+@click.option(
+    '-a',
+    '--class-fields',
+    type=str,
+    metavar='FIELDS',
+    multiple=True,
+    help='Geodata fields to use as class (comma-separated)',
+)
+@click.option(
+    '--data-fields',
+    type=str,
+    metavar='FIELDS',
+    multiple=True,
+    help='Geodata fields to add as data-* attributes (comma-separated)',
+)
+def cache_layer(layer, output, id_field, class_fields, data_fields):
+    """
+    Cache the coordinates of a layer for fast repeated drawing.
+    Keeps only the given fields, or all fields if none are given.
+    """
+    fields = [a for c in class_fields + data_fields for a in c.split(',')]
+    if id_field:
+        fields.append(id_field)
+
+    count = cache.write(layer, output, fields=fields or None)
+    click.echo(f'{output}: {count} features')
 
 
 # Proj
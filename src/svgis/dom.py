@@ -60,14 +60,19 @@ def apply_rules(doc, rules, nsmap=None):
     return doc
 
 
-def apply_rule(doc, rule, nsmap):
+def compile_rule(rule, nsmap=None):
     """
-    Apply a tinycss2 rule to an etree.Element
+    Prepare a tinycss2 rule for applying to etree.Elements.
+
     Args:
-        doc (ElementTree.Element): The svg document to scan.
         rule (QualifiedRule): tinycss2 rule
-        nsmap (dict): namespace map
+        nsmap (dict): namespace map.  Default: ``{ "svg": "http://www.w3.org/2000/svg" }``
+
+    Returns:
+        ``tuple`` of a CSSSelector, the rule's declarations as a style attribute,
+        and the value of any ``r`` declaration.
     """
+    nsmap = nsmap or {'svg': SVG_NS}
     declaration = serialize_prelude(rule)
     selector = CSSSelector(declaration, namespaces=nsmap)
 
@@ -81,11 +86,32 @@ def apply_rule(doc, rule, nsmap):
                 rvalue = token.serialize()
                 break
 
-    rule_attrib = ''.join(tokens)
     LOG.debug('rule :%s', rule)
+    return selector, ''.join(tokens), rvalue
+
 
+def apply_compiled(doc, compiled):
+    """
+    Apply a rule prepared with :func:`compile_rule` to an etree.Element.
+
+    Args:
+        doc (ElementTree.Element): The svg document to scan.
+        compiled (tuple): Output of :func:`compile_rule`.
+    """
+    selector, rule_attrib, rvalue = compiled
     for el in selector(doc):
         style_attrib = el.attrib.get('style', '') + ';'
         el.attrib['style'] = (style_attrib + rule_attrib).strip('; ')
         if rvalue:
             el.attrib['r'] = rvalue
+
+
+def apply_rule(doc, rule, nsmap):
+    """
+    Apply a tinycss2 rule to an etree.Element
+    Args:
+        doc (ElementTree.Element): The svg document to scan.
+        rule (QualifiedRule): tinycss2 rule
+        nsmap (dict): namespace map
+    """
+    apply_compiled(doc, compile_rule(rule, nsmap))
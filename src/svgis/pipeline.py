@@ -0,0 +1,348 @@
+'''Overlap reading, drawing and writing with background threads'''
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
+import gzip
+import heapq
+import pickle
+import queue
+import tempfile
+import threading
+from operator import itemgetter
+from time import perf_counter
+
+# Marks the end of a queue.
+_DONE = object()
+
+
+class _Raised:
+    '''Wraps an exception raised on a background thread, so it can be re-raised in the main thread.'''
+
+    def __init__(self, error):
+        self.error = error
+
+
+class Prefetcher:
+
+    """
+    Read items from an iterable on a background thread, keeping up to ``depth`` items ready,
+    so that reading (disk or network I/O) overlaps with processing the items.
+
+    Args:
+        iterable (Iterable): Items to read, e.g. ``layer.items()``.
+        depth (int): Maximum number of items to read ahead.
+
+    Attributes:
+        waiting (float): Seconds spent waiting for the reader, i.e. stalled on I/O.
+        working (float): Seconds spent processing items between reads, i.e. busy with CPU work.
+        reading (float): Seconds the reader spent reading items.
+        count (int): Number of items read.
+    """
+
+    def __init__(self, iterable, depth=64):
+        self.iterable = iterable
+        self.depth = max(1, depth)
+        self.waiting = self.working = self.reading = 0.0
+        self.count = 0
+        self._queue = queue.Queue(maxsize=self.depth)
+        self._stop = threading.Event()
+
+    def __repr__(self):
+        return f'Prefetcher(depth={self.depth}, count={self.count})'
+
+    def _put(self, item):
+        '''Put an item on the queue, giving up if the consumer has stopped.'''
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self):
+        try:
+            iterator = iter(self.iterable)
+            while True:
+                start = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self.reading += perf_counter() - start
+
+                if not self._put(item):
+                    return
+
+        except Exception as e:  # pylint: disable=broad-except
+            self._put(_Raised(e))
+            return
+
+        self._put(_DONE)
+
+    def __iter__(self):
+        reader = threading.Thread(target=self._read, name='svgis-prefetch', daemon=True)
+        reader.start()
+        try:
+            while True:
+                start = perf_counter()
+                item = self._queue.get()
+                self.waiting += perf_counter() - start
+
+                if item is _DONE:
+                    break
+
+                if isinstance(item, _Raised):
+                    raise item.error
+
+                self.count += 1
+                start = perf_counter()
+                yield item
+                self.working += perf_counter() - start
+
+        finally:
+            self._stop.set()
+            reader.join()
+
+    def stats(self):
+        '''Return a ``dict`` of timing measurements.'''
+        return {'count': self.count, 'waiting': self.waiting, 'working': self.working, 'reading': self.reading}
+
+
+class Spool:
+
+    """
+    Collect text fragments in memory, spilling them to a temporary file on disk once
+    they exceed ``max_size`` characters. Iterating over a spool yields the text back in chunks.
+
+    Args:
+        max_size (int): Keep up to this many characters in memory.
+        chunk_size (int): Size of the chunks yielded when reading back.
+    """
+
+    def __init__(self, max_size, chunk_size=65536):
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.size = 0
+        # pylint: disable=consider-using-with
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+', encoding='utf-8', newline='')
+
+    def __repr__(self):
+        return f'Spool(max_size={self.max_size}, size={self.size})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def spilled(self):
+        """True if the contents have been written to disk."""
+        return self.size > self.max_size
+
+    def write(self, fragment):
+        """Add a fragment to the spool."""
+        self._file.write(fragment)
+        self.size += len(fragment)
+
+    def __iter__(self):
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+        self._file.seek(0, 2)
+
+    def split(self, sizes):
+        """Read the contents back as fragments of the given sizes, in characters."""
+        self._file.seek(0)
+        for size in sizes:
+            yield self._file.read(size)
+
+        self._file.seek(0, 2)
+
+    def close(self):
+        """Remove the spool's contents."""
+        self._file.close()
+
+
+class Sorter:
+
+    """
+    Sort text fragments by a key. Fragments are sorted in memory until they exceed ``max_size``
+    characters. Past that, sorted runs are written to temporary files and merged when read back,
+    so that only one fragment per run is held in memory. The sort is stable.
+
+    Args:
+        max_size (int): Keep up to this many characters in memory.
+        reverse (bool): Sort in descending order.
+    """
+
+    def __init__(self, max_size, reverse=False):
+        self.max_size = max_size
+        self.reverse = reverse
+        self.size = 0
+        self._buffer = []
+        self._runs = []
+
+    def __repr__(self):
+        return f'Sorter(max_size={self.max_size}, reverse={self.reverse}, runs={len(self._runs)})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def spilled(self):
+        """True if sorted runs have been written to disk."""
+        return bool(self._runs)
+
+    def add(self, key, fragment):
+        """Add a fragment to be sorted by key."""
+        self._buffer.append((key, fragment))
+        self.size += len(fragment)
+        if self.size > self.max_size:
+            self._spill()
+
+    def _sorted(self):
+        return sorted(self._buffer, key=itemgetter(0), reverse=self.reverse)
+
+    def _spill(self):
+        '''Write the buffer to a temporary file as a sorted run.'''
+        run = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+        for item in self._sorted():
+            pickle.dump(item, run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer, self.size = [], 0
+
+    @staticmethod
+    def _read(run):
+        while True:
+            try:
+                yield pickle.load(run)
+            except EOFError:
+                break
+
+    def __iter__(self):
+        if self._runs:
+            if self._buffer:
+                self._spill()
+            items = heapq.merge(*(self._read(r) for r in self._runs), key=itemgetter(0), reverse=self.reverse)
+        else:
+            items = self._sorted()
+
+        for _, fragment in items:
+            yield fragment
+
+    def close(self):
+        """Remove any sorted runs."""
+        for run in self._runs:
+            run.close()
+        self._runs, self._buffer = [], []
+
+
+class Writer:
+
+    """
+    Write text fragments to a file on a background thread, optionally compressing them with gzip,
+    so that drawing overlaps with compression and disk writes. Fragments are collected into
+    chunks of about ``chunk_size`` characters before being passed to the writer thread.
+    Use as a context manager, or call :meth:`close` when done.
+
+    Args:
+        output (file): A binary file object (or a text file object with a binary ``buffer``).
+        compress (bool): If True, gzip the output.
+        depth (int): Maximum number of chunks waiting to be written.
+        chunk_size (int): Approximate size of the chunks passed to the writer thread.
+
+    Attributes:
+        waiting (float): Seconds spent waiting for the writer, i.e. stalled on I/O.
+        writing (float): Seconds the writer spent encoding, compressing and writing.
+    """
+
+    def __init__(self, output, compress=False, depth=16, chunk_size=65536):
+        self.output = getattr(output, 'buffer', output)
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.waiting = self.writing = 0.0
+        self._chunk, self._size = [], 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._thread = threading.Thread(target=self._write, name='svgis-writer', daemon=True)
+        self._thread.start()
+
+    def __repr__(self):
+        return f'Writer(output={self.output}, compress={self.compress})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self):
+        dest = gzip.GzipFile(fileobj=self.output, mode='wb') if self.compress else self.output
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is _DONE:
+                    break
+
+                start = perf_counter()
+                dest.write(chunk.encode('utf-8'))
+                self.writing += perf_counter() - start
+
+        except Exception as e:  # pylint: disable=broad-except
+            self._error = e
+            # Keep draining the queue so the main thread doesn't block.
+            while self._queue.get() is not _DONE:
+                pass
+
+        finally:
+            if self.compress:
+                dest.close()
+            self.output.flush()
+
+    def _put(self, item):
+        start = perf_counter()
+        self._queue.put(item)
+        self.waiting += perf_counter() - start
+
+    def write(self, fragment):
+        """Queue a fragment of text to be written."""
+        if self._error is not None:
+            raise self._error
+
+        self._chunk.append(fragment)
+        self._size += len(fragment)
+        if self._size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Pass the current chunk to the writer thread."""
+        if self._chunk:
+            self._put(''.join(self._chunk))
+            self._chunk, self._size = [], 0
+
+    def close(self):
+        """Write any remaining fragments, wait for the writer thread to finish, and re-raise any error."""
+        if self._thread.is_alive():
+            self.flush()
+            self._put(_DONE)
+            self._thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """Return a ``dict`` of timing measurements."""
+        return {'waiting': self.waiting, 'writing': self.writing}
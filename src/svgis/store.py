@@ -0,0 +1,286 @@
+'''Save and read projected, scaled and simplified geometries in a SQLite store'''
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
+import json
+import logging
+import sqlite3
+from collections.abc import Mapping
+from itertools import islice
+
+from pyproj.crs import CRS
+
+from . import bounding
+from .errors import SvgisError
+
+LOG = logging.getLogger('svgis')
+
+SCHEME = 'store://'
+
+# Simplification key of layers saved with the effective area of every vertex, which can be drawn at any level.
+LOD = 0
+
+# Effective areas are those of Visvalingam-Whyatt simplification.
+LOD_METHOD = 'vw'
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS layers ('
+    'id INTEGER PRIMARY KEY, '
+    'name TEXT NOT NULL, '
+    'crs TEXT NOT NULL, '
+    'source_crs TEXT, '
+    'scalar REAL NOT NULL, '
+    'simplify INTEGER NOT NULL, '
+    'method TEXT NOT NULL, '
+    'minx REAL, miny REAL, maxx REAL, maxy REAL, '
+    'schema TEXT, '
+    'UNIQUE (name, crs, scalar, simplify, method)'
+    ')',
+    'CREATE TABLE IF NOT EXISTS features ('
+    'id INTEGER PRIMARY KEY, '
+    'layer INTEGER NOT NULL REFERENCES layers (id), '
+    'fid TEXT, '
+    'properties TEXT, '
+    'geometry TEXT'
+    ')',
+    'CREATE INDEX IF NOT EXISTS features_layer ON features (layer)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS features_rtree USING rtree(id, minx, maxx, miny, maxy)',
+)
+
+
+def is_store(path):
+    '''Check if a path points to a layer in a prepared store.'''
+    return isinstance(path, str) and path.startswith(SCHEME)
+
+
+def parse(path):
+    """
+    Split a store path into a database path and a layer name.
+
+    Args:
+        path (str): A path of the form ``store://path/to/store.sqlite/layername``.
+
+    Returns:
+        ``tuple`` (database, layer name)
+    """
+    database, _, name = path[len(SCHEME) :].rpartition('/')
+    if not database or not name:
+        raise SvgisError(f'Expected a path like {SCHEME}path/to/store.sqlite/layer, got: {path}')
+    return database, name
+
+
+def _serialize(obj):
+    '''JSON fallback for numpy arrays and mapping-like geometries.'''
+    try:
+        return obj.tolist()
+    except AttributeError:
+        pass
+
+    if isinstance(obj, Mapping):
+        return dict(obj)
+
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _simplify_key(simplify, lod=False):
+    '''Unsimplified layers are stored as retaining 100%.'''
+    if lod:
+        return LOD
+    return simplify or 100
+
+
+def _method_key(simplify, method, lod=False):
+    '''The simplification method doesn't matter for unsimplified layers, which are stored with an empty method.'''
+    if lod:
+        return LOD_METHOD
+    return method if simplify else ''
+
+
+def write(database, name, crs, scalar, simplify, bounds, schema, features, lod=False, method='vw', source_crs=None):
+    """
+    Save a layer's prepared features to a store, replacing any features saved with the same key.
+
+    Args:
+        database (str): Path to a SQLite file, created if it doesn't exist.
+        name (str): Layer name.
+        crs (pyproj.crs.CRS): The projection of the features.
+        scalar (float): The factor the features were scaled by.
+        simplify (int): The simplification factor used, or ``None``.
+        bounds (tuple): Bounds of the layer in ``crs`` (unscaled).
+        schema (dict): Fiona-like layer schema.
+        features (Sequence): Tuples of (feature id, properties, geometry).
+        lod (bool): The geometries have the effective area of each vertex (see :func:`svgis.transform.effective_areas`),
+            and are saved under a key that matches any simplification factor.
+        method (str): The simplification method used (default: 'vw').
+        source_crs (pyproj.crs.CRS): The projection of the source layer, for reading bounds given in it.
+
+    Returns:
+        ``int`` the number of features written.
+    """
+    count = 0
+    with sqlite3.connect(database) as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+        key = name, crs.to_wkt(), scalar, _simplify_key(simplify, lod), _method_key(simplify, method, lod)
+        old = conn.execute(
+            'SELECT id FROM layers WHERE name = ? AND crs = ? AND scalar = ? AND simplify = ? AND method = ?', key
+        ).fetchone()
+
+        if old:
+            LOG.debug('replacing prepared layer %s in %s', name, database)
+            conn.execute('DELETE FROM features_rtree WHERE id IN (SELECT id FROM features WHERE layer = ?)', old)
+            conn.execute('DELETE FROM features WHERE layer = ?', old)
+            conn.execute('DELETE FROM layers WHERE id = ?', old)
+
+        cursor = conn.execute(
+            'INSERT INTO layers (name, crs, scalar, simplify, method, minx, miny, maxx, maxy, schema, source_crs) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            key
+            + tuple(bounds)
+            + (json.dumps(schema, default=_serialize), source_crs.to_wkt() if source_crs is not None else None),
+        )
+        layer_id = cursor.lastrowid
+
+        for fid, properties, geom in features:
+            box = bounding.geometry(geom)
+            if box is None:
+                continue
+
+            cursor = conn.execute(
+                'INSERT INTO features (layer, fid, properties, geometry) VALUES (?, ?, ?, ?)',
+                (layer_id, fid, json.dumps(properties, default=_serialize), json.dumps(geom, default=_serialize)),
+            )
+            conn.execute(
+                'INSERT INTO features_rtree (id, minx, maxx, miny, maxy) VALUES (?, ?, ?, ?, ?)',
+                (cursor.lastrowid, box[0], box[2], box[1], box[3]),
+            )
+            count += 1
+
+    LOG.info('wrote %d features of %s to %s', count, name, database)
+    return count
+
+
+class Layer:
+
+    """
+    Read prepared features from a store with an interface similar to a ``fiona.Collection``.
+
+    Features are already projected and scaled (and possibly simplified), so ``prepared`` is ``True``.
+    Bounds and bounding box queries are in (unscaled) ``crs`` units. ``source_crs`` is the projection
+    of the layer the entry was prepared from, or ``None`` if it wasn't saved.
+
+    If there's no entry with the given simplification factor and method, but there is one saved with
+    the effective areas of its vertices (and the method is Visvalingam-Whyatt, or there's no simplification),
+    read that instead and set ``lod`` to ``True``.
+    Its geometries have an ``areas`` member, for :func:`svgis.transform.lod_simplifier`.
+
+    Args:
+        path (str): A path of the form ``store://path/to/store.sqlite/layername``.
+        scalar (float): The scale of the entry to read.
+        simplify (int): The simplification factor of the entry to read.
+        crs (pyproj.crs.CRS): The projection of the entry to read. If ``None``, use the first match.
+        method (str): The simplification method of the entry to read (default: 'vw').
+    """
+
+    prepared = True
+    lod = False
+
+    def __init__(self, path, scalar=1, simplify=None, crs=None, method='vw'):
+        database, self.name = parse(path)
+        self.path = path
+        self.scalar = scalar
+        # Features are only read, and may be read on a prefetching thread.
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+
+        try:
+            rows = self._select(scalar, _simplify_key(simplify), _method_key(simplify, method), crs)
+            if not rows and _method_key(simplify, method) in ('', LOD_METHOD):
+                rows = self._select(scalar, LOD, LOD_METHOD, crs)
+                self.lod = bool(rows)
+        except sqlite3.DatabaseError as err:
+            self._conn.close()
+            raise SvgisError(f'Unable to read store {database}: {err}') from err
+
+        if not rows:
+            self._conn.close()
+            raise SvgisError(
+                f'No prepared entry for {self.name} in {database} with scale {scalar}, '
+                f'simplify {simplify} and method {method}'
+            )
+
+        self._id, wkt, source_wkt, *bounds, schema = rows[0]
+        self.crs = CRS(wkt)
+        self.source_crs = CRS(source_wkt) if source_wkt else None
+        self.bounds = tuple(bounds)
+        self.schema = json.loads(schema)
+
+    def _select(self, scalar, key, method, crs=None):
+        rows = self._conn.execute(
+            'SELECT id, crs, source_crs, minx, miny, maxx, maxy, schema FROM layers '
+            'WHERE name = ? AND scalar = ? AND simplify = ? AND method = ? ORDER BY id',
+            (self.name, scalar, key, method),
+        ).fetchall()
+
+        if crs is not None:
+            rows = [r for r in rows if CRS(r[1]) == crs]
+
+        return rows
+
+    def __repr__(self):
+        return f'Layer(path={self.path}, scalar={self.scalar})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM features WHERE layer = ?', (self._id,)).fetchone()[0]
+
+    def count(self, bbox=None):
+        '''Count the features that intersect bbox (in unscaled ``crs`` units), without reading them.'''
+        if not bbox:
+            return len(self)
+
+        minx, miny, maxx, maxy = (c * self.scalar for c in bbox)
+        return self._conn.execute(
+            'SELECT COUNT(*) FROM features f JOIN features_rtree r ON f.id = r.id '
+            'WHERE f.layer = ? AND r.maxx >= ? AND r.minx <= ? AND r.maxy >= ? AND r.miny <= ?',
+            (self._id, minx, maxx, miny, maxy),
+        ).fetchone()[0]
+
+    def close(self):
+        '''Close the connection to the store.'''
+        self._conn.close()
+
+    def items(self, *args, bbox=None):
+        """
+        Iterate over (id, feature) tuples.
+
+        Args:
+            args: optional start, stop and step arguments, as in ``itertools.islice``.
+            bbox (tuple): Only return features that intersect this box (in unscaled ``crs`` units).
+        """
+        if bbox:
+            minx, miny, maxx, maxy = (c * self.scalar for c in bbox)
+            rows = self._conn.execute(
+                'SELECT f.id, f.fid, f.properties, f.geometry FROM features f '
+                'JOIN features_rtree r ON f.id = r.id '
+                'WHERE f.layer = ? AND r.maxx >= ? AND r.minx <= ? AND r.maxy >= ? AND r.miny <= ? '
+                'ORDER BY f.id',
+                (self._id, minx, maxx, miny, maxy),
+            )
+        else:
+            rows = self._conn.execute(
+                'SELECT id, fid, properties, geometry FROM features WHERE layer = ? ORDER BY id', (self._id,)
+            )
+
+        if args:
+            rows = islice(rows, *args)
+
+        for key, fid, properties, geom in rows:
+            yield key, {'id': fid, 'properties': json.loads(properties), 'geometry': json.loads(geom)}
@@ -197,3 +197,52 @@ def inline(svg):
     except (AttributeError, NameError) as e:
         logging.getLogger('svgis').warning("Unable to inline CSS: %s", e)
         return svg
+
+
+class Inliner:
+
+    """
+    Inline CSS rules into fragments of an SVG document one at a time, for documents too large
+    to parse at once. Each fragment is parsed inside its ancestors, so rules like ``#layer .class``
+    still apply. Sibling selectors across fragments won't match, and the ancestors themselves
+    aren't styled.
+
+    Args:
+        css (str): CSS to inline.
+    """
+
+    def __init__(self, css):
+        rules = tinycss2.parse_stylesheet(css or '', skip_whitespace=True, skip_comments=True)
+        self.rules = [dom.compile_rule(r) for r in rules]
+
+    def __repr__(self):
+        return f'Inliner(rules={len(self.rules)})'
+
+    def inline(self, fragment, ancestors):
+        """
+        Inline CSS into a fragment of SVG.
+
+        Args:
+            fragment (str): One or more SVG elements.
+            ancestors (Sequence): (start tag, end tag) tuples of the fragment's ancestors,
+                                  from the outermost (the ``svg`` element) inward.
+
+        Returns:
+            ``str``
+        """
+        if not fragment or not self.rules:
+            return fragment
+
+        starts, ends = zip(*ancestors)
+        doc = etree.fromstring(''.join(starts) + fragment + ''.join(reversed(ends)))
+
+        for compiled in self.rules:
+            dom.apply_compiled(doc, compiled)
+
+        parent = doc
+        for _ in ancestors[1:]:
+            parent = parent[-1]
+
+        # Serialize the innermost ancestor and slice off its own tags.
+        serialized = etree.tostring(parent, encoding='unicode')
+        return serialized[serialized.index('>') + 1 : serialized.rindex('</')]
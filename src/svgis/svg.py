@@ -5,6 +5,8 @@
 # http://opensource.org/licenses/GPL-3.0
 # Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
 
+from itertools import groupby
+
 from . import dom, utils
 
 
@@ -27,6 +29,20 @@ def _element(tag, contents=None, **kwargs):
     return f"<{tag}{attribs}/>"
 
 
+def tags(tag, **kwargs):
+    """
+    Get the opening and closing tags of an element, for wrapping contents that are written separately.
+
+    Args:
+        tag (str): tag name
+        kwargs: to be transformed into attributes
+
+    Returns:
+        ``tuple`` of ``str``
+    """
+    return f"<{tag}{toattribs(**kwargs)}>", f"</{tag}>"
+
+
 def _fmt(precision):
     if precision is None:
         return "{0[0]},{0[1]}"
@@ -37,7 +53,7 @@ def _poly(name):
     def poly(coordinates, precision=None, **kwargs):
         fmt = _fmt(precision)
 
-        points = utils.dedupe(fmt.format(c) for c in coordinates)
+        points = utils.dedupe(fmt.format(c) for c in utils.drop_collinear(coordinates, precision))
         return _element(name(), points=' '.join(points), **kwargs)
 
     return poly
@@ -122,8 +138,14 @@ def path(coordinates, precision=None, **kwargs):
         ``str``
     """
     fmt = _fmt(precision)
-    coords = utils.dedupe(i if isinstance(i, str) else fmt.format(i) for i in coordinates)
-    return _element('path', d=' '.join(coords), **kwargs)
+    coords = []
+    for instruction, group in groupby(coordinates, key=lambda i: isinstance(i, str)):
+        if instruction:
+            coords.extend(group)
+        else:
+            coords.extend(fmt.format(c) for c in utils.drop_collinear(list(group), precision))
+
+    return _element('path', d=' '.join(utils.dedupe(coords)), **kwargs)
 
 
 @_poly
@@ -202,18 +224,17 @@ def group(members=None, **kwargs):
     return _element('g', ''.join(members), **kwargs)
 
 
-def drawing(size, members, precision=None, viewbox=None, style=None):
+def drawing_tags(size, precision=None, viewbox=None, style=None):
     """
-    Create an SVG element.
+    Get the start and end of an SVG element. The start includes the style definitions.
 
     Args:
         size (tuple): width, height
-        members (list): Strings to add to output.
         viewbox (Sequence): Four coordinates that describe an SVG viewBox.
         style (string): CSS string.
 
     Returns:
-        ``str``
+        ``tuple`` of ``str``
     """
     kwargs = {
         'width': size[0],
@@ -231,5 +252,22 @@ def drawing(size, members, precision=None, viewbox=None, style=None):
     if viewbox:
         kwargs['viewBox'] = (','.join(fmt * 4)).format(*viewbox, precision=precision)
 
-    contents = defstyle(style) + ''.join(members)
-    return _element('svg', contents, **kwargs)
+    start, end = tags('svg', **kwargs)
+    return start + defstyle(style), end
+
+
+def drawing(size, members, precision=None, viewbox=None, style=None):
+    """
+    Create an SVG element.
+
+    Args:
+        size (tuple): width, height
+        members (list): Strings to add to output.
+        viewbox (Sequence): Four coordinates that describe an SVG viewBox.
+        style (string): CSS string.
+
+    Returns:
+        ``str``
+    """
+    start, end = drawing_tags(size, precision=precision, viewbox=viewbox, style=style)
+    return start + ''.join(members) + end
@@ -6,19 +6,35 @@
 # Copyright (c) 2015-16, 2020, Neil Freeman <contact@fakeisthenewreal.org>
 import logging
 import os.path
+import random
 import warnings
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
 from functools import partial
+from itertools import islice
+from math import floor
+from time import perf_counter
 
 import fiona
 import fiona.transform
 from pyproj.crs import CRS
 
-from . import bounding, draw, projection
+from . import bounding, cache, dom, draw, pipeline, projection, store
 from . import style as _style
-from . import svg, transform, utils
+from . import svg, topojson, transform, utils
 from .errors import SvgisError
 
+# Characters of drawing to keep in memory before spooling to disk, when not otherwise limited.
+SPOOL_SIZE = 2**26
+
+# Number of features to transform together, with transforms that work on many geometries at once.
+BATCH_SIZE = 1024
+
+# The smallest distance that can be seen in a drawing, in output units (one pixel, at the default size).
+VISIBLE_SIZE = 1
+
+# Stands in for a geometry that transformed to nothing.
+_EMPTY = {'type': 'GeometryCollection', 'geometries': [], 'coordinates': []}
+
 STYLE = (
     'polyline,line,rect,path,polygon,.polygon{'
     'fill:none;'
@@ -32,6 +48,53 @@ STYLE = (
 warnings.filterwarnings("ignore")
 
 
+def _from_options(layers, bounds=None, scale=None, **kwargs):
+    """
+    Create a :class:`SVGIS` instance from the options accepted by :func:`map`.
+
+    Returns:
+        ``tuple`` of the :class:`SVGIS` instance and the remaining keyword arguments.
+    """
+    scale = (1.0 / scale) if scale else 1.0
+    bounds = bounding.check(bounds)
+
+    # Try to read style file(s)
+    styles = ''.join(_style.pick(s) for s in kwargs.pop('style', []))
+
+    class_fields = set(a for c in kwargs.pop('class_fields', []) for a in c.split(','))
+    data_fields = set(a for c in kwargs.pop('data_fields', []) for a in c.split(','))
+
+    drawing = SVGIS(
+        layers,
+        bounds=bounds,
+        scalar=scale,
+        crs=kwargs.pop('crs', None),
+        style=styles,
+        clip=kwargs.pop('clip', True),
+        snap=kwargs.pop('snap', True),
+        id_field=kwargs.pop('id_field', None),
+        class_fields=class_fields,
+        data_fields=data_fields,
+        simplify=kwargs.pop('simplify', None),
+        simplify_method=kwargs.pop('simplify_method', None),
+        prefetch=kwargs.pop('prefetch', None),
+        project_unique=kwargs.pop('project_unique', False),
+        max_memory=kwargs.pop('max_memory', None),
+        tight=kwargs.pop('tight', False),
+        sort_field=kwargs.pop('sort_field', None),
+        hilbert=kwargs.pop('hilbert', False),
+        max_bytes=kwargs.pop('max_bytes', None),
+        max_vertices=kwargs.pop('max_vertices', None),
+        auto_simplify=kwargs.pop('auto_simplify', False),
+        min_size=kwargs.pop('min_size', None),
+        cull_to_point=kwargs.pop('cull_to_point', False),
+        sample=kwargs.pop('sample', None),
+        max_features=kwargs.pop('max_features', None),
+        seed=kwargs.pop('seed', None),
+    )
+    return drawing, kwargs
+
+
 def map(layers, bounds=None, scale=None, **kwargs):
     """
     Draw a geodata layer to SVG. This is shorthand for creating a :class:`SVGIS` instance
@@ -44,6 +107,7 @@ def map(layers, bounds=None, scale=None, **kwargs):
         padding (int): Pad around bounds by this much. In projection units.
         crs (string): EPSG code, PROJ.4 string, or file containing a PROJ.4 string
         clip (bool): If true, clip features output to bounds.
+        snap (bool): If true, snap features to the grid of the output coordinates before clipping them.
         style (Sequence): Path to a css file or a css string.
         class_fields (Sequence): A comma-separated string or list of class names to
                                  use the SVG drawing.
@@ -52,34 +116,95 @@ def map(layers, bounds=None, scale=None, **kwargs):
         precision (int): Precision for rounding output coordinates.
         simplify (int): Integer between 1 and 99 describing simplification level.
                 99: not very much. 1: a lot.
+        simplify_method (str): Simplification method, a key of ``svgis.transform.SIMPLIFIERS``.
+        prefetch (int): Read up to this many features ahead on a background thread.
+        project_unique (bool): Project each distinct coordinate in a batch of features once.
+        max_memory (int): Hold about this many characters of drawn features in memory.
+        tight (bool): Fit the drawing to the extent of the drawn features, rather than the bounds.
+        sort_field (mixed): Draw features in order of this field, see :class:`SVGIS`.
+        hilbert (bool): Draw features in order along a Hilbert curve.
+        max_bytes (int): Simplify as little as possible to keep the drawing under this many bytes.
+        max_vertices (int): Simplify features with more vertices than this down to about this many.
+        auto_simplify (bool): Simplify each layer by as much as can't be seen in the output.
+        min_size (float): Skip line and polygon features smaller than this, in output units.
+        cull_to_point (bool): Draw features smaller than ``min_size`` as points.
+        sample (float): Draw about this fraction of the features in each layer.
+        max_features (int): Draw at most this many features from each layer.
+        seed (int): Seed for picking samples.
 
     Returns:
         ``str`` containing an entire SVG document.
     """
     # pylint: disable=redefined-builtin
-    scale = (1.0 / scale) if scale else 1.0
-    bounds = bounding.check(bounds)
+    drawing, kwargs = _from_options(layers, bounds, scale, **kwargs)
+    return drawing.compose(**kwargs)
 
-    # Try to read style file(s)
-    styles = ''.join(_style.pick(s) for s in kwargs.pop('style', []))
 
-    class_fields = set(a for c in kwargs.pop('class_fields', []) for a in c.split(','))
-    data_fields = set(a for c in kwargs.pop('data_fields', []) for a in c.split(','))
+def map_to(output, layers, bounds=None, scale=None, compress=False, **kwargs):
+    """
+    Draw a geodata layer to an SVG file, writing on a background thread as features are drawn.
+    This is shorthand for creating a :class:`SVGIS` instance and immediately runnning
+    :class:`SVGIS.compose_to`. Accepts the same arguments as :func:`map`.
+
+    Args:
+        output (file): A file object, opened for writing.
+        compress (bool): If True, gzip the output.
+
+    Returns:
+        ``dict`` of timing measurements from the writer thread.
+    """
+    drawing, kwargs = _from_options(layers, bounds, scale, **kwargs)
+    return drawing.compose_to(output, compress=compress, **kwargs)
+
+
+def _sort_fields(spec):
+    """
+    Parse the fields to sort features by.
+
+    Args:
+        spec (mixed): A field name, a list of ``'LAYER:FIELD'`` strings or a ``dict`` of layer names to fields.
+                      Fields prefixed with ``-`` are sorted in descending order.
+
+    Returns:
+        ``dict`` of layer names (``None`` for all layers) to tuples of (field, descending).
+    """
+    if not spec:
+        return {}
+
+    if isinstance(spec, str):
+        spec = [spec]
+
+    if isinstance(spec, Mapping):
+        pairs = spec.items()
+    else:
+        pairs = [(s.rpartition(':')[0] or None, s.rpartition(':')[2]) for s in spec]
+
+    return {layer: (field.lstrip('-'), field.startswith('-')) for layer, field in pairs}
+
+
+def _sort_key(value, descending=False):
+    '''Sort key for a field value that keeps NULLs last.'''
+    return (value is not None if descending else value is None, value)
+
+
+def explain(layers, bounds=None, scale=None, **kwargs):
+    """
+    Estimate the cost of drawing geodata layers, without drawing them. This is shorthand for creating
+    a :class:`SVGIS` instance and immediately running :class:`SVGIS.explain`. Accepts the same arguments
+    as :func:`map`.
+
+    Returns:
+        ``dict`` of estimates.
+    """
+    drawing, kwargs = _from_options(layers, bounds, scale, **kwargs)
+    return drawing.explain(**kwargs)
 
-    drawing = SVGIS(
-        layers,
-        bounds=bounds,
-        scalar=scale,
-        crs=kwargs.pop('crs', None),
-        style=styles,
-        clip=kwargs.pop('clip', True),
-        id_field=kwargs.pop('id_field', None),
-        class_fields=class_fields,
-        data_fields=data_fields,
-        simplify=kwargs.pop('simplify', None),
-    ).compose(**kwargs)
 
-    return drawing
+def _layer_name(layer, filename):
+    '''Name of a layer, correcting for OGR's lack of creativity for GeoJSONs.'''
+    if layer.name == 'OGRGeoJSON':
+        return os.path.splitext(os.path.basename(filename))[0]
+    return layer.name
 
 
 class SVGIS:
@@ -96,9 +221,39 @@ class SVGIS:
         style (str): CSS styles
         padding (number): Buffer each edge by this many map units.
         precision (int): Precision for rounding output coordinates.
+        snap (bool): After scaling, round coordinates to ``precision`` and remove repeated vertices and
+                     lines and rings that collapse, so that they aren't clipped or simplified (default: True).
         simplify (int): Simplification factor (between 1 and 100).
+        simplify_method (str): Simplification method, a key of ``svgis.transform.SIMPLIFIERS``: 'vw'
+                               (Visvalingam-Whyatt, the default), 'dp' (Douglas-Peucker) or 'dp-preserve'
+                               (Douglas-Peucker, keeping polygons valid). The Douglas-Peucker methods need shapely 2.
+        auto_simplify (bool): Simplify each layer by as much as can't be seen in the output. Vertices within half
+                              of the smallest visible output unit (:data:`VISIBLE_SIZE`) of the simplified
+                              geometry are removed. Overrides ``simplify``.
+        max_vertices (int): Simplify features with more vertices than this (after clipping) down to about this many.
+        min_size (float): Skip line and polygon features narrower and shorter than this, in output units.
+        cull_to_point (bool): Draw features smaller than ``min_size`` as points, rather than skipping them.
         id_field (str): Field in data to use for ID'ing elements.
         class_fields (Sequence): Fields in data for added classes to elements.
+        prefetch (int): Read up to this many features ahead on a background thread (default: 0, off).
+        project_unique (bool): Project features in batches of ``BATCH_SIZE`` with pyproj, transforming each
+                               distinct coordinate once, rather than one feature at a time with fiona.
+        max_memory (int): Hold about this many characters of drawn features in memory. With
+                          :meth:`SVGIS.iter_compose` or :meth:`SVGIS.compose_to`, features that are held back
+                          (for ``tight`` or sorting) are spooled to temporary files beyond this,
+                          and CSS is inlined into each feature separately.
+        tight (bool): Fit the drawing to the extent of the drawn features, rather than the bounds.
+        sort_field (mixed): Draw features in order of this field. A field name, a list of ``'LAYER:FIELD'``
+                            strings, or a ``dict`` of layer names to field names. Prefix a field with
+                            ``-`` to sort in descending order. Features are sorted in memory up to
+                            ``max_memory``, and with an external merge sort beyond that.
+        hilbert (bool): Draw the features of each layer in order along a Hilbert curve, which improves
+                        compression of the output. With ``sort_field``, this orders features with equal values.
+        max_bytes (int): Simplify as little as possible to keep the drawing under this many bytes (uncompressed).
+                         Features are held in memory while searching for the right simplification.
+        sample (float): Draw about this fraction of the features in each layer, spread evenly through the layer.
+        max_features (int): Draw at most this many features from each layer, spread evenly through the layer.
+        seed (int): Seed for picking where a sample starts (default: 0).
     """
 
     # The bounding box in input coordinates.
@@ -107,10 +262,15 @@ class SVGIS:
     # The bounding box in output coordinates, to be determined as we draw.
     _projected_bounds = None
 
+    # The extent of the drawn features in scaled output coordinates, tracked when drawing tightly.
+    _drawn_bounds = None
+
     _in_crs, _out_crs = None, None
 
     clipper = None
     simplifier = None
+    budgeter = None
+    culler = None
 
     def __init__(self, files, bounds=None, crs=None, **kwargs):
         self.log = logging.getLogger('svgis')
@@ -144,17 +304,58 @@ class SVGIS:
 
         self.clip = kwargs.pop('clip', True)
 
-        simple = kwargs.pop('simplify', None)
+        self.snap = kwargs.pop('snap', True)
+
+        self.simplify = kwargs.pop('simplify', None)
+        self.simplify_method = kwargs.pop('simplify_method', None) or 'vw'
+
+        if self.simplify:
+            self.simplifier = transform.simplifier(self.simplify, self.simplify_method)
+            self.log.debug('Simplifying with a factor of %d (%s)', self.simplify, self.simplify_method)
+
+        self.min_size = kwargs.pop('min_size', None)
+
+        if self.min_size:
+            self.culler = transform.culler(self.min_size, point=kwargs.pop('cull_to_point', False))
+            self.log.debug('Culling features smaller than %s', self.min_size)
+
+        self.auto_simplify = kwargs.pop('auto_simplify', False)
 
-        if simple:
-            self.simplifier = transform.simplifier(simple)
-            self.log.debug('Simplifying with a factor of %d', simple)
+        if self.auto_simplify and self.simplify:
+            self.log.warning('ignoring simplify factor (%s) in favor of auto_simplify', self.simplify)
+
+        self.max_vertices = kwargs.pop('max_vertices', None)
+
+        if self.max_vertices:
+            self.budgeter = transform.budgeter(self.max_vertices)
+            self.log.debug('Simplifying features to at most %d vertices', self.max_vertices)
 
         self.id_field = kwargs.pop('id_field', None)
 
         self.class_fields = kwargs.pop('class_fields', [])
         self.data_fields = kwargs.pop('data_fields', [])
 
+        self.prefetch = kwargs.pop('prefetch', 0) or 0
+
+        self.project_unique = kwargs.pop('project_unique', False)
+
+        self.max_memory = kwargs.pop('max_memory', None)
+
+        self.tight = kwargs.pop('tight', False)
+
+        self.sort_fields = _sort_fields(kwargs.pop('sort_field', None))
+
+        self.hilbert = kwargs.pop('hilbert', False)
+
+        self.max_bytes = kwargs.pop('max_bytes', None)
+
+        self.sample = kwargs.pop('sample', None)
+        self.max_features = kwargs.pop('max_features', None)
+        self.seed = kwargs.pop('seed', 0) or 0
+
+        # Timing measurements for each layer, keyed by layer name.
+        self.stats = {}
+
     def __repr__(self):
         return f'SVGIS(files={self.files}, out_crs={self.out_crs})'
 
@@ -262,6 +463,8 @@ class SVGIS:
             self.log.info('set up reprojection')
             self.log.debug('  input crs: %s', in_crs)
             self.log.debug('  output crs: %s', self.out_crs)
+            if self.project_unique:
+                return transform.reprojector(in_crs, self.out_crs)
             return partial(fiona.transform.transform_geom, in_crs, self.out_crs.to_dict())
 
         return None
@@ -282,21 +485,10 @@ class SVGIS:
         Returns:
             ``dict`` Arguments for ``self._feature``
         """
-        result = {
-            'transforms': [
-                self._reprojector(layer.crs),
-                partial(transform.scale_geom, factor=scalar),
-                # Get clipping function based on a slightly extended version of _projected_bounds.
-                self._get_clipper(layer.bounds, bounds, scalar=scalar),
-                self.simplifier,
-            ]
-        }
+        stages = self._stages(layer, bounds, scalar, kwargs.get('precision', self.precision))
+        result = {'transforms': [func for _, func in stages]}
 
-        # Correct for OGR's lack of creativity for GeoJSONs.
-        if layer.name == 'OGRGeoJSON':
-            result['name'] = os.path.splitext(os.path.basename(filename))[0]
-        else:
-            result['name'] = layer.name
+        result['name'] = _layer_name(layer, filename)
 
         # A list of class names to get from layer properties.
         class_fields = kwargs.pop('class_fields', None) or self.class_fields
@@ -307,12 +499,177 @@ class SVGIS:
         # Remove the id field if it doesn't appear in the properties.
         id_field = kwargs.pop('id_field', self.id_field)
 
+        # A cache may have left out fields of the original layer.
+        uncached = [x for x in [*class_fields, *data_fields, id_field] if x in getattr(layer, 'uncached', ())]
+        if uncached:
+            raise SvgisError(f"Fields not kept in the cache {filename}: {', '.join(uncached)}")
+
         result['id_field'] = id_field if id_field in layer.schema['properties'].keys() else None
 
         result.update(kwargs)
 
         return result
 
+    def _stages(self, layer, bounds, scalar, precision=None):
+        """
+        The transformations to apply to the geometries of a layer, in order.
+
+        Args:
+            layer (fiona.Collection): An open layer.
+            bounds (tuple): Bounding box (in layer.crs).
+            scalar (int): Map scale.
+            precision (int): Precision for rounding output coordinates.
+
+        Returns:
+            ``list`` of (name, function) tuples. Functions may be ``None``.
+        """
+        # Get clipping function based on a slightly extended version of _projected_bounds.
+        clipper = self._get_clipper(layer.bounds, bounds, scalar=scalar)
+
+        if getattr(layer, 'prepared', False):
+            # Features from a store are already projected, scaled and simplified.
+            if not getattr(layer, 'lod', False):
+                return [('cull', self.culler), ('clip', clipper), ('budget', self.budgeter)]
+
+            # Unless they were saved with effective areas, to be simplified to any level.
+            if self.auto_simplify:
+                simplifier = transform.lod_simplifier(threshold=self._tolerance() ** 2)
+            else:
+                simplifier = transform.lod_simplifier(ratio=self.simplify / 100 if self.simplify else None)
+
+            return [('cull', self.culler), ('simplify', simplifier), ('clip', clipper), ('budget', self.budgeter)]
+
+        project, scale = self._reprojector(layer.crs), partial(transform.scale_geom, factor=scalar)
+
+        if getattr(layer, 'topological', False):
+            # The arcs of a topology are projected and scaled when it's opened for drawing (see _transform_topology).
+            project = scale = None
+
+        stages = [
+            ('project', project),
+            ('scale', scale),
+            ('snap', transform.snapper(precision) if self.snap else None),
+            ('cull', self.culler),
+            ('clip', clipper),
+            ('budget', self.budgeter),
+            ('simplify', self._auto_simplifier(layer, scalar) if self.auto_simplify else self.simplifier),
+        ]
+
+        if self.auto_simplify:
+            # Snapping leaves steps as large as the tolerance, so snap what's left after simplifying.
+            stages.append(stages.pop(2))
+        elif self.simplify_method == 'coverage':
+            # Simplify shared borders before clipping or culling changes them.
+            stages.insert(3, stages.pop())
+
+        return stages
+
+    @staticmethod
+    def _tolerance():
+        """
+        Moving a vertex by less than half of the smallest visible output unit won't change the output by much.
+        Geometries are simplified after they're scaled, so in layer units this is ``tolerance / scalar``.
+        """
+        return VISIBLE_SIZE / 2
+
+    def _auto_simplifier(self, layer, scalar):
+        '''Simplify a layer by as much as can't be seen at the scale of the output.'''
+        tolerance = self._tolerance()
+        self.log.debug(
+            'simplifying %s with a tolerance of %s output units (%s layer units)',
+            layer.name,
+            tolerance,
+            tolerance / scalar,
+        )
+        return transform.tolerance_simplifier(tolerance)
+
+    def _open(self, path, scalar):
+        '''Open a fiona-readable file, a coordinate cache, a TopoJSON file or a layer in a prepared store.'''
+        if cache.is_cache(path):
+            return cache.Layer(path)
+
+        if topojson.is_topojson(path):
+            return topojson.Layer(path)
+
+        if not store.is_store(path):
+            return fiona.open(path)
+
+        # Only filter the store's entries by projection if we were given one.
+        crs = self.out_crs
+        if crs is None and self._out_crs and str(self._out_crs).lower() not in projection.METHODS:
+            crs = projection.pick(self._out_crs)
+
+        layer = store.Layer(path, scalar=scalar, simplify=self.simplify, crs=crs, method=self.simplify_method)
+
+        # Prepared features can't be reprojected, so draw in the store's projection.
+        if not self.out_crs:
+            self._out_crs = layer.crs
+
+        return layer
+
+    def prepare(self, database, lod=False):
+        """
+        Reproject, scale and simplify each file once, and save the results to a
+        SQLite store, keyed by layer name, output projection, scale and simplification factor and method.
+        Draw a prepared layer with a path like ``store://path/to/store.sqlite/layername``,
+        using the same projection, scale and simplification.
+
+        Args:
+            database (str): Path to a SQLite file, created if it doesn't exist.
+            lod (bool): Instead of simplifying, save the Visvalingam-Whyatt effective area of every vertex.
+                The layer can then be drawn with any simplification factor (or ``auto_simplify``)
+                by comparing the areas to a threshold.
+
+        Returns:
+            ``list`` of the store paths of the prepared layers.
+        """
+        paths = []
+        with fiona.Env():
+            for path in self.files:
+                with fiona.open(path) as layer:
+                    self.log.info('preparing %s', layer.name)
+                    self.set_in_crs(layer.crs)
+                    self.set_out_crs(layer.bounds)
+                    bounds = bounding.transform(layer.bounds, in_crs=layer.crs, out_crs=self.out_crs)
+                    transforms = [
+                        self._reprojector(layer.crs),
+                        partial(transform.scale_geom, factor=self.scalar),
+                        transform.effective_areas if lod else self.simplifier,
+                    ]
+                    name = _layer_name(layer, path)
+                    items, kwargs = self._batched(layer.items(), {'transforms': transforms, 'name': name})
+                    features = (
+                        (f.get('id'), f['properties'], self._transform(f['geometry'], kwargs['transforms']))
+                        for _, f in items
+                        if f.get('geometry')
+                    )
+                    store.write(
+                        database,
+                        name,
+                        self.out_crs,
+                        self.scalar,
+                        self.simplify,
+                        bounds,
+                        layer.schema,
+                        features,
+                        lod=lod,
+                        method=self.simplify_method,
+                        source_crs=projection.pick(layer.crs),
+                    )
+                    paths.append(f'{store.SCHEME}{database}/{name}')
+
+        return paths
+
+    @staticmethod
+    def _transform(geom, transforms):
+        '''Apply a list of transformation functions (or ``None``s) to a geometry. Stop if one returns ``None``.'''
+        for t in transforms:
+            geom = t(geom) if t is not None else geom
+            if geom is None:
+                break
+
+        return geom
+
     def compose_file(self, path, unprojected_bounds=None, **kwargs):
         """
         Draw fiona file to an SVG group.
@@ -332,52 +689,301 @@ class SVGIS:
         Returns:
             A ``dict`` with the keys: ``members``, ``id``, ``class``.
             This is ready to be passed to ``svgis.svg.group``.
+            To draw with bounded memory, use :meth:`SVGIS.iter_compose`.
         """
         padding = kwargs.pop('padding', self.padding)
         kwargs['scalar'] = kwargs.get('scalar', self.scalar)
         unprojected_bounds = unprojected_bounds or self.unprojected_bounds
         with fiona.Env():
             self.log.debug('opening %s', path)
-            with fiona.open(path) as layer:
-                self.log.info('reading %s', layer.name)
+            with self._open(path, kwargs['scalar']) as layer:
+                bounds, kwargs = self._setup_layer(layer, path, unprojected_bounds, padding, **kwargs)
+                group = tuple(self._features(layer, bounds, kwargs))
 
-                # Set the input CRS, if not yet set.
-                self.set_in_crs(layer.crs)
+        return {
+            'members': group,
+            'id': kwargs['name'],
+            'class': ' '.join(_style.sanitize(c) for c in layer.schema['properties'].keys()),
+        }
 
-                # When we have passed bounds:
-                if unprojected_bounds:
-                    self.log.debug("Set the output CRS, if not yet set, using unprojected bounds: %s", unprojected_bounds)
-                    self.set_out_crs(unprojected_bounds)
+    def _setup_layer(self, layer, path, unprojected_bounds, padding, **kwargs):
+        """
+        Set the input and output CRS and the projected bounds for an open layer.
 
-                    # If we haven't set the projected bounds yet, do that.
-                    if not self.projected_bounds:
-                        self.update_projected_bounds(self.in_crs, self.out_crs, unprojected_bounds, padding)
+        Returns:
+            ``tuple`` of the bounds in the layer's coordinates and the keyword args for ``self.feature``.
+        """
+        self.log.info('reading %s', layer.name)
 
-                    self.log.debug(
-                        'Getting projected bounds %s (%s) in layer crs (%s)',
-                        self.projected_bounds,
-                        self.out_crs,
-                        layer.crs,
-                    )
-                    bounds = bounding.transform(self.projected_bounds, in_crs=self.out_crs, out_crs=layer.crs)
+        # Set the input CRS, if not yet set. Bounds for a prepared layer are given in the projection of its source.
+        self.set_in_crs(getattr(layer, 'source_crs', None) or layer.crs)
 
-                # When we have no passed bounds:
-                else:
-                    self.log.debug("Set the output CRS, if not yet set, using this layer's bounds.")
-                    self.set_out_crs(layer.bounds)
+        # When we have passed bounds:
+        if unprojected_bounds:
+            self.log.debug("Set the output CRS, if not yet set, using unprojected bounds: %s", unprojected_bounds)
+            self.set_out_crs(unprojected_bounds)
 
-                    # Extend projection_bounds
-                    self.update_projected_bounds(layer.crs, self.out_crs, layer.bounds, padding)
-                    bounds = layer.bounds
+            # If we haven't set the projected bounds yet, do that.
+            if not self.projected_bounds:
+                self.update_projected_bounds(self.in_crs, self.out_crs, unprojected_bounds, padding)
 
-                kwargs = self._prepare_layer(layer, path, bounds, **kwargs)
-                group = tuple(self.feature(f, **kwargs) for _, f in layer.items(bbox=bounds))
+            self.log.debug(
+                'Getting projected bounds %s (%s) in layer crs (%s)',
+                self.projected_bounds,
+                self.out_crs,
+                layer.crs,
+            )
+            bounds = bounding.transform(self.projected_bounds, in_crs=self.out_crs, out_crs=layer.crs)
 
-        return {
-            'members': group,
-            'id': kwargs['name'],
-            'class': ' '.join(_style.sanitize(c) for c in layer.schema['properties'].keys()),
-        }
+        # When we have no passed bounds:
+        else:
+            self.log.debug("Set the output CRS, if not yet set, using this layer's bounds.")
+            self.set_out_crs(layer.bounds)
+
+            # Extend projection_bounds
+            self.update_projected_bounds(layer.crs, self.out_crs, layer.bounds, padding)
+            bounds = layer.bounds
+
+        self._transform_topology(layer, kwargs['scalar'])
+
+        return bounds, self._prepare_layer(layer, path, bounds, **kwargs)
+
+    def _transform_topology(self, layer, scalar):
+        '''Project and scale each arc of a topology once, rather than once for each feature that shares it.'''
+        if getattr(layer, 'topological', False):
+            transforms = [self._reprojector(layer.crs), partial(transform.scale_geom, factor=scalar)]
+            layer.transform(partial(self._transform, transforms=transforms))
+
+    def _features(self, layer, bounds, kwargs):
+        """
+        Draw the features of an open layer that fall within bounds.
+
+        Args:
+            layer (fiona.Collection): An open layer.
+            bounds (tuple): Bounding box in the layer's coordinates.
+            kwargs (dict): Keyword arguments for ``self.feature``, from ``self._prepare_layer``.
+
+        Yields:
+            ``str`` drawn features
+        """
+        features = self._read(layer, bounds, kwargs['name'])
+        yield from self._drawn(features, kwargs, self._sort(layer, kwargs['name']))
+
+    def _read(self, layer, bounds, name):
+        """
+        Read (a sample of) the features of an open layer that fall within bounds,
+        on a background thread if ``prefetch`` is set.
+
+        Yields:
+            (id, feature) tuples
+        """
+        features = self._sample(layer, bounds, name)
+        if not self.prefetch:
+            yield from features
+            return
+
+        prefetcher = pipeline.Prefetcher(features, self.prefetch)
+        yield from prefetcher
+
+        self.stats[name] = prefetcher.stats()
+        self.log.info(
+            'prefetched %d features of %s: waited %.3fs on reading, %.3fs processing',
+            prefetcher.count,
+            name,
+            prefetcher.waiting,
+            prefetcher.working,
+        )
+
+    def _sort(self, layer, name):
+        '''The field to sort a layer by and whether to sort in descending order, or ``None``.'''
+        sort = self.sort_fields.get(name, self.sort_fields.get(None))
+        if sort and sort[0] not in layer.schema['properties']:
+            if name in self.sort_fields:
+                self.log.warning('not sorting %s, no field named %s', name, sort[0])
+            sort = None
+
+        return sort
+
+    def _drawn(self, features, kwargs, sort=None):
+        """
+        Transform and draw features, in batches where the transforms allow, and in order if sorting.
+
+        Args:
+            features (Iterable): (id, feature) tuples.
+            kwargs (dict): Keyword arguments for ``self.feature``.
+            sort (tuple): The field to sort by and whether to sort in descending order.
+
+        Yields:
+            ``str`` drawn features
+        """
+        batches, kwargs = self._batched(features, kwargs)
+
+        if sort or self.hilbert:
+            yield from self._ordered(batches, kwargs, sort)
+
+        else:
+            for _, f in batches:
+                yield self.feature(f, **kwargs)
+
+    def _batched(self, features, kwargs):
+        """
+        If some of the transforms can be applied to many geometries at once (they have a ``batch`` attribute),
+        apply them and the transforms before them to chunks of features. Chunks hold ``BATCH_SIZE`` features,
+        or the smallest ``batch_size`` of the batch transforms. A ``batch_size`` of ``None`` asks for all of them.
+
+        Args:
+            features (Iterable): (id, feature) tuples.
+            kwargs (dict): Keyword arguments for ``self.feature``, from ``self._prepare_layer``.
+
+        Returns:
+            ``tuple`` of an iterator over (id, feature) tuples, and ``kwargs`` with the remaining transforms.
+        """
+        transforms = kwargs['transforms']
+        batched = [i for i, func in enumerate(transforms) if hasattr(func, 'batch')]
+        if not batched:
+            return features, kwargs
+
+        sizes = [getattr(transforms[i], 'batch_size', BATCH_SIZE) for i in batched]
+        size = None if None in sizes else min(sizes)
+        last = batched[-1] + 1
+        batches = self._transform_batches(features, transforms[:last], kwargs['name'], size)
+        return batches, dict(kwargs, transforms=transforms[last:])
+
+    def _transform_batches(self, features, transforms, name, size=BATCH_SIZE):
+        '''Apply transforms to chunks of ``size`` features (or all of them), in batches where they can be.'''
+        features = iter(features)
+        while True:
+            chunk = list(islice(features, size))
+            if not chunk:
+                break
+
+            geoms = [f.get('geometry') for _, f in chunk]
+            for func in transforms:
+                if func is None:
+                    continue
+
+                if hasattr(func, 'batch'):
+                    geoms = func.batch(geoms)
+                    continue
+
+                for i, geom in enumerate(geoms):
+                    try:
+                        geoms[i] = func(geom) if geom is not None else None
+                    except SvgisError as e:
+                        self.log.warning('error transforming feature %s of %s: %s', chunk[i][1].get('id', '?'), name, e)
+                        geoms[i] = None
+
+            for (key, f), geom in zip(chunk, geoms):
+                # Keep NULL geometries apart from those that transform to nothing, so they're logged as such.
+                if geom is None and f.get('geometry') is not None:
+                    geom = _EMPTY
+                yield key, dict(f, geometry=geom)
+
+    def _sample(self, layer, bounds, name):
+        """
+        Read about ``sample`` of the features of a layer within bounds, and no more than ``max_features`` of them.
+        The reader skips ahead by the whole part of the stride, so most of the skipped features are never decoded,
+        and the fractional part is kept by accumulating it from feature to feature.
+
+        Args:
+            layer (fiona.Collection): An open layer.
+            bounds (tuple): Bounding box in the layer's coordinates.
+            name (str): Name of the layer, for logging.
+
+        Returns:
+            ``Iterable`` of (id, feature) tuples.
+        """
+        fraction = min(self.sample or 1, 1)
+        if self.max_features:
+            count = self._count(layer, bounds)
+            if count > self.max_features:
+                fraction = min(fraction, self.max_features / count)
+
+        if fraction >= 1:
+            return layer.items(bbox=bounds)
+
+        # Start at a random offset, so different seeds give different samples.
+        rng = random.Random(self.seed)
+        step = floor(1 / fraction)
+        start = rng.randrange(step)
+        self.log.info('sampling %.3g of the features of %s, starting with feature %d', fraction, name, start)
+        features = layer.items(start, None, step if step > 1 else None, bbox=bounds)
+
+        keep = fraction * step
+        if keep < 1:
+            offset = rng.random()
+            features = (f for i, f in enumerate(features) if floor((i + 1) * keep + offset) > floor(i * keep + offset))
+
+        if self.max_features:
+            features = islice(features, self.max_features)
+
+        return features
+
+    def _ordered(self, features, kwargs, sort=None):
+        """
+        Draw features, yielding them in order of a field and/or along a Hilbert curve.
+        Features are sorted in memory up to ``max_memory``, and with an external merge sort beyond that.
+
+        Args:
+            features (Iterable): (id, feature) tuples.
+            kwargs (dict): Keyword arguments for ``self.feature``.
+            sort (tuple): The field to sort by and whether to sort in descending order.
+
+        Yields:
+            ``str`` drawn features
+        """
+        field, descending = sort or (None, False)
+        size = self.max_memory or SPOOL_SIZE
+
+        def key(feature):
+            return _sort_key(feature['properties'].get(field), descending) if field else ()
+
+        if field:
+            self.log.debug('sorting %s by %s%s', kwargs['name'], field, ' (descending)' if descending else '')
+
+        if not self.hilbert:
+            with pipeline.Sorter(size, reverse=descending) as sorter:
+                for _, f in features:
+                    fragment = self.feature(f, **kwargs)
+                    if fragment:
+                        sorter.add(key(f), fragment)
+
+                yield from sorter
+            return
+
+        self.log.debug('ordering %s along a Hilbert curve', kwargs['name'])
+        keys, centers, drawn = [], [], {}
+
+        def record(geom):
+            '''Record the bounding box of a transformed geometry.'''
+            drawn['box'] = bounding.geometry(geom)
+            return geom
+
+        kwargs = dict(kwargs, transforms=list(kwargs['transforms']) + [record])
+
+        # The Hilbert index depends on every feature in the layer, so hold
+        # features in their original order until all have been drawn.
+        lengths = []
+        with pipeline.Spool(size) as held, pipeline.Sorter(size, reverse=descending) as sorter:
+            for _, f in features:
+                fragment = self.feature(f, **kwargs)
+                box = drawn.pop('box', None)
+                if fragment:
+                    held.write(fragment)
+                    lengths.append(len(fragment))
+                    keys.append(key(f))
+                    centers.append(((box[0] + box[2]) / 2, (box[1] + box[3]) / 2) if box else (float('nan'),) * 2)
+
+            try:
+                distances = utils.hilbert(centers).tolist()
+            except NameError:
+                self.log.warning('not ordering %s along a Hilbert curve, numpy is not available', kwargs['name'])
+                distances = [0] * len(keys)
+
+            for k, distance, fragment in zip(keys, distances, held.split(lengths)):
+                sorter.add((k, -distance if descending else distance), fragment)
+
+            yield from sorter
 
     def feature(self, feature, transforms, classes, datas=None, **kwargs):
         """
@@ -407,15 +1013,17 @@ class SVGIS:
                 raise SvgisError('NULL geometry')
 
             # Apply transformations to the geometry.
-            for t in transforms:
-                geom = t(geom) if t is not None else geom
+            geom = self._transform(geom, transforms)
 
-            if geom['coordinates'] is None or len(geom['coordinates']) == 0:
+            if geom is None or geom['coordinates'] is None or len(geom['coordinates']) == 0:
                 self.log.debug(
                     'Skipping feature with empty geometry after transformation: "%s" in layer "%s"', fid, name or '?'
                 )
                 return ''
 
+            if self.tight:
+                self._extend_drawn_bounds(bounding.geometry(geom))
+
         except SvgisError as e:
             self.log.warning(
                 'error transforming feature %s of %s: %s', kwargs.get('id', feature.get('id', '?')), name, e
@@ -444,6 +1052,17 @@ class SVGIS:
             self.log.warning('unable to draw feature %s of %s: %s', fid, name or '?', e)
             return ''
 
+    def _extend_drawn_bounds(self, box):
+        '''Extend the extent of drawn features with a bounding box.'''
+        if box is None:
+            return
+
+        if self._drawn_bounds is None:
+            self._drawn_bounds = box
+        else:
+            old = self._drawn_bounds
+            self._drawn_bounds = min(old[0], box[0]), min(old[1], box[1]), max(old[2], box[2]), max(old[3], box[3])
+
     def compose(self, bounds=None, style=None, viewbox=True, inline=True, **kwargs):
         """
         Draw files to svg.
@@ -462,9 +1081,13 @@ class SVGIS:
         Returns:
             ``str`` containing an entire SVG document.
         """
+        if self.max_bytes:
+            return self._compose_fitted(bounds, style=style, viewbox=viewbox, inline=inline, **kwargs)
+
         # Set up arguments
         scalar = kwargs.pop('scalar', self.scalar)
         bounds = bounding.check(bounds) or self.unprojected_bounds
+        self._drawn_bounds = None
 
         # Draw files
         members = [svg.group(**self.compose_file(f, bounds, scalar=scalar, **kwargs)) for f in self.files]
@@ -479,25 +1102,405 @@ class SVGIS:
 
         return drawing
 
-    def draw(self, members, scalar=None, precision=None, style=None, **kwargs):
+    def _compose_fitted(self, bounds=None, style=None, viewbox=True, inline=True, **kwargs):
         """
-        Combine drawn layers into an SVG drawing.
+        Draw files to svg, simplifying as little as possible to fit the drawing in ``max_bytes``.
+        Features are read, projected, scaled and clipped once, then simplified and drawn with a
+        binary search over simplification ratios. If even the most simplified drawing is too large,
+        search again with fewer decimal places, down to a precision of 0.
+
+        Takes the same arguments as :meth:`SVGIS.compose`.
+
+        Returns:
+            ``str`` containing an entire SVG document.
+        """
+        scalar = kwargs.pop('scalar', self.scalar)
+        bounds = bounding.check(bounds) or self.unprojected_bounds
+        padding = kwargs.pop('padding', self.padding)
+        precision = kwargs.pop('precision', self.precision)
+
+        if self.max_memory:
+            self.log.warning('fitting the drawing in %d bytes holds every feature in memory', self.max_bytes)
+
+        layers = []
+        with fiona.Env():
+            for path in self.files:
+                with self._open(path, scalar) as layer:
+                    layer_bounds, layer_kwargs = self._setup_layer(
+                        layer, path, bounds, padding, scalar=scalar, **kwargs
+                    )
+                    layers.append(self._cache_layer(layer, layer_bounds, layer_kwargs, scalar, precision))
+
+        drawing = self._fit(
+            partial(self._draw_cached, layers, scalar, style=style, viewbox=viewbox, inline=inline),
+            self.simplify or 100,
+            [None] if precision is None else range(precision, -1, -1),
+        )
+
+        # Always reset projected bounds.
+        self._projected_bounds = None
+
+        return drawing
+
+    def _cache_layer(self, layer, bounds, kwargs, scalar, precision=None):
+        """
+        Read and transform the features of an open layer once, leaving out the simplifier.
+        The effective areas of a level of detail store don't survive clipping, so its features
+        are only culled, and the stages from the simplifier on are left for drawing.
+
+        Returns:
+            ``tuple`` of the group attributes, the keyword args for ``self.feature``, the sort order,
+            a ``list`` of transformed (id, feature) tuples, and the ``list`` of stages left after simplifying,
+            or ``None`` if the layer isn't a level of detail store.
+        """
+        stages = self._stages(layer, bounds, scalar, precision)
+        if getattr(layer, 'lod', False):
+            split = [stage for stage, _ in stages].index('simplify')
+            stages, after = [func for _, func in stages[:split]], [func for _, func in stages[split + 1 :]]
+        else:
+            stages, after = [func for stage, func in stages if stage != 'simplify'], None
+
+        features, remaining = self._batched(
+            self._read(layer, bounds, kwargs['name']), dict(kwargs, transforms=stages)
+        )
+
+        cached = []
+        for key, f in features:
+            try:
+                geom = self._transform(f['geometry'], remaining['transforms']) if f.get('geometry') else None
+            except SvgisError as e:
+                self.log.warning('error transforming feature %s of %s: %s', f.get('id'), kwargs['name'], e)
+                continue
+
+            if geom is not None and geom is not _EMPTY:
+                cached.append((key, dict(f, geometry=geom)))
+
+        attribs = {
+            'id': kwargs['name'],
+            'class': ' '.join(_style.sanitize(c) for c in layer.schema['properties'].keys()),
+        }
+        return attribs, kwargs, self._sort(layer, kwargs['name']), cached, after
+
+    def _draw_cached(self, layers, scalar, ratio, places, **kwargs):
+        """
+        Simplify and draw layers cached by :meth:`SVGIS._cache_layer`.
 
         Args:
-            members (list): unicode representations of SVG groups.
-            scalar (int): factor by which to scale the data, generally a small number (1/map scale).
+            layers (list): Cached layers.
+            scalar (int): Map scale.
+            ratio (int): Simplification factor, between 1 and 100.
+            places (int): Precision for rounding output coordinates.
+            kwargs: Keyword arguments for :meth:`SVGIS.draw`.
+
+        Returns:
+            ``tuple`` of the drawing and its size in bytes.
+        """
+        simplifier = transform.simplifier(ratio, self.simplify_method) if ratio < 100 else None
+        self._drawn_bounds = None
+        members = []
+        for attribs, layer_kwargs, sort, cached, after in layers:
+            if after is None:
+                transforms = [simplifier]
+            else:
+                transforms = [transform.lod_simplifier(ratio=ratio / 100 if ratio < 100 else None)] + after
+
+            feature_kwargs = dict(layer_kwargs, transforms=transforms, precision=places)
+            members.append(svg.group(list(self._drawn(cached, feature_kwargs, sort)), **attribs))
+
+        drawing = self.draw(members, scalar, places, **kwargs)
+        size = len(drawing.encode('utf-8'))
+        self.log.debug('simplifying to %d with precision %s: %d bytes', ratio, places, size)
+        return drawing, size
+
+    def _fit(self, drawer, highest, precisions):
+        """
+        Search for the largest simplification ratio that fits a drawing in ``max_bytes``,
+        keeping as many decimal places as possible. If nothing fits, settle for the smallest drawing.
+
+        Args:
+            drawer (function): Draw at a ratio and precision, returning the drawing and its size in bytes.
+            highest (int): The largest ratio to try.
+            precisions (Sequence): Precisions to try, in order.
+
+        Returns:
+            ``str`` the drawing.
+        """
+        for places in precisions:
+            drawing, size = drawer(highest, places)
+            if size <= self.max_bytes:
+                return drawing
+
+            best = None
+            low, high = 1, highest - 1
+            while low <= high:
+                ratio = (low + high) // 2
+                attempt, size = drawer(ratio, places)
+                if size <= self.max_bytes:
+                    best, low = (attempt, ratio), ratio + 1
+                else:
+                    high = ratio - 1
+
+            if best:
+                self.log.info('simplified to %d with precision %s to fit %d bytes', best[1], places, self.max_bytes)
+                return best[0]
+
+        drawing, size = drawer(1, precisions[-1])
+        self.log.warning('unable to fit drawing in %d bytes, smallest drawing is %d bytes', self.max_bytes, size)
+        return drawing
+
+    def iter_compose(self, bounds=None, style=None, viewbox=True, inline=True, **kwargs):
+        """
+        Draw files to svg, yielding the document in fragments as features are drawn.
+        Takes the same arguments as :meth:`SVGIS.compose`.
+
+        Each file is opened once to find its projection and bounds before any features are drawn,
+        since those are needed for the ``svg`` element. Inlining CSS requires the whole document,
+        so with ``inline=True`` this only yields once, unless ``max_memory`` is set. In that case,
+        CSS is inlined into each feature separately (see :class:`svgis.style.Inliner`).
+
+        With ``tight=True``, the dimensions of the ``svg`` element aren't known until every feature is drawn,
+        so the drawn features are spooled (to disk, beyond ``max_memory``) and yielded after the ``svg`` element.
+
+        Yields:
+            ``str`` fragments of an SVG document.
+        """
+        if self.max_bytes or (inline and not self.max_memory):
+            yield self.compose(bounds, style=style, viewbox=viewbox, inline=inline, **kwargs)
+            return
+
+        inliner = _style.Inliner(style or self.style) if inline else None
+
+        scalar = kwargs.pop('scalar', self.scalar)
+        bounds = bounding.check(bounds) or self.unprojected_bounds
+        padding = kwargs.pop('padding', self.padding)
+        self._drawn_bounds = None
+
+        if self.tight:
+            # Draw the body to a spool while tracking the extent of the drawn features,
+            # then write the svg element with exact dimensions.
+            with pipeline.Spool(self.max_memory or SPOOL_SIZE) as body:
+                with fiona.Env():
+                    for path in self.files:
+                        with self._open(path, scalar) as layer:
+                            layer_args = self._setup_layer(layer, path, bounds, padding, scalar=scalar, **kwargs)
+                            for fragment in self._group(layer, *layer_args, inliner=inliner):
+                                body.write(fragment)
+
+                start, end = self._drawing_tags(scalar, kwargs.get('precision'), style=style, viewbox=viewbox)
+                yield start
+                yield from body
+                yield end
+
+        else:
+            # Set up projections and bounds, without reading features.
+            layers = []
+            with fiona.Env():
+                for path in self.files:
+                    with self._open(path, scalar) as layer:
+                        layers.append((path, self._setup_layer(layer, path, bounds, padding, scalar=scalar, **kwargs)))
+
+            start, end = self._drawing_tags(scalar, kwargs.get('precision'), style=style, viewbox=viewbox)
+            yield start
+
+            with fiona.Env():
+                for path, layer_args in layers:
+                    with self._open(path, scalar) as layer:
+                        self._transform_topology(layer, scalar)
+                        yield from self._group(layer, *layer_args, inliner=inliner)
+
+            yield end
+
+        # Always reset projected bounds.
+        self._projected_bounds = None
+
+    def _group(self, layer, bounds, kwargs, inliner=None):
+        """
+        Draw the features of an open layer in a group.
+
+        Args:
+            layer (fiona.Collection): An open layer.
+            bounds (tuple): Bounding box in the layer's coordinates.
+            kwargs (dict): Keyword arguments for ``self.feature``, from ``self._prepare_layer``.
+            inliner (svgis.style.Inliner): Inline CSS into each feature.
+
+        Yields:
+            ``str`` fragments of the group
+        """
+        attribs = {
+            'id': kwargs['name'],
+            'class': ' '.join(_style.sanitize(c) for c in layer.schema['properties'].keys()),
+        }
+        group_start, group_end = svg.tags('g', **attribs)
+        ancestors = [svg.tags('svg', xmlns=dom.SVG_NS), svg.tags('g'), (group_start, group_end)]
+        empty = True
+        for fragment in self._features(layer, bounds, kwargs):
+            if inliner:
+                fragment = inliner.inline(fragment, ancestors)
+
+            if fragment and empty:
+                yield group_start
+                empty = False
+            yield fragment
+
+        # Match svg.group, which closes empty groups with "/>".
+        yield svg.group(**attribs) if empty else group_end
+
+    def explain(self, bounds=None, style=None, viewbox=True, sample_size=100, **kwargs):
+        """
+        Estimate the cost of drawing files, without drawing them. Each file is opened and its projection
+        and bounds are set up as in :meth:`SVGIS.compose`. Features within the bounds are counted, and a
+        sample of them is transformed and drawn. Estimates are extrapolated from the sample.
+
+        Args:
+            bounds (Sequence): Map bounding box in input units. Defaults to map data bounds.
             style (str): CSS to append to parent object CSS.
-            viewbox (bool): If True, draw SVG with a viewbox. If False, translate coordinates to
-                            the frame. Defaults to True.
-            inline (bool): If True, try to run CSS into each element.
+            viewbox (bool): If True, draw SVG with a viewbox. If False, translate coordinates to (0, 0).
+            sample_size (int): Maximum number of features to draw from each layer.
+            scalar (int): Map scale.
+            padding (int): Number of map units by which to pad output bounds.
 
         Returns:
-            ``str`` containing an entire SVG document.
+            ``dict`` with the keys ``layers`` (a list of estimates for each layer), ``size`` (the width and
+            height of the drawing), ``bytes`` (estimated size of the output) and ``seconds`` (estimated time
+            for each stage of drawing).
         """
-        scalar = scalar or self.scalar
-        precision = precision or self.precision
-        style = style or self.style
-        transform_attrib = 'scale(1,-1)'
+        scalar = kwargs.pop('scalar', self.scalar)
+        bounds = bounding.check(bounds) or self.unprojected_bounds
+        padding = kwargs.pop('padding', self.padding)
+        kwargs.pop('inline', None)
+
+        estimates = []
+        with fiona.Env():
+            for path in self.files:
+                with self._open(path, scalar) as layer:
+                    layer_bounds, layer_kwargs = self._setup_layer(
+                        layer, path, bounds, padding, scalar=scalar, **kwargs
+                    )
+                    names = [name for name, _ in self._stages(layer, layer_bounds, scalar, kwargs.get('precision'))]
+                    estimates.append(self._explain_layer(layer, layer_bounds, layer_kwargs, names, sample_size))
+
+        start, end = self._drawing_tags(scalar, kwargs.get('precision'), style=style, viewbox=viewbox)
+        _, size = self._dimensions(scalar)
+        self._projected_bounds = None
+
+        seconds = {}
+        for estimate in estimates:
+            for stage, value in estimate['seconds'].items():
+                seconds[stage] = seconds.get(stage, 0) + value
+
+        return {
+            'layers': estimates,
+            'size': tuple(size),
+            'bytes': len(start) + len(end) + sum(e['bytes'] for e in estimates),
+            'seconds': seconds,
+        }
+
+    def _explain_layer(self, layer, bounds, kwargs, stages, sample_size):
+        '''Estimate the cost of drawing the features of an open layer by drawing a sample of them.'''
+        try:
+            total = len(layer)
+        except TypeError:
+            total = None
+
+        count = self._count(layer, bounds)
+        step = count // sample_size if count > sample_size else None
+        seconds = dict.fromkeys(['read'] + stages + ['draw'], 0.0)
+        sampled = vertices = drawn_vertices = size = 0
+
+        features = iter(layer.items(0, None, step, bbox=bounds))
+        while sampled < sample_size:
+            start = perf_counter()
+            try:
+                _, feature = next(features)
+            except StopIteration:
+                break
+            finally:
+                seconds['read'] += perf_counter() - start
+
+            sampled += 1
+            geom = feature.get('geometry')
+            if geom is None:
+                continue
+
+            vertices += bounding.vertices(geom)
+            try:
+                for stage, func in zip(stages, kwargs['transforms']):
+                    start = perf_counter()
+                    geom = func(geom) if func is not None else geom
+                    seconds[stage] += perf_counter() - start
+                    if geom is None:
+                        break
+
+            except SvgisError:
+                continue
+
+            if geom is None:
+                continue
+
+            drawn_vertices += bounding.vertices(geom)
+            start = perf_counter()
+            size += len(self.feature(dict(feature, geometry=geom), **dict(kwargs, transforms=[])))
+            seconds['draw'] += perf_counter() - start
+
+        factor = count / sampled if sampled else 0
+        self.log.debug('sampled %d of %d features in bounds of %s', sampled, count, kwargs['name'])
+        return {
+            'name': kwargs['name'],
+            'features': total,
+            'in_bounds': count,
+            'sampled': sampled,
+            'vertices': round(vertices * factor),
+            'drawn_vertices': round(drawn_vertices * factor),
+            'bytes': round(size * factor) + len(svg.group(id=kwargs['name'])),
+            'seconds': {stage: value * factor for stage, value in seconds.items()},
+        }
+
+    @staticmethod
+    def _count(layer, bounds):
+        '''Count the features of a layer within bounds, without decoding them where the reader allows.'''
+        if hasattr(layer, 'count'):
+            return layer.count(bbox=bounds)
+
+        if not bounds or bounding.covers(bounds, layer.bounds):
+            try:
+                return len(layer)
+            except TypeError:
+                pass
+
+        return sum(1 for _ in layer.keys(bbox=bounds))
+
+    def compose_to(self, output, compress=False, **kwargs):
+        """
+        Draw files to svg and write the result to a file, writing on a background thread
+        as features are drawn. Takes the same arguments as :meth:`SVGIS.compose`.
+
+        Args:
+            output (file): A file object, opened for writing.
+            compress (bool): If True, gzip the output.
+
+        Returns:
+            ``dict`` of timing measurements from the writer thread.
+        """
+        with pipeline.Writer(output, compress=compress) as writer:
+            for fragment in self.iter_compose(**kwargs):
+                writer.write(fragment)
+            writer.write('\n')
+
+        self.log.info('waited %.3fs on writing, wrote for %.3fs', writer.waiting, writer.writing)
+        return writer.stats()
+
+    def _dimensions(self, scalar):
+        """
+        Get the size and origin of the drawing.
+
+        Returns:
+            ``tuple`` of the scaled projected bounds (minx, miny, maxx, maxy) and the size (width, height).
+        """
+        if self.tight and self._drawn_bounds:
+            self.log.debug('fitting drawing to drawn bounds: %s', self._drawn_bounds)
+            dims = bounding.pad(self._drawn_bounds, self.padding * scalar)
+            size = [dims[2] - dims[0], dims[3] - dims[1]]
+            return dims, size
 
         try:
             if any((utils.isinf(b) for b in self._projected_bounds)):
@@ -512,6 +1515,51 @@ class SVGIS:
         size = [dims[2] - dims[0], dims[3] - dims[1]]
 
         self.log.debug('Size: %f x %f', *size)
+        return dims, size
+
+    def _drawing_tags(self, scalar=None, precision=None, style=None, viewbox=True):
+        """
+        Get the start and end of an SVG drawing, for writing members in between.
+
+        Returns:
+            ``tuple`` of ``str``
+        """
+        scalar = scalar or self.scalar
+        precision = precision or self.precision
+        style = style or self.style
+        transform_attrib = 'scale(1,-1)'
+        dims, size = self._dimensions(scalar)
+
+        if viewbox:
+            viewbox = [dims[0], -dims[3]] + size
+        else:
+            viewbox = None
+            transform_attrib += f' translate({-dims[0]},{-dims[3]})'
+
+        start, end = svg.drawing_tags(size, style=style, precision=precision, viewbox=viewbox)
+        group_start, group_end = svg.tags('g', transform=transform_attrib)
+        return start + group_start, group_end + end
+
+    def draw(self, members, scalar=None, precision=None, style=None, **kwargs):
+        """
+        Combine drawn layers into an SVG drawing.
+
+        Args:
+            members (list): unicode representations of SVG groups.
+            scalar (int): factor by which to scale the data, generally a small number (1/map scale).
+            style (str): CSS to append to parent object CSS.
+            viewbox (bool): If True, draw SVG with a viewbox. If False, translate coordinates to
+                            the frame. Defaults to True.
+            inline (bool): If True, try to run CSS into each element.
+
+        Returns:
+            ``str`` containing an entire SVG document.
+        """
+        scalar = scalar or self.scalar
+        precision = precision or self.precision
+        style = style or self.style
+        transform_attrib = 'scale(1,-1)'
+        dims, size = self._dimensions(scalar)
 
         if kwargs.pop('viewbox', True):
             viewbox = [dims[0], -dims[3]] + size
@@ -0,0 +1,242 @@
+'''Read TopoJSON files, transforming each shared arc only once'''
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
+import json
+import logging
+
+from pyproj.crs import CRS
+
+from . import bounding
+from .errors import SvgisError
+
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+LOG = logging.getLogger('svgis')
+
+EXTENSIONS = ('.topojson', '.topo.json')
+
+# Separates the path of a TopoJSON file from the name of one of its objects.
+SEPARATOR = '#'
+
+# Fiona-like names for the types of properties.
+FIELD_TYPES = {bool: 'bool', int: 'int', float: 'float'}
+
+
+def is_topojson(path):
+    '''Check if a path points to a TopoJSON file, optionally followed by ``#`` and an object name.'''
+    return isinstance(path, str) and path.partition(SEPARATOR)[0].lower().endswith(EXTENSIONS)
+
+
+def _decode(arcs, transform=None):
+    '''Convert arcs to arrays of coordinates, undoing quantization and delta-encoding.'''
+    decoded = [np.array(arc, dtype=float).reshape(-1, len(arc[0]) if arc else 2)[:, :2] for arc in arcs]
+    if transform is None:
+        return decoded
+
+    scale, translate = np.array(transform['scale'], dtype=float), np.array(transform['translate'], dtype=float)
+    return [np.cumsum(arc, axis=0) * scale + translate for arc in decoded]
+
+
+class Layer:
+
+    """
+    Read one object of a TopoJSON file with an interface similar to a ``fiona.Collection``.
+    Arcs are decoded once, when the file is opened. Features are assembled from the arcs when they're read.
+
+    Call :meth:`transform` to project (and scale) the arcs and points of the layer, each only once,
+    even where an arc is shared by several features. Bounds and bounding box queries stay in ``crs``.
+
+    Args:
+        path (str): Path to a TopoJSON file, optionally followed by ``#`` and the name of an object
+                    (default: the first object).
+        crs (mixed): The projection of the coordinates (default: WGS84).
+    """
+
+    prepared = False
+    topological = True
+
+    def __init__(self, path, crs=None):
+        self.path = path
+        filename, _, name = path.partition(SEPARATOR)
+        try:
+            with open(filename, encoding='utf-8') as f:
+                topology = json.load(f)
+        except (IOError, ValueError) as err:
+            raise SvgisError(f'Unable to read TopoJSON {filename}: {err}') from err
+
+        if topology.get('type') != 'Topology' or not topology.get('objects'):
+            raise SvgisError(f'Not a TopoJSON topology: {filename}')
+
+        objects = topology['objects']
+        try:
+            self.name = name or next(iter(objects))
+            collection = objects[self.name]
+        except KeyError as err:
+            raise SvgisError(f'No object named {name} in {filename}') from err
+
+        self.crs = CRS(crs or 'EPSG:4326').to_wkt()
+        self._quantize = topology.get('transform')
+        self._source_arcs = self._arcs = _decode(topology.get('arcs', []), self._quantize)
+
+        if collection.get('type') == 'GeometryCollection':
+            self._geometries = collection.get('geometries', [])
+        else:
+            self._geometries = [collection]
+
+        # Point coordinates are collected in one array, so they can be transformed like the arcs.
+        points = []
+        self._geometries = [self._index_points(g, points) for g in self._geometries]
+        self._source_points = self._points = np.array(points, dtype=float).reshape(-1, 2)
+
+        boxes = [self._bbox(g) for g in self._geometries]
+        self._boxes = np.array([b or (np.nan,) * 4 for b in boxes], dtype=float).reshape(-1, 4)
+        valid = self._boxes[~np.isnan(self._boxes[:, 0])]
+        if len(valid):
+            self.bounds = tuple(float(b) for b in (*valid[:, :2].min(axis=0), *valid[:, 2:].max(axis=0)))
+        else:
+            self.bounds = (0, 0, 0, 0)
+
+        fields = {}
+        for geometry in self._geometries:
+            for key, value in (geometry.get('properties') or {}).items():
+                fields.setdefault(key, FIELD_TYPES.get(type(value), 'str'))
+
+        self.schema = {'geometry': 'Unknown', 'properties': fields}
+        LOG.debug('read %d features and %d arcs from %s', len(self), len(self._arcs), path)
+
+    def __repr__(self):
+        return f'Layer(path={self.path})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._geometries)
+
+    def close(self):
+        '''Nothing to close, the file is read when the layer is opened.'''
+
+    def _index_points(self, geometry, points):
+        '''Replace the coordinates of point geometries with indices into the points array.'''
+        kind = geometry.get('type')
+        if kind == 'Point':
+            points.append(self._dequantize(geometry['coordinates']))
+            return dict(geometry, coordinates=len(points) - 1)
+
+        if kind == 'MultiPoint':
+            start = len(points)
+            points.extend(self._dequantize(c) for c in geometry['coordinates'])
+            return dict(geometry, coordinates=list(range(start, len(points))))
+
+        if kind == 'GeometryCollection':
+            return dict(geometry, geometries=[self._index_points(g, points) for g in geometry.get('geometries', [])])
+
+        return geometry
+
+    def _dequantize(self, position):
+        if self._quantize is None:
+            return position[:2]
+        (kx, ky), (dx, dy) = self._quantize['scale'], self._quantize['translate']
+        return position[0] * kx + dx, position[1] * ky + dy
+
+    def transform(self, func):
+        """
+        Transform the arcs and points of the layer with a function of a geometry, applying it once to each arc
+        (as a LineString) and once to all the points (as a MultiPoint). Features read afterwards are assembled
+        from the transformed arcs. Each call starts again from the coordinates in the file.
+
+        Args:
+            func (function): Takes and returns a geojson-like dict.
+        """
+        self._arcs = [
+            np.asarray(func({'type': 'LineString', 'coordinates': arc})['coordinates'], dtype=float)
+            for arc in self._source_arcs
+        ]
+        if len(self._source_points):
+            points = func({'type': 'MultiPoint', 'coordinates': self._source_points})
+            self._points = np.asarray(points['coordinates'], dtype=float).reshape(-1, 2)
+
+    def _line(self, indices, arcs=None):
+        '''Join arcs into a line. Negative indices (``~i``) mean arc ``i`` reversed.'''
+        arcs = self._arcs if arcs is None else arcs
+        pieces = [arcs[i] if i >= 0 else arcs[~i][::-1] for i in indices]
+        if not pieces:
+            return np.empty((0, 2))
+        return np.concatenate([pieces[0]] + [p[1:] for p in pieces[1:]])
+
+    def _coordinates(self, geometry, arcs=None, points=None):
+        kind = geometry['type']
+        points = self._points if points is None else points
+        if kind in ('Point', 'MultiPoint'):
+            return points[geometry['coordinates']]
+        if kind == 'LineString':
+            return self._line(geometry['arcs'], arcs)
+        if kind in ('MultiLineString', 'Polygon'):
+            return [self._line(a, arcs) for a in geometry['arcs']]
+        if kind == 'MultiPolygon':
+            return [[self._line(a, arcs) for a in polygon] for polygon in geometry['arcs']]
+
+        raise SvgisError(f'Unknown TopoJSON geometry type: {kind}')
+
+    def _geometry(self, geometry, arcs=None, points=None):
+        kind = geometry.get('type')
+        if kind is None:
+            return None
+
+        if kind == 'GeometryCollection':
+            members = [self._geometry(g, arcs, points) for g in geometry.get('geometries', [])]
+            return {'type': kind, 'geometries': [m for m in members if m]}
+
+        return {'type': kind, 'coordinates': self._coordinates(geometry, arcs, points)}
+
+    def _bbox(self, geometry):
+        '''Bounding box of a geometry in the coordinates of the file.'''
+        geom = self._geometry(geometry, self._source_arcs, self._source_points)
+        return bounding.geometry(geom) if geom else None
+
+    def _feature(self, i):
+        geometry = self._geometries[i]
+        return {
+            'id': geometry.get('id', int(i)),
+            'properties': dict(geometry.get('properties') or {}),
+            'geometry': self._geometry(geometry),
+        }
+
+    def _select(self, bbox=None):
+        '''Indices of the features whose bounding boxes intersect bbox.'''
+        if not bbox:
+            return np.arange(len(self))
+
+        minx, miny, maxx, maxy = bbox
+        box = self._boxes
+        mask = (box[:, 2] >= minx) & (box[:, 0] <= maxx) & (box[:, 3] >= miny) & (box[:, 1] <= maxy)
+        return np.flatnonzero(mask)
+
+    def count(self, bbox=None):
+        '''Count the features whose bounding boxes intersect bbox, without assembling them.'''
+        return len(self._select(bbox))
+
+    def items(self, *args, bbox=None):
+        """
+        Iterate over (index, feature) tuples.
+
+        Args:
+            args: optional start, stop and step arguments, as in ``itertools.islice``.
+            bbox (tuple): Only return features whose bounding boxes intersect this box (in ``crs``).
+        """
+        indices = self._select(bbox)
+
+        if args:
+            indices = indices[slice(*args)]
+
+        for i in indices:
+            yield int(i), self._feature(i)
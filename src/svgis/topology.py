@@ -0,0 +1,188 @@
+'''Simplify polygon coverages along their shared arcs'''
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:
+    pass
+try:
+    import visvalingamwyatt as vw
+except ImportError:
+    pass
+
+
+def _rings(geometry):
+    '''The rings of a polygon geometry as (part, ring, coordinates) tuples, or ``None`` for other geometries.'''
+    if geometry is None:
+        return None
+    if geometry['type'] == 'Polygon':
+        parts = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        parts = geometry['coordinates']
+    else:
+        return None
+
+    return [(p, r, ring) for p, part in enumerate(parts) for r, ring in enumerate(part)]
+
+
+def arcs(rings):
+    """
+    Split rings into arcs that meet at junctions, the points where the rings stop sharing a border.
+    Each border shared by two rings becomes one arc. Rings that share no border are a single closed arc.
+
+    Args:
+        rings (Sequence): Coordinate arrays of closed rings.
+
+    Returns:
+        ``tuple`` of a list of the coordinate arrays of the arcs, and a list of each ring's arcs,
+        as (index, reversed) tuples.
+    """
+    rings = [np.asarray(r, dtype=float)[:, :2] for r in rings]
+    # Leave out the closing coordinate.
+    rings = [r[:-1] if len(r) > 1 and (r[0] == r[-1]).all() else r for r in rings]
+    lengths = np.array([len(r) for r in rings])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    points, pid = np.unique(np.concatenate(rings), axis=0, return_inverse=True)
+    pid = pid.reshape(-1)
+
+    # A point is a junction if rings pass through it between different neighbors.
+    ring_start = np.repeat(starts, lengths)
+    ring_length = np.repeat(lengths, lengths)
+    local = np.arange(len(pid)) - ring_start
+    before = pid[ring_start + (local - 1) % ring_length]
+    after = pid[ring_start + (local + 1) % ring_length]
+    neighbors = np.unique(np.column_stack((pid, np.minimum(before, after), np.maximum(before, after))), axis=0)
+    junction = np.bincount(neighbors[:, 0], minlength=len(points)) > 1
+
+    index, found, refs = {}, [], []
+    for start, length in zip(starts, lengths):
+        ids = pid[start : start + length].tolist()
+        cuts = [i for i, p in enumerate(ids) if junction[p]]
+
+        if cuts:
+            ids = ids[cuts[0] :] + ids[: cuts[0] + 1]
+            cuts = [c - cuts[0] for c in cuts] + [length]
+            sequences = [tuple(ids[a : b + 1]) for a, b in zip(cuts, cuts[1:])]
+        else:
+            # A ring without junctions starts at its lowest point, so that copies of it match.
+            low = ids.index(min(ids))
+            sequences = [tuple(ids[low:] + ids[: low + 1])]
+
+        ring = []
+        for sequence in sequences:
+            key = min(sequence, sequence[::-1])
+            if key not in index:
+                index[key] = len(found)
+                found.append(points[list(key)])
+            ring.append((index[key], key != sequence))
+
+        refs.append(ring)
+
+    return found, refs
+
+
+def _simplify_arc(coordinates, ratio):
+    '''Keep the ``ratio`` of the vertices of an arc with the largest effective areas, including its ends.'''
+    closed = len(coordinates) > 1 and (coordinates[0] == coordinates[-1]).all()
+    count = max(int(len(coordinates) * ratio), 4 if closed else 2)
+    if count >= len(coordinates):
+        return coordinates
+
+    areas = vw.Simplifier(coordinates).thresholds
+    keep = np.zeros(len(coordinates), dtype=bool)
+    keep[np.argsort(-areas, kind='stable')[:count]] = True
+    return coordinates[keep]
+
+
+def _join(arcs_, ring):
+    '''Join arcs into a closed ring.'''
+    pieces = [arcs_[i][::-1] if backwards else arcs_[i] for i, backwards in ring]
+    return np.concatenate([pieces[0]] + [p[1:] for p in pieces[1:]])
+
+
+def simplify(geometries, ratio):
+    """
+    Simplify the polygons in a list of geometries as a coverage. Borders shared by two polygons
+    are simplified once, so that neighbors still meet without gaps or overlaps. Vertices are picked
+    with the Visvalingam-Whyatt algorithm, keeping ``ratio`` of the vertices of each arc.
+    Lines are simplified on their own, and points are returned unchanged.
+
+    Args:
+        geometries (Sequence): geojson-like dicts (or ``None``).
+        ratio (float): Share of vertices to keep, between 0 and 1.
+
+    Returns:
+        ``list`` of geometries
+    """
+    rings, owners = [], []
+    for g, geometry in enumerate(geometries):
+        for part, r, ring in _rings(geometry) or []:
+            if len(ring) > 3:
+                rings.append(ring)
+                owners.append((g, part, r))
+
+    found, refs = arcs(rings) if rings else ([], [])
+    simplified = [_simplify_arc(a, ratio) for a in found]
+
+    # Rings that would collapse keep all the vertices of their arcs, on both sides of each border.
+    collapsed = True
+    while collapsed:
+        short = [ring for ring in refs if len(_join(simplified, ring)) < 4]
+        collapsed = [i for ring in short for i, _ in ring if simplified[i] is not found[i]]
+        for i in collapsed:
+            simplified[i] = found[i]
+
+    coordinates = {owner: _join(simplified, ring) for owner, ring in zip(owners, refs)}
+
+    def rebuild(g, geometry):
+        if geometry is not None and geometry['type'] == 'LineString':
+            return dict(geometry, coordinates=_simplify_arc(np.asarray(geometry['coordinates']), ratio))
+
+        if geometry is not None and geometry['type'] == 'MultiLineString':
+            lines = [_simplify_arc(np.asarray(line), ratio) for line in geometry['coordinates']]
+            return dict(geometry, coordinates=lines)
+
+        if _rings(geometry) is None:
+            return geometry
+
+        if geometry['type'] == 'Polygon':
+            polygon = [coordinates.get((g, 0, r), ring) for r, ring in enumerate(geometry['coordinates'])]
+            return dict(geometry, coordinates=polygon)
+
+        parts = geometry['coordinates']
+        parts = [[coordinates.get((g, p, r), ring) for r, ring in enumerate(part)] for p, part in enumerate(parts)]
+        return dict(geometry, coordinates=parts)
+
+    return [rebuild(g, geometry) for g, geometry in enumerate(geometries)]
+
+
+def simplifier(ratio):
+    """
+    Create a function that simplifies polygon coverages, if visvalingamwyatt is available.
+    Otherwise, return ``None``. Applied to one geometry, the function only shares borders
+    between its own parts. Its ``batch`` attribute simplifies a list of geometries together,
+    and its ``batch_size`` of ``None`` asks for all the features of a layer at once.
+
+    Args:
+        ratio (float): Share of vertices to keep, between 0 and 1.
+
+    Returns:
+        simplification function
+    """
+    try:
+        vw.Simplifier  # pylint: disable=pointless-statement
+    except NameError:
+        return None
+
+    def func(geometry):
+        return simplify([geometry], ratio)[0]
+
+    func.batch = partial(simplify, ratio=ratio)
+    func.batch_size = None
+    return func
@@ -1,4 +1,4 @@
-'''Clip and simplify geometries'''
+'''Clip, simplify, project and scale geometries'''
 # This file is part of svgis.
 # https://github.com/fitnr/svgis
 # Licensed under the GNU General Public License v3 (GPLv3) license:
@@ -6,9 +6,17 @@
 # Copyright (c) 2015-16, 2020, Neil Freeman <contact@fakeisthenewreal.org>
 from functools import partial
 
+from pyproj import Transformer
+
+from . import bounding, topology
+from .errors import SvgisError
+
 try:
+    import shapely
     from shapely.geometry import mapping, shape
-    from shapely.geos import TopologicalError
+    from shapely.errors import TopologicalError
+
+    GEOSException = getattr(shapely.errors, 'GEOSException', TopologicalError)
 except ImportError:
     pass
 try:
@@ -21,37 +29,381 @@ except ImportError:
     pass
 
 
-def clipper(bbox):
+def clipper(bbox, method='numpy'):
     """
     Create a clipping function for a given bounding box.
 
     Args:
         bbox (tuple): bounding box
+        method (str): 'numpy' (the default) clips with numpy, and 'shapely' computes an intersection with shapely.
+                      Without numpy, shapely is used. Without either, geometries aren't clipped.
 
     Returns:
-        function that will given geometries to input bounding box
+        function that will given geometries to input bounding box. Geometries inside the box are returned
+        as they are, and geometries outside it are dropped (``None``), without clipping. With shapely 2,
+        its ``batch`` attribute clips a list of geometries at once with ``shapely.clip_by_rect``, whatever
+        the method. Drawings clip in batches, so with shapely 2 the numpy method only clips the geometries
+        that shapely can't read, and geometries passed to the function one at a time.
     """
+    if method == 'numpy':
+        try:
+            rect = _rect_clipper(bbox)
+        except NameError:
+            pass
+        else:
+            filtered = _bbox_filter(rect, bbox)
+            _add_batch(filtered, rect, bbox)
+            return filtered
+
+    try:
+        intersect = _intersector(bbox)
+    except NameError:
+
+        def unclipped(geometry):
+            return geometry
+
+        return unclipped
+
+    _add_batch(intersect, intersect, bbox)
+    return intersect
+
+
+def _intersector(bbox):
+    '''Clip geometries to a bounding box by computing their intersections with it in shapely.'''
     minx, miny, maxx, maxy = bbox
     bounds = {
         "type": "Polygon",
         "coordinates": [[(minx, miny), (minx, maxy), (maxx, maxy), (maxx, miny), (minx, miny)]],
     }
+    bbox_shape = shape(bounds)
+
+    def intersect(geometry):
+        # This is technically only needed in Py3, but whatever.
+        try:
+            geom = shape(geometry)
+            if geom.is_empty or bounding.covers(bbox, geom.bounds):
+                return geometry
+
+            if bounding.disjoint(bbox, geom.bounds):
+                return None
+
+            clipped = bbox_shape.intersection(geom)
+        except (ValueError, TopologicalError, GEOSException):
+            return geometry
+
+        return mapping(clipped)
+
+    return intersect
+
+
+def _crossing(geometry, bbox):
+    """
+    Read the coordinates of a geometry into arrays, and check if it crosses the edge of a bounding box.
+
+    Returns:
+        ``tuple`` of the geometry (with arrays of coordinates, if it crosses the edge) and ``True``,
+        or the geometry (or ``None``, if it's outside the box) and ``False``.
+    """
+    arrays = coordinate_arrays(geometry)
+    points = np.concatenate(arrays) if arrays else np.empty((0, 2))
+    if len(points) == 0:
+        return geometry, False
+
+    box = (*points.min(axis=0), *points.max(axis=0))
+    if bounding.covers(bbox, box):
+        return geometry, False
+
+    if bounding.disjoint(bbox, box):
+        return None, False
+
+    return with_arrays(geometry, iter(arrays)), True
+
+
+def _bbox_filter(func, bbox):
+    '''Only clip geometries that cross the edge of a bounding box, reading their coordinates into arrays once.'''
+
+    def filtered(geometry):
+        geometry, crossing = _crossing(geometry, bbox)
+        return func(geometry) if crossing else geometry
+
+    return filtered
+
+
+# Geometries that are clipped together in batches, as the multipart type of each group.
+RAGGED_GROUPS = {
+    'Polygon': 'MultiPolygon',
+    'MultiPolygon': 'MultiPolygon',
+    'LineString': 'MultiLineString',
+    'MultiLineString': 'MultiLineString',
+}
+
+# Names of shapely's geometry types.
+GEOMETRY_TYPES = {
+    'LINESTRING': 'LineString',
+    'POLYGON': 'Polygon',
+    'MULTILINESTRING': 'MultiLineString',
+    'MULTIPOLYGON': 'MultiPolygon',
+}
+
+
+def _to_shapely(geometries, kind):
+    '''Create an array of shapely geometries of a multipart type from the ragged arrays of their coordinates.'''
+    arrays, counts = [], ([], [])
+    for geometry in geometries:
+        single = geometry['type'] in ('Polygon', 'LineString')
+        parts = [geometry['coordinates']] if single else geometry['coordinates']
+        if kind == 'MultiPolygon':
+            counts[1].append(len(parts))
+            counts[0].extend(len(part) for part in parts)
+            arrays.extend(_array(ring) for part in parts for ring in part)
+        else:
+            counts[0].append(len(parts))
+            arrays.extend(_array(line) for line in parts)
+
+    offsets = [[len(a) for a in arrays], *(c for c in counts if c)]
+    offsets = tuple(np.concatenate(([0], np.cumsum(o))) for o in offsets)
+    geometry_type = getattr(shapely.GeometryType, kind.upper())
+    return shapely.from_ragged_array(geometry_type, np.concatenate(arrays), offsets)
+
+
+def _from_shapely(geometries):
+    '''Convert an array of shapely lines or polygons to geojson-like dicts, through ragged arrays of coordinates.'''
+    geometry_type, coordinates, offsets = shapely.to_ragged_array(geometries)
+    pieces = np.split(coordinates, offsets[0][1:-1])
+    for offset in offsets[1:]:
+        pieces = [pieces[a:b] for a, b in zip(offset[:-1], offset[1:])]
+
+    kind = GEOMETRY_TYPES[geometry_type.name]
+    if not kind.startswith('Multi'):
+        return [{'type': kind, 'coordinates': p} for p in pieces]
+
+    single = kind[len('Multi') :]
+    return [{'type': single, 'coordinates': p[0]} if len(p) == 1 else {'type': kind, 'coordinates': p} for p in pieces]
+
+
+def _add_batch(func, single, bbox):
+    """
+    With shapely 2, give a clipping function a ``batch`` attribute that clips a list of geometries.
+    Geometries that cross the edge of the box are grouped into lines and polygons, each converted to shapely
+    and clipped at once with ``shapely.clip_by_rect``. Other geometries are clipped one at a time with ``single``.
+    """
     try:
-        bbox_shape = shape(bounds)
+        shapely.clip_by_rect  # pylint: disable=pointless-statement
+        np  # pylint: disable=pointless-statement
+    except (NameError, AttributeError):
+        return
+
+    def batch(geometries):
+        results = list(geometries)
+        arrays = [coordinate_arrays(g) if g is not None else [] for g in results]
+        counts = np.array([sum(len(a) for a in arr) for arr in arrays], dtype=int)
+        present = np.flatnonzero(counts)
+        if len(present) == 0:
+            return results
+
+        # Compare the bounding boxes of all the geometries with the box at once.
+        points = np.concatenate([a for arr in arrays for a in arr])
+        starts = (np.cumsum(counts) - counts)[present]
+        low, high = np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)
+        inside = (low >= bbox[:2]).all(axis=1) & (high <= bbox[2:]).all(axis=1)
+        outside = (low > bbox[2:]).any(axis=1) | (high < bbox[:2]).any(axis=1)
+
+        groups = {'MultiPolygon': [], 'MultiLineString': []}
+        for i in present[outside]:
+            results[i] = None
+
+        for i in present[~inside & ~outside]:
+            results[i] = with_arrays(results[i], iter(arrays[i]))
+            group = RAGGED_GROUPS.get(results[i]['type'])
+            if group is None:
+                results[i] = single(results[i])
+            else:
+                groups[group].append(i)
+
+        for kind, indices in groups.items():
+            if not indices:
+                continue
 
-        def func(geometry):
-            # This is technically only needed in Py3, but whatever.
             try:
-                clipped = bbox_shape.intersection(shape(geometry))
-            except (ValueError, TopologicalError):
-                return geometry
+                clipped = shapely.clip_by_rect(_to_shapely([results[i] for i in indices], kind), *bbox)
+            except (ValueError, GEOSException):
+                for i in indices:
+                    results[i] = single(results[i])
+                continue
 
-            return mapping(clipped)
+            # Results of the same dimension as the group are converted together, anything else one at a time.
+            types = [getattr(shapely.GeometryType, name) for name, t in GEOMETRY_TYPES.items() if t in kind]
+            empty = shapely.is_empty(clipped)
+            ragged = ~empty & np.isin(shapely.get_type_id(clipped), types)
+            converted = iter(_from_shapely(clipped[ragged]) if ragged.any() else [])
+            for i, geom, is_empty, is_ragged in zip(indices, clipped, empty, ragged):
+                if is_empty:
+                    results[i] = None
+                else:
+                    results[i] = next(converted) if is_ragged else mapping(geom)
 
-    except NameError:
+        return results
 
-        def func(geometry):
-            return geometry
+    func.batch = batch
+
+
+def clip_ring(ring, bbox):
+    """
+    Clip a ring to a bounding box with the Sutherland-Hodgman algorithm. Where a concave ring leaves
+    the box and comes back, the result runs along the edge of the box. Filled, this draws the same as
+    the intersection of the ring and the box.
+
+    Args:
+        ring (Sequence): Coordinates of a closed ring.
+        bbox (tuple): bounding box
+
+    Returns:
+        ``numpy.ndarray`` of coordinates of a closed ring, or ``None`` if nothing but the edge of the box is left.
+    """
+    arr = _array(ring)
+    if len(arr) > 1 and (arr[0] == arr[-1]).all():
+        arr = arr[:-1]
+
+    for axis, bound, sign in ((0, bbox[0], 1), (0, bbox[2], -1), (1, bbox[1], 1), (1, bbox[3], -1)):
+        if len(arr) < 3:
+            return None
+
+        inside = sign * (arr[:, axis] - bound) >= 0
+        if inside.all():
+            continue
+
+        # Each edge, from a vertex to the next, adds where it crosses the bound and the next vertex, if it's inside.
+        following = np.roll(arr, -1, axis=0)
+        crosses = inside != np.roll(inside, -1)
+        delta = following - arr
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(crosses, (bound - arr[:, axis]) / delta[:, axis], 0)
+
+        crossing = arr + t[:, None] * delta
+        crossing[:, axis] = bound
+        candidates = np.stack((crossing, following), axis=1).reshape(-1, 2)
+        arr = candidates[np.column_stack((crosses, np.roll(inside, -1))).reshape(-1)]
+
+    arr = _drop_edge_runs(arr, bbox)
+    if len(arr) < 3:
+        return None
+
+    return np.concatenate((arr, arr[:1]))
+
+
+def _drop_edge_runs(arr, bbox):
+    '''Remove repeated vertices, and vertices between two others on the same edge of the box, from an open ring.'''
+    edges = ((0, bbox[0]), (0, bbox[2]), (1, bbox[1]), (1, bbox[3]))
+    while len(arr) >= 3:
+        drop = (arr == np.roll(arr, 1, axis=0)).all(axis=1)
+        for axis, bound in edges:
+            on = arr[:, axis] == bound
+            drop |= on & np.roll(on, 1) & np.roll(on, -1)
+
+        if not drop.any():
+            break
+
+        arr = arr[~drop]
+
+    return arr
+
+
+def clip_line(line, bbox):
+    """
+    Clip a line to a bounding box, finding where each of its segments enters and leaves the box
+    with the Liang-Barsky algorithm.
+
+    Args:
+        line (Sequence): Coordinates of a line.
+        bbox (tuple): bounding box
+
+    Returns:
+        ``list`` of ``numpy.ndarray``, the parts of the line inside the box.
+    """
+    arr = _array(line)
+    if len(arr) < 2:
+        return []
+
+    start, delta = arr[:-1], np.diff(arr, axis=0)
+    low, high = np.zeros(len(delta)), np.ones(len(delta))
+    accepted = np.ones(len(delta), dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p, q in (
+            (-delta[:, 0], start[:, 0] - bbox[0]),
+            (delta[:, 0], bbox[2] - start[:, 0]),
+            (-delta[:, 1], start[:, 1] - bbox[1]),
+            (delta[:, 1], bbox[3] - start[:, 1]),
+        ):
+            r = q / p
+            low = np.where(p < 0, np.maximum(low, r), low)
+            high = np.where(p > 0, np.minimum(high, r), high)
+            accepted &= (p != 0) | (q >= 0)
+
+    accepted &= low <= high
+    if not accepted.any():
+        return []
+
+    # A part starts at a segment that enters the box, or follows one that leaves it.
+    previous = np.concatenate(([False], accepted[:-1] & (high[:-1] == 1)))
+    begins = accepted & ~(previous & (low == 0))
+
+    candidates = np.stack((start + low[:, None] * delta, start + high[:, None] * delta), axis=1).reshape(-1, 2)
+    points = candidates[np.column_stack((begins, accepted)).reshape(-1)]
+    counts = (begins.astype(int) + accepted)[accepted]
+    offsets = np.cumsum(counts)[begins[accepted]] - counts[begins[accepted]]
+    parts = np.split(points, offsets[1:])
+    return [part for part in parts if (part != part[0]).any()]
+
+
+def _rect_clipper(bbox):
+    '''Create a function that clips geometries to a bounding box with numpy.'''
+    np  # pylint: disable=pointless-statement
+    minx, miny, maxx, maxy = bbox
+
+    def polygon(rings):
+        rings = [clip_ring(r, bbox) for r in rings]
+        if not rings or rings[0] is None:
+            return None
+        return [r for r in rings if r is not None]
+
+    def func(geometry):
+        kind = geometry['type']
+        coordinates = geometry.get('coordinates')
+
+        if kind == 'Point':
+            inside = minx <= coordinates[0] <= maxx and miny <= coordinates[1] <= maxy
+            return geometry if inside else None
+
+        if kind == 'MultiPoint':
+            arr = _array(coordinates)
+            inside = (arr[:, 0] >= minx) & (arr[:, 0] <= maxx) & (arr[:, 1] >= miny) & (arr[:, 1] <= maxy)
+            coordinates = arr[inside]
+
+        elif kind in ('LineString', 'MultiLineString'):
+            lines = [coordinates] if kind == 'LineString' else coordinates
+            parts = [part for line in lines for part in clip_line(line, bbox)]
+            if len(parts) == 1:
+                return dict(geometry, type='LineString', coordinates=parts[0])
+            kind, coordinates = 'MultiLineString', parts
+
+        elif kind == 'Polygon':
+            coordinates = polygon(coordinates)
+
+        elif kind == 'MultiPolygon':
+            coordinates = [p for p in (polygon(c) for c in coordinates) if p is not None]
+
+        elif kind == 'GeometryCollection':
+            members = [g for g in (func(m) for m in geometry['geometries']) if g is not None]
+            return dict(geometry, geometries=members) if members else None
+
+        else:
+            raise NotImplementedError(f"Unsupported geometry type: {kind}")
+
+        if coordinates is None or len(coordinates) == 0:
+            return None
+
+        return dict(geometry, type=kind, coordinates=coordinates)
 
     return func
 
@@ -74,29 +426,435 @@ def clip(geometry, bounds):
         return geometry
 
 
-def simplifier(ratio):
+def culler(min_size, point=False):
+    """
+    Create a function that culls geometries smaller than ``min_size``: line and polygon geometries
+    with bounding boxes narrower and shorter than ``min_size``. Point geometries are left alone.
+
+    Args:
+        min_size (float): Minimum width or height, in the units of the geometries.
+        point (bool): If True, replace culled geometries with a point at the center of their bounding box.
+
+    Returns:
+        function that returns a geometry or ``None``
+    """
+    if not min_size:
+        return None
+
+    def func(geometry):
+        if geometry['type'] in ('Point', 'MultiPoint'):
+            return geometry
+
+        box = bounding.geometry(geometry)
+        if box is None or box[2] - box[0] >= min_size or box[3] - box[1] >= min_size:
+            return geometry
+
+        if point:
+            return {'type': 'Point', 'coordinates': ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)}
+
+        return None
+
+    return func
+
+
+def _snap(coordinates, factor, ring=False):
+    '''Round coordinates to a grid, dropping repeated vertices. Return ``None`` for degenerate lines and rings.'''
+    arr = np.round(_array(coordinates) * factor) / factor
+    if len(arr) > 1:
+        arr = arr[np.concatenate(([True], (arr[1:] != arr[:-1]).any(axis=1)))]
+
+    if not ring:
+        return arr if len(arr) > 1 else None
+
+    # A ring needs three distinct vertices that enclose some area.
+    if len(arr) < 4 or not np.dot(arr[:-1, 0], arr[1:, 1]) - np.dot(arr[1:, 0], arr[:-1, 1]):
+        return None
+
+    return arr
+
+
+def snapper(precision):
+    """
+    Create a function that snaps geometries to the grid of the output coordinates, which are rounded to
+    ``precision`` decimal places. Repeated vertices are removed, as are lines with fewer than two vertices
+    and rings that enclose no area. Polygons without an exterior ring are removed, and geometries left empty
+    become ``None``. If numpy isn't available, or ``precision`` is ``None``, return ``None``.
+
+    Args:
+        precision (int): Number of decimal places.
+
+    Returns:
+        function that returns a geometry or ``None``
+    """
+    try:
+        np  # pylint: disable=pointless-statement
+    except NameError:
+        return None
+
+    if precision is None:
+        return None
+
+    factor = 10**precision
+
+    def polygon(rings):
+        rings = [_snap(r, factor, ring=True) for r in rings]
+        if not rings or rings[0] is None:
+            return None
+        return [r for r in rings if r is not None]
+
+    def func(geometry):
+        kind = geometry['type']
+        coordinates = geometry.get('coordinates')
+
+        if kind == 'Point':
+            coordinates = tuple((np.round(_array([coordinates])[0] * factor) / factor).tolist())
+        elif kind == 'MultiPoint':
+            coordinates = np.round(_array(coordinates) * factor) / factor
+        elif kind == 'LineString':
+            coordinates = _snap(coordinates, factor)
+        elif kind == 'MultiLineString':
+            coordinates = [line for line in (_snap(c, factor) for c in coordinates) if line is not None]
+        elif kind == 'Polygon':
+            coordinates = polygon(coordinates)
+        elif kind == 'MultiPolygon':
+            coordinates = [p for p in (polygon(c) for c in coordinates) if p is not None]
+        elif kind == 'GeometryCollection':
+            members = [g for g in (func(m) for m in geometry['geometries']) if g is not None]
+            return dict(geometry, geometries=members) if members else None
+        else:
+            raise NotImplementedError(f"Unsupported geometry type: {kind}")
+
+        if coordinates is None or len(coordinates) == 0:
+            return None
+
+        return dict(geometry, coordinates=coordinates)
+
+    return func
+
+
+def simplifier(ratio, method='vw'):
+    """
+    Create a simplification function with one of the methods in :data:`SIMPLIFIERS`,
+    if its dependencies are available. Otherwise, return ``None``.
+
+    Args:
+        ratio (int): Between 1 and 99, the percentage of vertices to retain.
+        method (str): Name of the simplification method (default: 'vw').
+
+    Returns:
+        simplification function
+    """
+    try:
+        factory = SIMPLIFIERS[method]
+    except KeyError as err:
+        raise SvgisError(f'Unknown simplification method: {method}') from err
+
+    if ratio is None or ratio >= 100 or ratio < 1:
+        return None
+
+    return factory(ratio / 100.0)
+
+
+def _vw_simplifier(ratio):
+    '''Visvalingam-Whyatt simplification with visvalingamwyatt, keeping ``ratio`` of the vertices.'''
+    try:
+        vw.simplify_geometry  # pylint: disable=pointless-statement
+    except NameError:
+        return None
+
+    return partial(_simplify, ratio=ratio)
+
+
+def _dp_tolerance(geometries, ratio):
+    """
+    Douglas-Peucker tolerances that keep about ``ratio`` of the vertices of shapely geometries.
+    A multiple of the mean length of their segments, found by trial on the fixtures. Accepts arrays.
+    """
+    count = np.maximum(shapely.get_num_coordinates(geometries), 1)
+    return shapely.length(geometries) / count * (1 / ratio - 1) / 4
+
+
+def _dp_simplifier(ratio, preserve_topology=False):
+    """
+    Douglas-Peucker simplification with shapely 2, keeping about ``ratio`` of the vertices.
+    With ``preserve_topology``, rings are kept valid. The function has a ``batch`` attribute
+    that simplifies a list of geometries at once.
     """
-    Create a simplification function, if visvalingamwyatt is available.
-    Otherwise, return a noop function.
+    try:
+        shapely.simplify  # pylint: disable=pointless-statement
+    except (NameError, AttributeError):
+        return None
+
+    def func(geometry):
+        try:
+            geom = shape(geometry)
+            simplified = shapely.simplify(geom, _dp_tolerance(geom, ratio), preserve_topology=preserve_topology)
+        except (ValueError, TopologicalError):
+            return geometry
+
+        # Leave features that are simplified away entirely for the culler.
+        return geometry if simplified.is_empty else mapping(simplified)
+
+    tolerance = partial(_dp_tolerance, ratio=ratio)
+    func.batch = partial(_simplify_all, tolerance=tolerance, preserve_topology=preserve_topology)
+    return func
+
+
+def _shape(geometry):
+    '''A shapely geometry, or ``None`` if the geometry is missing or shapely can't read it.'''
+    if geometry is None:
+        return None
+    try:
+        return shape(geometry)
+    except (ValueError, TypeError, TopologicalError):
+        return None
+
+
+def _simplify_all(geometries, tolerance, preserve_topology=False):
+    """
+    Simplify a sequence of geometries with shapely 2. Lines and polygons are grouped into multipart
+    geometries, each group built from ragged arrays of coordinates and simplified with one call. Anything
+    else is read one at a time. Geometries that are missing, can't be read or are simplified away entirely
+    are returned unchanged.
+
+    Args:
+        geometries (Sequence): geojson-like dicts (or ``None``)
+        tolerance (mixed): A distance, or a function that returns distances for an array of shapely geometries.
+        preserve_topology (bool): Keep polygons valid.
+
+    Returns:
+        ``list`` of geometries
+    """
+    results = list(geometries)
+    groups = {'MultiPolygon': [], 'MultiLineString': [], None: []}
+    for i, geometry in enumerate(results):
+        if geometry is not None:
+            coords = geometry.get('coordinates')
+            group = RAGGED_GROUPS.get(geometry['type']) if coords is not None and len(coords) else None
+            groups[group].append(i)
+
+    for kind, indices in groups.items():
+        if not indices:
+            continue
+
+        try:
+            if kind is None:
+                shapes = np.empty(len(indices), dtype=object)
+                shapes[:] = [_shape(results[i]) for i in indices]
+            else:
+                shapes = _to_shapely([results[i] for i in indices], kind)
+
+            tolerances = tolerance(shapes) if callable(tolerance) else tolerance
+            simplified = shapely.simplify(shapes, tolerances, preserve_topology=preserve_topology)
+        except (ValueError, TopologicalError, shapely.errors.ShapelyError):
+            continue
+
+        keep = shapely.is_missing(simplified) | shapely.is_empty(simplified)
+        types = [getattr(shapely.GeometryType, name) for name, t in GEOMETRY_TYPES.items() if kind and t in kind]
+        ragged = ~keep & np.isin(shapely.get_type_id(simplified), types)
+        converted = iter(_from_shapely(simplified[ragged]) if ragged.any() else [])
+        for i, geom, is_kept, is_ragged in zip(indices, simplified, keep, ragged):
+            if not is_kept:
+                results[i] = next(converted) if is_ragged else mapping(geom)
+
+    return results
+
+
+# Simplification methods, by name. Each is a function that takes the share of vertices to retain
+# (between 0 and 1) and returns a simplification function, or ``None`` if it's unavailable.
+# A simplification function may have a ``batch`` attribute, a function that simplifies a list of geometries,
+# and a ``batch_size`` attribute, the number of features to simplify together (``None`` for a whole layer).
+SIMPLIFIERS = {
+    'vw': _vw_simplifier,
+    'dp': _dp_simplifier,
+    'dp-preserve': partial(_dp_simplifier, preserve_topology=True),
+    'coverage': topology.simplifier,
+}
+
+
+def tolerance_simplifier(tolerance):
+    """
+    Create a function that removes the vertices of geometries that are within ``tolerance`` of
+    the simplified line, using the Douglas-Peucker algorithm in shapely, if available.
+    With shapely 2, the function has a ``batch`` attribute that simplifies a list of geometries at once. Otherwise,
+    use visvalingamwyatt to remove vertices with an effective area smaller than ``tolerance`` squared.
+    If neither is available, return ``None``.
 
     Args:
-        ratio (int): Between 1 and 99
+        tolerance (float): Distance, in the units of the geometries.
 
     Returns:
         simplification function
     """
     try:
-        # put this first to get NameError out of the way
-        simplify = vw.simplify_geometry
+        shape  # pylint: disable=pointless-statement
+
+        def func(geometry):
+            try:
+                simplified = shape(geometry).simplify(tolerance, preserve_topology=False)
+            except (ValueError, TopologicalError):
+                return geometry
+
+            # Leave features that are simplified away entirely for the culler.
+            return geometry if simplified.is_empty else mapping(simplified)
+
+        if hasattr(shapely, 'simplify'):
+            func.batch = partial(_simplify_all, tolerance=tolerance)
+
+        return func
+
+    except NameError:
+        pass
+
+    try:
+        vw.simplify_geometry  # pylint: disable=pointless-statement
+        return partial(_simplify, threshold=tolerance**2)
+    except NameError:
+        return None
 
-        if ratio is None or ratio >= 100 or ratio < 1:
-            raise SvgisError("Invalid ratio")
 
-        return partial(simplify, ratio=ratio / 100.0)
+def budgeter(max_vertices):
+    """
+    Create a function that simplifies geometries with more than ``max_vertices`` vertices
+    down to about that many, if visvalingamwyatt is available. Otherwise, return ``None``.
+    Geometries within the budget are returned unchanged.
 
-    except (TypeError, ValueError, NameError):
+    Args:
+        max_vertices (int): Maximum number of vertices in each geometry.
+
+    Returns:
+        simplification function
+    """
+    try:
+        vw.simplify_geometry  # pylint: disable=pointless-statement
+    except NameError:
         return None
 
+    if not max_vertices or max_vertices < 1:
+        return None
+
+    def func(geometry):
+        count = bounding.vertices(geometry)
+        if count <= max_vertices:
+            return geometry
+
+        return _simplify(geometry, ratio=max_vertices / count)
+
+    return func
+
+
+def _map_rings(kind, coordinates, func, *others):
+    '''Apply func to each ring of a line or polygon geometry's coordinates (and matching nested sequences).'''
+    if kind == 'LineString':
+        return func(coordinates, *others)
+    if kind in ('MultiLineString', 'Polygon'):
+        return [func(*rings) for rings in zip(coordinates, *others)]
+    if kind == 'MultiPolygon':
+        return [[func(*rings) for rings in zip(*parts)] for parts in zip(coordinates, *others)]
+
+    return None
+
+
+def effective_areas(geometry):
+    """
+    Add the Visvalingam-Whyatt effective area of every vertex of a line or polygon geometry as
+    an ``areas`` member, nested like its coordinates, so it can later be simplified to any level
+    with :func:`lod_simplifier`. End points get an infinite area. Other geometries, or any geometry
+    if visvalingamwyatt isn't available, are returned unchanged.
+
+    Args:
+        geometry (dict): geojson-like dict
+
+    Returns:
+        (dict) geometry
+    """
+
+    def ring(coordinates):
+        coordinates = np.asarray(coordinates, dtype=float)
+        if len(coordinates) < 3:
+            return np.full(len(coordinates), np.inf)
+        return vw.Simplifier(coordinates).thresholds
+
+    try:
+        areas = _map_rings(geometry['type'], geometry['coordinates'], ring)
+    except NameError:
+        return geometry
+
+    return geometry if areas is None else dict(geometry, areas=areas)
+
+
+def lod_simplifier(ratio=None, threshold=None):
+    """
+    Create a function that simplifies geometries with precomputed effective areas (see :func:`effective_areas`),
+    by keeping the vertices of each ring with an area of at least ``threshold``, or the ``ratio`` of each
+    ring's vertices with the largest areas (end points have the largest). The ``areas`` member is removed,
+    so the function should be applied even if neither argument is given. Rings that would be left too short
+    are kept whole.
+
+    Args:
+        ratio (float): Share of vertices to keep, between 0 and 1.
+        threshold (float): Minimum area, in the units of the geometries squared.
+
+    Returns:
+        simplification function
+    """
+
+    def ring(coordinates, areas, minimum):
+        if threshold is None and (not ratio or ratio >= 1):
+            return coordinates
+
+        areas = np.asarray(areas, dtype=float)
+        if threshold is not None:
+            keep = areas >= threshold
+        else:
+            # The vertices with the largest areas, in their original order. Ties go to the first vertices.
+            keep = np.zeros(len(areas), dtype=bool)
+            keep[np.argsort(-areas, kind='stable')[: int(len(areas) * ratio)]] = True
+
+        return np.asarray(coordinates)[keep] if np.count_nonzero(keep) >= minimum else coordinates
+
+    def func(geometry):
+        if 'areas' not in geometry:
+            return geometry
+
+        geometry = dict(geometry)
+        areas = geometry.pop('areas')
+        minimum = 4 if geometry['type'] in ('Polygon', 'MultiPolygon') else 2
+        geometry['coordinates'] = _map_rings(
+            geometry['type'], geometry['coordinates'], partial(ring, minimum=minimum), areas
+        )
+        return geometry
+
+    return func
+
+
+def _simplify(geometry, **kwargs):
+    '''Simplify a geometry with visvalingamwyatt, leaving rings that are too short to simplify unchanged.'''
+    try:
+        return vw.simplify_geometry(geometry, **kwargs)
+    except IndexError:
+        # At low ratios, closed rings with only a few vertices are simplified away entirely.
+        pass
+
+    def ring(coordinates, closed=True):
+        try:
+            return vw.simplify(coordinates, closed=closed, **kwargs)
+        except IndexError:
+            return coordinates
+
+    kind = geometry['type']
+    if kind == 'GeometryCollection':
+        return dict(geometry, geometries=[_simplify(g, **kwargs) for g in geometry['geometries']])
+
+    if kind == 'Polygon':
+        coordinates = [ring(r) for r in geometry['coordinates']]
+    elif kind == 'MultiPolygon':
+        coordinates = [[ring(r) for r in p] for p in geometry['coordinates']]
+    else:
+        coordinates = vw.simplify_geometry(geometry, **kwargs)['coordinates']
+
+    return dict(geometry, coordinates=coordinates)
+
 
 def scale(coordinates, scalar=1):
     '''Scale a list of coordinates by a scalar. Only use with projected coordinates'''
@@ -148,3 +906,98 @@ def scale_geom(geom, factor=1):
         raise NotImplementedError(f"Unsupported geometry type: {geom['type']}")
 
     return geom
+
+
+# How deeply coordinates are nested in each type of geometry. Lines and rings are at depth 1.
+DEPTHS = {'Point': 0, 'MultiPoint': 1, 'LineString': 1, 'MultiLineString': 2, 'Polygon': 2, 'MultiPolygon': 3}
+
+
+def _array(coordinates):
+    arr = np.asarray(coordinates, dtype=float)
+    return arr.reshape(-1, arr.shape[-1])[:, :2] if arr.size else np.empty((0, 2))
+
+
+def coordinate_arrays(geometry):
+    """
+    List the coordinates of a geometry as (n, 2) arrays, one for each point, line or ring.
+
+    Args:
+        geometry (dict): geojson-like dict
+
+    Returns:
+        ``list`` of numpy arrays
+    """
+    if geometry['type'] == 'GeometryCollection':
+        return [a for g in geometry['geometries'] for a in coordinate_arrays(g)]
+
+    def walk(coordinates, depth):
+        if depth <= 1:
+            return [_array(coordinates)]
+        return [a for c in coordinates for a in walk(c, depth - 1)]
+
+    return walk(geometry['coordinates'], DEPTHS[geometry['type']])
+
+
+def with_arrays(geometry, arrays):
+    """
+    Copy a geometry, replacing its coordinates with arrays in the order given by :func:`coordinate_arrays`.
+
+    Args:
+        geometry (dict): geojson-like dict
+        arrays (Iterator): Arrays of coordinates. Only as many as the geometry needs are taken.
+
+    Returns:
+        (dict) geometry
+    """
+    if geometry['type'] == 'GeometryCollection':
+        return dict(geometry, geometries=[with_arrays(g, arrays) for g in geometry['geometries']])
+
+    def build(coordinates, depth):
+        if depth == 0:
+            return next(arrays)[0]
+        if depth == 1:
+            return next(arrays)
+        return [build(c, depth - 1) for c in coordinates]
+
+    return dict(geometry, coordinates=build(geometry['coordinates'], DEPTHS[geometry['type']]))
+
+
+def reprojector(in_crs, out_crs):
+    """
+    Create a function that projects geometries with pyproj. Its ``batch`` attribute projects a list of
+    geometries, finding the distinct coordinates with ``numpy.unique`` and transforming each only once.
+    Coordinates that are shared by neighboring features are common in polygon coverages.
+    If numpy isn't available, return ``None``.
+
+    Args:
+        in_crs (mixed): Projection of the geometries.
+        out_crs (mixed): Projection to transform the geometries to.
+
+    Returns:
+        projection function
+    """
+    try:
+        np  # pylint: disable=pointless-statement
+    except NameError:
+        return None
+
+    transformer = Transformer.from_crs(in_crs, out_crs, always_xy=True)
+
+    def batch(geometries):
+        arrays = [coordinate_arrays(g) if g is not None else [] for g in geometries]
+        flat = [a for arr in arrays for a in arr]
+        if not flat:
+            return list(geometries)
+
+        unique, inverse = np.unique(np.concatenate(flat), axis=0, return_inverse=True)
+        xs, ys = transformer.transform(unique[:, 0], unique[:, 1])
+        projected = np.column_stack((xs, ys))[inverse.reshape(-1)]
+
+        pieces = iter(np.split(projected, np.cumsum([len(a) for a in flat])[:-1]))
+        return [with_arrays(g, pieces) if g is not None else None for g in geometries]
+
+    def func(geometry):
+        return batch([geometry])[0]
+
+    func.batch = batch
+    return func
@@ -7,6 +7,11 @@
 from itertools import groupby
 from math import ceil, floor
 
+try:
+    import numpy as np
+except ImportError:
+    pass
+
 # WGS 84
 DEFAULT_GEOID = 4326
 
@@ -67,6 +72,48 @@ def dedupe(array):
         yield g[0]
 
 
+def drop_collinear(coordinates, precision=None):
+    """
+    Remove the interior vertices of a line that lie on the straight segment between their neighbors,
+    once coordinates are rounded to ``precision``. Repeated vertices are removed, too. The line looks
+    the same at that precision, and the vertices that are kept aren't changed. Requires numpy,
+    without it (or without a ``precision``) the coordinates are returned unchanged.
+
+    Args:
+        coordinates (Sequence): x, y coordinates.
+        precision (int): Number of decimal places.
+
+    Returns:
+        ``list`` or ``numpy.ndarray`` of coordinates
+    """
+    if precision is None:
+        return coordinates
+
+    try:
+        arr = np.asarray(coordinates, dtype=float)
+    except (NameError, ValueError):
+        return coordinates
+
+    if arr.ndim != 2 or len(arr) < 3:
+        return coordinates
+
+    # Work on the integer grid of the output, where the arithmetic below is exact.
+    grid = np.round(arr[:, :2] * 10**precision)
+    index = np.flatnonzero(np.concatenate(([True], (grid[1:] != grid[:-1]).any(axis=1))))
+    grid = grid[index]
+
+    before, after = grid[1:-1] - grid[:-2], grid[2:] - grid[1:-1]
+    products = np.column_stack(
+        (before[:, 0] * after[:, 1], before[:, 1] * after[:, 0], before[:, 0] * after[:, 0], before[:, 1] * after[:, 1])
+    )
+    exact = (np.abs(products) < 2**53).all(axis=1)
+
+    # Vertices where the line goes straight on, rather than turning or doubling back.
+    straight = exact & (products[:, 0] == products[:, 1]) & (products[:, 2] + products[:, 3] > 0)
+    keep = np.concatenate(([True], ~straight, [True]))[: len(grid)]
+    return arr[index[keep]]
+
+
 def signed_area(coords):
     """Return the signed area enclosed by a ring using the linear time
     algorithm at http://www.cgafaq.info/wiki/Polygon_Area. A value >= 0
@@ -90,3 +137,45 @@ def clockwise(coords):
 def counterclockwise(coords):
     """Check if coordinates move in a counterclockwise direction."""
     return signed_area(coords) >= 0
+
+
+def hilbert(points, order=16):
+    """
+    Find the distance of points along a Hilbert curve that fills their bounding box.
+    Requires numpy.
+
+    Args:
+        points (numpy.ndarray): An (n, 2) array of coordinates. Rows with NaNs are placed at the end of the curve.
+        order (int): The curve is drawn on a grid of 2**order by 2**order cells.
+
+    Returns:
+        ``numpy.ndarray`` of integer distances.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    side = 2**order
+    missing = np.isnan(points).any(axis=1)
+    if missing.all():
+        return np.full(len(points), side * side, dtype=np.int64)
+
+    # Scale coordinates to integer cells on the grid.
+    low = np.nanmin(points, axis=0)
+    span = np.nanmax(points, axis=0) - low
+    span[span == 0] = 1
+    cells = np.nan_to_num((points - low) / span * (side - 1)).astype(np.int64)
+    x, y = cells[:, 0], cells[:, 1]
+
+    distance = np.zeros(len(points), dtype=np.int64)
+    s = side // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        distance += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve is continuous.
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s //= 2
+
+    distance[missing] = side * side
+    return distance
@@ -0,0 +1,190 @@
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, 2020, Neil Freeman <contact@fakeisthenewreal.org>
+'''Benchmarks for svgis. Run all with ``python tests/benchmark.py``, or name the benchmarks to run.'''
+
+import io
+import json
+import os.path
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+import fiona.transform
+from pyproj import CRS, Transformer
+
+try:
+    from build.lib.svgis import bounding, svgis, transform
+except ImportError:
+    from svgis import bounding, svgis, transform
+
+NATION = 'tests/fixtures/cb_2014_us_nation_20m.json'
+PLACE = 'tests/fixtures/tl_2015_11_place.json'
+PROJECTION = '+proj=lcc +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=m +no_defs'
+
+
+def _explode(path, directory, seed=0):
+    '''Write each polygon of a layer as a separate feature, in shuffled order.'''
+    with open(path) as f:
+        collection = json.load(f)
+
+    features = []
+    for feature in collection['features']:
+        geom = feature['geometry']
+        polygons = geom['coordinates'] if geom['type'] == 'MultiPolygon' else [geom['coordinates']]
+        for polygon in polygons:
+            features.append(
+                {
+                    'type': 'Feature',
+                    'properties': feature['properties'],
+                    'geometry': {'type': 'Polygon', 'coordinates': polygon},
+                }
+            )
+
+    random.Random(seed).shuffle(features)
+    out = os.path.join(directory, 'exploded.json')
+    with open(out, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+
+    return out, len(features)
+
+
+def _svgz_size(layers, **kwargs):
+    output = io.BytesIO()
+    svgis.map_to(output, layers, compress=True, inline=False, precision=1, **kwargs)
+    return len(output.getvalue())
+
+
+def hilbert():
+    '''Size of gzipped output, in source order and in Hilbert curve order.'''
+    with tempfile.TemporaryDirectory() as tmp:
+        exploded, count = _explode(NATION, tmp)
+        cases = (
+            ('fixtures', [NATION, PLACE], {'scale': 1000, 'crs': PROJECTION}),
+            (f'exploded ({count} features)', [exploded], {'scale': 1000, 'crs': PROJECTION}),
+        )
+        for name, layers, kwargs in cases:
+            before = _svgz_size(layers, **kwargs)
+            after = _svgz_size(layers, hilbert=True, **kwargs)
+            print(f'hilbert {name}: {before:,} -> {after:,} bytes .svgz ({(before - after) / before:.1%} smaller)')
+
+
+def _projected(path, scalar=0.001):
+    '''The geometries of a layer, projected and scaled like a drawing.'''
+    with open(path) as f:
+        collection = json.load(f)
+
+    transformer = Transformer.from_crs('EPSG:4269', PROJECTION, always_xy=True)
+
+    def ring(coordinates):
+        xs, ys = transformer.transform([c[0] for c in coordinates], [c[1] for c in coordinates])
+        return [(x * scalar, y * scalar) for x, y in zip(xs, ys)]
+
+    geometries = []
+    for feature in collection['features']:
+        geom = feature['geometry']
+        if geom['type'] == 'Polygon':
+            geometries.append({'type': 'Polygon', 'coordinates': [ring(r) for r in geom['coordinates']]})
+        elif geom['type'] == 'MultiPolygon':
+            coordinates = [[ring(r) for r in p] for p in geom['coordinates']]
+            geometries.append({'type': 'MultiPolygon', 'coordinates': coordinates})
+
+    return geometries
+
+
+def _timed(func, items, repeat=3):
+    '''The results of applying func to each item, and the best time of ``repeat`` runs.'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        results = [func(i) for i in items]
+        best = min(best, perf_counter() - start)
+    return results, best
+
+
+def simplify():
+    '''Throughput and vertex reduction of each simplification method.'''
+    with tempfile.TemporaryDirectory() as tmp:
+        exploded, _ = _explode(NATION, tmp)
+        geometries = _projected(exploded)
+
+    before = sum(bounding.vertices(g) for g in geometries)
+    print(f'simplify: {len(geometries):,} polygons, {before:,} vertices')
+    for method in sorted(transform.SIMPLIFIERS):
+        for ratio in (10, 50):
+            func = transform.simplifier(ratio, method)
+            if func is None:
+                print(f'simplify {method} {ratio}: unavailable')
+                continue
+
+            results, seconds = _timed(func, geometries)
+            after = sum(bounding.vertices(g) for g in results)
+            print(
+                f'simplify {method} {ratio}: {len(geometries) / seconds:,.0f} features/s, '
+                f'{before / seconds:,.0f} vertices/s, kept {after:,} vertices ({after / before:.1%})'
+            )
+
+            if hasattr(func, 'batch'):
+                _, seconds = _timed(func.batch, [geometries])
+                print(f'simplify {method} {ratio} (batch): {len(geometries) / seconds:,.0f} features/s')
+
+
+def project():
+    '''Throughput of projecting each feature with fiona, and each distinct coordinate of a batch with pyproj.'''
+    with tempfile.TemporaryDirectory() as tmp:
+        exploded, count = _explode(NATION, tmp)
+        with open(exploded) as f:
+            geometries = [feature['geometry'] for feature in json.load(f)['features']]
+
+    out_crs = CRS(PROJECTION).to_dict()
+    _, seconds = _timed(lambda g: fiona.transform.transform_geom('EPSG:4269', out_crs, g), geometries)
+    print(f'project each feature: {count / seconds:,.0f} features/s')
+
+    func = transform.reprojector('EPSG:4269', PROJECTION)
+    batches = [geometries[i : i + svgis.BATCH_SIZE] for i in range(0, count, svgis.BATCH_SIZE)]
+    _, seconds = _timed(func.batch, batches)
+    print(f'project unique coordinates: {count / seconds:,.0f} features/s')
+
+
+def clip():
+    '''Throughput of clipping polygons to a box with numpy, with shapely, and in batches with shapely 2.'''
+    with tempfile.TemporaryDirectory() as tmp:
+        exploded, _ = _explode(NATION, tmp)
+        geometries = _projected(exploded) + _projected(PLACE)
+
+    # Scaled coordinates are arrays by the time they're clipped.
+    geometries = [transform.with_arrays(g, iter(transform.coordinate_arrays(g))) for g in geometries]
+
+    # A box over the middle of the layer, so that some polygons are inside it, some outside, and some cut,
+    # and a box that cuts off the edges of the layer, so that most polygons are inside it.
+    minx, miny, maxx, maxy = bounding.geometry({'type': 'GeometryCollection', 'geometries': geometries})
+    width, height = maxx - minx, maxy - miny
+    boxes = {
+        'middle': (minx + width / 4, miny + height / 4, maxx - width / 4, maxy - height / 4),
+        'edges': (minx + width / 20, miny + height / 20, maxx - width / 20, maxy - height / 20),
+    }
+    print(f'clip: {len(geometries):,} polygons')
+    for name, box in boxes.items():
+        for method in ('numpy', 'shapely'):
+            func = transform.clipper(box, method)
+            _, seconds = _timed(func, geometries)
+            print(f'clip {name} {method}: {len(geometries) / seconds:,.0f} features/s')
+
+        if hasattr(func, 'batch'):
+            _, seconds = _timed(func.batch, [geometries])
+            print(f'clip {name} (batch): {len(geometries) / seconds:,.0f} features/s')
+
+
+BENCHMARKS = {
+    'hilbert': hilbert,
+    'simplify': simplify,
+    'project': project,
+    'clip': clip,
+}
+
+if __name__ == '__main__':
+    for benchmark in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[benchmark]()
@@ -39,6 +39,13 @@ class ConvertTestCase(unittest.TestCase):
         self.assertFalse(bounding.covers(c, a))
         self.assertTrue(bounding.covers(c, c))
 
+    def test_bbox_disjoint(self):
+        a = (0, 0, 10, 10)
+        self.assertFalse(bounding.disjoint(a, (5, 5, 20, 20)))
+        self.assertFalse(bounding.disjoint(a, (10, 10, 20, 20)))
+        self.assertTrue(bounding.disjoint(a, (11, 0, 20, 10)))
+        self.assertTrue(bounding.disjoint(a, (0, -5, 10, -1)))
+
     def testbounds_to_ring(self):
         fixture = [
             (0, 0),
@@ -0,0 +1,87 @@
+"""Tests on memory-mapped coordinate caches."""
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
+import importlib.util
+import logging
+import shutil
+import tempfile
+import unittest
+
+import fiona
+
+from svgis import cache, errors, svgis
+
+NO_NUMPY = importlib.util.find_spec('numpy') is None
+
+
+@unittest.skipIf(NO_NUMPY, 'numpy is not installed')
+class CacheTestCase(unittest.TestCase):
+    file = 'tests/fixtures/cb_2014_us_nation_20m.json'
+
+    def setUp(self):
+        logging.getLogger('svgis').setLevel(logging.CRITICAL)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRoundTrip(self):
+        self.assertFalse(cache.is_cache(self.directory))
+        self.assertEqual(cache.write(self.file, self.directory, fields=['NAME', 'missing']), 1)
+        self.assertTrue(cache.is_cache(self.directory))
+
+        with fiona.open(self.file) as src:
+            expected = next(iter(src))
+
+        with cache.Layer(self.directory) as layer:
+            self.assertEqual(len(layer), 1)
+            feature = layer[0]
+            self.assertEqual(feature['properties'], {'NAME': expected['properties']['NAME']})
+            self.assertEqual(feature['geometry']['type'], expected['geometry']['type'])
+
+            for part, expected_part in zip(feature['geometry']['coordinates'], expected['geometry']['coordinates']):
+                for ring, expected_ring in zip(part, expected_part):
+                    self.assertEqual(ring.tolist(), [list(c[:2]) for c in expected_ring])
+
+            self.assertEqual(len(list(layer.items(bbox=(-100, 30, -90, 40)))), 1)
+            self.assertEqual(len(list(layer.items(bbox=(0, 0, 1, 1)))), 0)
+            self.assertEqual(layer.count(bbox=(-100, 30, -90, 40)), 1)
+            self.assertEqual(layer.count(bbox=(0, 0, 1, 1)), 0)
+            self.assertEqual(len(list(layer.items(1, None))), 0)
+
+    def testFields(self):
+        cache.write(self.file, self.directory, fields=['NAME', 'GEOID'])
+        with fiona.open(self.file) as src:
+            expected = next(iter(src))
+
+        with cache.Layer(self.directory) as layer:
+            self.assertEqual(list(layer.schema['properties']), ['NAME', 'GEOID'])
+            self.assertIn('AFFGEOID', layer.uncached)
+            self.assertEqual(layer[0]['id'], expected['id'])
+            self.assertEqual(layer[0]['properties'], {k: expected['properties'][k] for k in ('NAME', 'GEOID')})
+
+        drawing = svgis.SVGIS(self.directory, scalar=0.001, class_fields=['NAME']).compose(inline=False)
+        self.assertIn('United_States', drawing)
+
+        with self.assertRaises(errors.SvgisError):
+            svgis.SVGIS(self.directory, scalar=0.001, data_fields=['AFFGEOID']).compose()
+
+    def testColumns(self):
+        column, missing = cache._column([1, None, 3], 'int:10')  # pylint: disable=protected-access
+        self.assertEqual(column.dtype, 'int64')
+        self.assertEqual(missing.tolist(), [False, True, False])
+        column, _ = cache._column(['a', None], 'str:80')  # pylint: disable=protected-access
+        self.assertEqual(column.tolist(), ['a', ''])
+
+    def testDrawCache(self):
+        cache.write(self.file, self.directory)
+        expected = svgis.SVGIS(self.file, scalar=0.001).compose(inline=False)
+        result = svgis.SVGIS(self.directory, scalar=0.001).compose(inline=False)
+        self.assertEqual(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@
 # http://opensource.org/licenses/GPL-3.0
 # Copyright (c) 2015-16, Neil Freeman <contact@fakeisthenewreal.org>
 # pylint: disable=duplicate-code
+import gzip
 import io
 import os
 import re
@@ -137,6 +138,46 @@ class CliTestCase(unittest.TestCase):
         finally:
             os.remove(f)
 
+    def testDrawCompressed(self):
+        try:
+            self.invoke(['draw', '--scale', '1000', self.shp, '-o', 'tmp.svg'])
+            self.invoke(['draw', '--scale', '1000', '--compress', self.shp, '-o', 'tmp.svgz'])
+
+            with open('tmp.svg', 'rb') as f, gzip.open('tmp.svgz', 'rb') as g:
+                self.assertEqual(f.read(), g.read())
+
+        finally:
+            os.remove('tmp.svg')
+            os.remove('tmp.svgz')
+
+    def testDrawExplain(self):
+        try:
+            result = self.invoke(['draw', '--explain', '--scale', '1000', self.shp, '-o', 'tmp.txt'])
+            self.assertEqual(result.exit_code, 0)
+            with open('tmp.txt') as f:
+                report = f.read()
+
+            self.assertIn('cb_2014_us_nation_20m', report)
+            self.assertIn('project (s)', report)
+            self.assertNotIn('<svg', report)
+
+        finally:
+            os.remove('tmp.txt')
+
+    def testDrawMaxBytesNoInline(self):
+        try:
+            args = ['--scale', '1000', '--style', 'polygon{fill:red}', '--no-inline', '--max-bytes', '100K']
+            result = self.invoke(['draw'] + args + [self.shp, '-o', 'tmp.svg'])
+            self.assertEqual(result.exit_code, 0)
+            with open('tmp.svg', encoding='utf-8') as f:
+                drawing = f.read()
+
+            self.assertIn('<polygon', drawing)
+            self.assertNotIn('style="', drawing)
+
+        finally:
+            os.remove('tmp.svg')
+
     def testCliHelp(self):
         result = self.invoke(('--help',))
         self.assertEqual(result.exit_code, 0)
@@ -169,6 +210,15 @@ class CliTestCase(unittest.TestCase):
 
         self.assertEqual(svgis.cli.validate_posint(None, None, 1), 1)
 
+    def test_validate_size(self):
+        self.assertEqual(svgis.cli.validate_size(None, None, '512'), 512)
+        self.assertEqual(svgis.cli.validate_size(None, None, '2K'), 2048)
+        self.assertEqual(svgis.cli.validate_size(None, None, '1mb'), 1024**2)
+        self.assertIsNone(svgis.cli.validate_size(None, None, None))
+
+        with self.assertRaises(BadParameter):
+            svgis.cli.validate_size(None, None, '1.5G')
+
 
 if __name__ == '__main__':
     unittest.main()
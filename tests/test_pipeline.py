@@ -0,0 +1,113 @@
+"""Tests on threaded pipeline stages."""
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
+import gzip
+import io
+import unittest
+
+from svgis import pipeline
+
+
+def _broken():
+    yield 1
+    raise ValueError('broken')
+
+
+class PrefetchTestCase(unittest.TestCase):
+    def testPrefetch(self):
+        prefetcher = pipeline.Prefetcher(range(100), depth=3)
+        self.assertEqual(list(prefetcher), list(range(100)))
+        self.assertEqual(prefetcher.count, 100)
+        self.assertGreaterEqual(prefetcher.waiting, 0)
+        self.assertEqual(set(prefetcher.stats()), {'count', 'waiting', 'working', 'reading'})
+
+    def testPrefetchError(self):
+        with self.assertRaises(ValueError):
+            list(pipeline.Prefetcher(_broken(), depth=1))
+
+    def testPrefetchStop(self):
+        prefetcher = iter(pipeline.Prefetcher(range(1000), depth=2))
+        self.assertEqual(next(prefetcher), 0)
+        prefetcher.close()
+
+
+class SpoolTestCase(unittest.TestCase):
+    def testSpool(self):
+        with pipeline.Spool(max_size=10, chunk_size=4) as spool:
+            spool.write('<g>')
+            self.assertFalse(spool.spilled)
+            spool.write('<polygon/>' * 3)
+            self.assertTrue(spool.spilled)
+            self.assertEqual(''.join(spool), '<g>' + '<polygon/>' * 3)
+            self.assertTrue(all(len(chunk) <= 4 for chunk in spool))
+
+            spool.write('</g>')
+            self.assertEqual(''.join(spool), '<g>' + '<polygon/>' * 3 + '</g>')
+
+    def testSpoolSplit(self):
+        fragments = ['<g>', '<polygon/>\r\n', '', '<circle/>']
+        with pipeline.Spool(max_size=5) as spool:
+            for fragment in fragments:
+                spool.write(fragment)
+            self.assertEqual(list(spool.split(len(f) for f in fragments)), fragments)
+            self.assertEqual(''.join(spool), ''.join(fragments))
+
+
+class SorterTestCase(unittest.TestCase):
+    items = [(3, 'c'), (1, 'a'), (2, 'b1'), (5, 'e'), (2, 'b2'), (4, 'd')]
+
+    def testSortInMemory(self):
+        with pipeline.Sorter(1000) as sorter:
+            for key, fragment in self.items:
+                sorter.add(key, fragment)
+            self.assertFalse(sorter.spilled)
+            self.assertEqual(list(sorter), ['a', 'b1', 'b2', 'c', 'd', 'e'])
+
+    def testExternalSort(self):
+        with pipeline.Sorter(2) as sorter:
+            for key, fragment in self.items:
+                sorter.add(key, fragment)
+            self.assertTrue(sorter.spilled)
+            self.assertEqual(list(sorter), ['a', 'b1', 'b2', 'c', 'd', 'e'])
+
+    def testReverse(self):
+        for size in (1000, 2):
+            with pipeline.Sorter(size, reverse=True) as sorter:
+                for key, fragment in self.items:
+                    sorter.add(key, fragment)
+                self.assertEqual(list(sorter), ['e', 'd', 'c', 'b1', 'b2', 'a'])
+
+
+class WriterTestCase(unittest.TestCase):
+    fragments = ['<svg>', '<g>', 'ü' * 100, '</g>', '</svg>']
+
+    def testWrite(self):
+        output = io.BytesIO()
+        with pipeline.Writer(output, chunk_size=10) as writer:
+            for fragment in self.fragments:
+                writer.write(fragment)
+
+        self.assertEqual(output.getvalue().decode('utf-8'), ''.join(self.fragments))
+        self.assertEqual(set(writer.stats()), {'waiting', 'writing'})
+
+    def testCompress(self):
+        output = io.BytesIO()
+        with pipeline.Writer(output, compress=True) as writer:
+            for fragment in self.fragments:
+                writer.write(fragment)
+
+        self.assertEqual(gzip.decompress(output.getvalue()).decode('utf-8'), ''.join(self.fragments))
+
+    def testWriteError(self):
+        output = io.BytesIO()
+        output.close()
+        with self.assertRaises(ValueError):
+            with pipeline.Writer(output, chunk_size=1) as writer:
+                writer.write('<svg>')
+
+
+if __name__ == '__main__':
+    unittest.main()
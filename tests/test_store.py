@@ -0,0 +1,133 @@
+"""Tests on prepared feature stores."""
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
+import logging
+import os
+import tempfile
+import unittest
+
+from svgis import errors, store, svgis
+
+PROJECTION = '+proj=lcc +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=m +no_defs'
+
+
+class StoreTestCase(unittest.TestCase):
+    file = 'tests/fixtures/cb_2014_us_nation_20m.json'
+
+    def setUp(self):
+        logging.getLogger('svgis').setLevel(logging.CRITICAL)
+        handle, self.database = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.database)
+
+    def testParse(self):
+        self.assertEqual(store.parse('store://a/b.sqlite/layer'), ('a/b.sqlite', 'layer'))
+        self.assertTrue(store.is_store('store://a/b.sqlite/layer'))
+        self.assertFalse(store.is_store(self.file))
+
+        with self.assertRaises(errors.SvgisError):
+            store.parse('store://layer')
+
+    def testPrepare(self):
+        paths = svgis.SVGIS(self.file, crs=PROJECTION, scalar=0.001).prepare(self.database)
+        self.assertEqual(paths, [f'store://{self.database}/cb_2014_us_nation_20m'])
+
+        with store.Layer(paths[0], scalar=0.001) as layer:
+            self.assertEqual(len(layer), 1)
+            self.assertTrue(layer.prepared)
+            self.assertIn('GEOID', layer.schema['properties'])
+            self.assertEqual(len(list(layer.items(bbox=layer.bounds))), 1)
+            self.assertEqual(len(list(layer.items(bbox=(1e9, 1e9, 1e9 + 1, 1e9 + 1)))), 0)
+            self.assertEqual(layer.count(bbox=layer.bounds), 1)
+            self.assertEqual(layer.count(bbox=(1e9, 1e9, 1e9 + 1, 1e9 + 1)), 0)
+
+        with self.assertRaises(errors.SvgisError):
+            store.Layer(paths[0], scalar=0.01)
+
+    def testDrawPrepared(self):
+        kwargs = {'crs': PROJECTION, 'scalar': 0.001, 'simplify': 50}
+        paths = svgis.SVGIS(self.file, **kwargs).prepare(self.database)
+
+        expected = svgis.SVGIS(self.file, **kwargs).compose(inline=False)
+        result = svgis.SVGIS(paths, **kwargs).compose(inline=False)
+        self.assertEqual(result, expected)
+
+        # The store's projection is used when none is given.
+        self.assertEqual(svgis.SVGIS(paths, scalar=0.001, simplify=50).compose(inline=False), result)
+
+    def testDrawPreparedBounds(self):
+        kwargs = {'crs': PROJECTION, 'scalar': 0.001, 'bounds': (-100, 30, -90, 40)}
+        paths = svgis.SVGIS(self.file, **kwargs).prepare(self.database)
+
+        # Bounds are given in the projection of the source layer.
+        expected = svgis.SVGIS(self.file, **kwargs).compose(inline=False)
+        self.assertEqual(svgis.SVGIS(paths, **kwargs).compose(inline=False), expected)
+        self.assertIn('<polygon', expected)
+
+    def testSimplifyMethod(self):
+        kwargs = {'crs': PROJECTION, 'scalar': 0.001, 'simplify': 50}
+        paths = svgis.SVGIS(self.file, simplify_method='dp', **kwargs).prepare(self.database)
+
+        # Only an entry simplified with the same method is drawn.
+        with self.assertRaises(errors.SvgisError):
+            svgis.SVGIS(paths, **kwargs).compose()
+
+        expected = svgis.SVGIS(self.file, simplify_method='dp', **kwargs).compose(inline=False)
+        self.assertEqual(svgis.SVGIS(paths, simplify_method='dp', **kwargs).compose(inline=False), expected)
+
+        # Both can be saved side by side.
+        svgis.SVGIS(self.file, **kwargs).prepare(self.database)
+        expected = svgis.SVGIS(self.file, **kwargs).compose(inline=False)
+        self.assertEqual(svgis.SVGIS(paths, **kwargs).compose(inline=False), expected)
+
+    def testDrawPrefetched(self):
+        kwargs = {'crs': PROJECTION, 'scalar': 0.001}
+        paths = svgis.SVGIS(self.file, **kwargs).prepare(self.database)
+
+        expected = svgis.SVGIS(paths, **kwargs).compose(inline=False)
+        self.assertEqual(svgis.SVGIS(paths, prefetch=8, **kwargs).compose(inline=False), expected)
+
+    def testDrawLevelOfDetail(self):
+        kwargs = {'crs': PROJECTION, 'scalar': 0.001}
+        paths = svgis.SVGIS(self.file, **kwargs).prepare(self.database, lod=True)
+
+        with store.Layer(paths[0], scalar=0.001, simplify=50) as layer:
+            self.assertTrue(layer.lod)
+            geometry = next(layer.items())[1]['geometry']
+            self.assertEqual(len(geometry['areas']), len(geometry['coordinates']))
+
+        # Without simplification, a level of detail entry draws like the original.
+        expected = svgis.SVGIS(self.file, **kwargs).compose(inline=False)
+        self.assertEqual(svgis.SVGIS(paths, **kwargs).compose(inline=False), expected)
+
+        sizes = [len(svgis.SVGIS(paths, simplify=s, **kwargs).compose(inline=False)) for s in (10, 50, 90)]
+        self.assertLess(sizes[0], sizes[1])
+        self.assertLess(sizes[1], sizes[2])
+        self.assertLess(sizes[2], len(expected))
+
+        # An entry saved with the simplification factor is preferred.
+        svgis.SVGIS(self.file, simplify=50, **kwargs).prepare(self.database)
+        with store.Layer(paths[0], scalar=0.001, simplify=50) as layer:
+            self.assertFalse(layer.lod)
+
+    def testFitLevelOfDetail(self):
+        kwargs = {'crs': PROJECTION, 'scalar': 0.001, 'simplify': 50}
+        paths = svgis.SVGIS(self.file, crs=PROJECTION, scalar=0.001).prepare(self.database, lod=True)
+        expected = svgis.SVGIS(paths, **kwargs).compose(inline=False)
+
+        # A drawing that fits is simplified with the effective areas from the store, like one without max_bytes.
+        fitted = svgis.SVGIS(paths, max_bytes=len(expected.encode('utf-8')), **kwargs).compose(inline=False)
+        self.assertEqual(fitted, expected)
+
+        max_bytes = len(expected.encode('utf-8')) // 2
+        fitted = svgis.SVGIS(paths, max_bytes=max_bytes, **kwargs).compose(inline=False)
+        self.assertLessEqual(len(fitted.encode('utf-8')), max_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
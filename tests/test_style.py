@@ -55,6 +55,23 @@ class CssTestCase(unittest.TestCase):
         polyline_style = doc.getElementsByTagName('polyline').item(0).getAttribute('style')
         self.assertIn('stroke:blue', polyline_style)
 
+    def testInlineFragment(self):
+        inliner = style.Inliner(self.css)
+        ancestors = [('<svg xmlns="http://www.w3.org/2000/svg">', '</svg>'), ('<g id="cat">', '</g>')]
+        fragment = '<polyline id="meow" class="long-class-name" points="3,2 -2,6 8,-1"/><circle id="orb"/>'
+        inlined = inliner.inline(fragment, ancestors)
+
+        self.assertTrue(inlined.startswith('<polyline id="meow"'))
+        self.assertNotIn('xmlns', inlined)
+
+        doc = minidom.parseString('<g>' + inlined + '</g>')
+        polyline_style = doc.getElementsByTagName('polyline').item(0).getAttribute('style')
+        self.assertIn('fill:red', polyline_style)
+        self.assertIn('stroke-opacity:0.50', polyline_style)
+        self.assertEqual(doc.getElementsByTagName('circle').item(0).getAttribute('r'), '1')
+
+        self.assertEqual(inliner.inline('', ancestors), '')
+
     def test_add_style(self):
         new = style.add_style(self.file, self.css)
         result = minidom.parseString(new).getElementsByTagName('defs').item(0).getElementsByTagName('style').item(0)
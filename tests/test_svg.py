@@ -76,6 +76,14 @@ class SvgTestCase(unittest.TestCase):
         self.assertIn('Z"', path)
         self.assertIn('10.0,0.0', path)
 
+    def testDropCollinear(self):
+        square = [(0, 0), (5, 0), (10, 0.0001), (10, 10), (0, 10), (0, 0)]
+        self.assertEqual(svg.polygon(square, precision=0), '<polygon points="0,0 10,0 10,10 0,10 0,0"/>')
+        self.assertIn('5.0000,0.0000', svg.polyline(square, precision=4))
+
+        path = svg.path(['M'] + square + ['z', 'M', (2, 2), (3, 2), (4, 2), (4, 4), 'z'], precision=0)
+        self.assertEqual(path, '<path d="M 0,0 10,0 10,10 0,10 0,0 z M 2,2 4,2 4,4 z"/>')
+
     def assertPartsIn(self, fixture, test):
         for f in fixture:
             self.assertIn(f, test)
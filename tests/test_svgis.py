@@ -5,19 +5,32 @@
 # http://opensource.org/licenses/GPL-3.0
 # Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
 # pylint: disable=unused-import
+import functools
+import io
+import json
 import logging
+import os.path
 import re
+import tempfile
 import unittest
 from xml.dom import minidom
 
+import fiona
 import six
 
-from svgis import errors, svgis
+from svgis import errors, svgis, transform
+
+
+def drawn_vertices(path, precision, **kwargs):
+    '''Count the vertices drawn from the first layer of a drawing.'''
+    return svgis.SVGIS(path, **kwargs).explain(precision=precision)['layers'][0]['drawn_vertices']
 
 
 class SvgisTestCase(unittest.TestCase):
     file = 'tests/fixtures/cb_2014_us_nation_20m.json'
 
+    lcc = '+proj=lcc +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=m +no_defs'
+
     chi_files = ['tests/fixtures/chicago_bounds_2790.json', 'tests/fixtures/cook_bounds_4269.json']
 
     polygon = {
@@ -171,6 +184,274 @@ class SvgisTestCase(unittest.TestCase):
         assert 'pear_1' in r2
         assert 'kale_leafy_green' in r2
 
+    def testPrefetch(self):
+        expected = self.svgis_obj.compose(inline=False)
+        drawing = svgis.SVGIS(self.file, prefetch=2)
+        self.assertEqual(drawing.compose(inline=False), expected)
+        self.assertEqual(drawing.stats['cb_2014_us_nation_20m']['count'], 1)
+
+    def testIterCompose(self):
+        bounds = (-80, 40, -71, 45.1)
+        kwargs = {'scalar': 0.1, 'crs': 'EPSG:2790'}
+        expected = svgis.SVGIS(self.chi_files, **kwargs).compose(bounds, inline=False, precision=1)
+        fragments = list(svgis.SVGIS(self.chi_files, **kwargs).iter_compose(bounds, inline=False, precision=1))
+        self.assertGreater(len(fragments), 3)
+        self.assertEqual(''.join(fragments), expected)
+
+        output = io.BytesIO()
+        svgis.SVGIS(self.chi_files, **kwargs).compose_to(output, bounds=bounds, inline=False, precision=1)
+        self.assertEqual(output.getvalue().decode('utf-8'), expected + '\n')
+
+    def testMaxMemory(self):
+        css = 'polygon{fill:red}'
+        expected = self.svgis_obj.compose(style=css, inline=False)
+        drawing = svgis.SVGIS(self.file, max_memory=100)
+        self.assertEqual(drawing.compose(style=css, inline=False), expected)
+
+        streamed = ''.join(drawing.iter_compose(style=css, inline=False))
+        self.assertEqual(streamed, expected)
+
+        inlined = ''.join(drawing.iter_compose(style=css, inline=True))
+        self.assertIn('fill:red', minidom.parseString(inlined).getElementsByTagName('polygon').item(0).toxml())
+
+    def testTight(self):
+        bounds = (-124, 20.5, -64, 49)
+        loose = svgis.SVGIS(self.file, bounds, scalar=0.001, crs=self.lcc)
+        tight = svgis.SVGIS(self.file, bounds, scalar=0.001, crs=self.lcc, tight=True)
+        loose_svg = minidom.parseString(loose.compose(inline=False)).documentElement
+        tight_doc = tight.compose(inline=False)
+        tight_svg = minidom.parseString(tight_doc).documentElement
+        self.assertLess(float(tight_svg.getAttribute('width')), float(loose_svg.getAttribute('width')))
+        self.assertLess(float(tight_svg.getAttribute('height')), float(loose_svg.getAttribute('height')))
+
+        self.assertEqual(''.join(tight.iter_compose(inline=False)), tight_doc)
+        spooled = svgis.SVGIS(self.file, bounds, scalar=0.001, crs=self.lcc, tight=True, max_memory=100)
+        self.assertEqual(''.join(spooled.iter_compose(inline=False)), tight_doc)
+
+    def testExplain(self):
+        drawing = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001, simplify=50)
+        report = drawing.explain(precision=1)
+        self.assertEqual(len(report['layers']), 1)
+        layer = report['layers'][0]
+        self.assertEqual(layer['name'], 'cb_2014_us_nation_20m')
+        self.assertEqual((layer['features'], layer['in_bounds'], layer['sampled']), (1, 1, 1))
+        self.assertGreater(layer['vertices'], layer['drawn_vertices'])
+        self.assertLessEqual({'read', 'project', 'scale', 'clip', 'simplify', 'draw'}, set(report['seconds']))
+        self.assertIsNone(drawing.projected_bounds)
+
+        # With every feature sampled, the estimate is close to the real thing.
+        result = drawing.compose(inline=False, precision=1)
+        self.assertAlmostEqual(report['bytes'] / len(result), 1, places=1)
+        self.assertSequenceEqual(report['size'], drawing.explain(precision=1)['size'])
+
+    def testMaxBytes(self):
+        unfitted = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001).compose(precision=2)
+        size = len(unfitted.encode('utf-8'))
+
+        roomy = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001, max_bytes=size)
+        self.assertEqual(roomy.compose(precision=2), unfitted)
+
+        fitted = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001, max_bytes=size // 2)
+        result = fitted.compose(precision=2)
+        self.assertLessEqual(len(result.encode('utf-8')), size // 2)
+        self.assertGreater(len(result.encode('utf-8')), size // 4)
+        self.assertEqual(''.join(fitted.iter_compose(precision=2)), result)
+
+    def testMaxVertices(self):
+        unbudgeted = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001).explain(precision=1)['layers'][0]
+        budgeted = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001, max_vertices=1000)
+        layer = budgeted.explain(precision=1)['layers'][0]
+        self.assertLessEqual(layer['drawn_vertices'], 1000)
+        self.assertGreater(layer['drawn_vertices'], 500)
+        self.assertEqual(layer['vertices'], unbudgeted['vertices'])
+
+        roomy = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001, max_vertices=10000)
+        plain = svgis.SVGIS(self.file, crs=self.lcc, scalar=0.001)
+        self.assertEqual(roomy.compose(precision=1), plain.compose(precision=1))
+
+    def testMinSize(self):
+        drawing = svgis.SVGIS(self.chi_files, crs=self.lcc, scalar=0.0001)
+        self.assertEqual(drawing.compose(inline=False).count('<polygon'), 2)
+
+        drawing = svgis.SVGIS(self.chi_files, crs=self.lcc, scalar=0.0001, min_size=5)
+        result = drawing.compose(inline=False)
+        self.assertEqual(result.count('<polygon'), 1)
+        self.assertNotIn('<circle', result)
+
+        drawing = svgis.SVGIS(self.chi_files, crs=self.lcc, scalar=0.0001, min_size=5, cull_to_point=True)
+        result = drawing.compose(inline=False)
+        self.assertEqual(result.count('<polygon'), 1)
+        self.assertEqual(result.count('<circle'), 1)
+
+    def testAutoSimplify(self):
+        kwargs = {'crs': self.lcc, 'scalar': 0.0001}
+        # At the default precision, much less than a pixel apart, vertices are still removed.
+        simplified = drawn_vertices(self.file, 5, auto_simplify=True, **kwargs)
+        self.assertLess(simplified, drawn_vertices(self.file, 5, **kwargs) / 3)
+        self.assertLess(simplified, drawn_vertices(self.file, 5, simplify=50, **kwargs) / 2)
+
+        # Larger scale maps keep more.
+        detailed = drawn_vertices(self.file, 5, crs=self.lcc, scalar=0.001, auto_simplify=True)
+        self.assertGreater(detailed, simplified)
+
+    def testSnap(self):
+        if transform.snapper(0) is None:
+            self.skipTest('numpy not installed')
+
+        kwargs = {'crs': self.lcc, 'scalar': 0.0001}
+        # Vertices that round to the same output coordinates are removed before drawing.
+        self.assertLess(drawn_vertices(self.file, 0, **kwargs), drawn_vertices(self.file, 0, snap=False, **kwargs))
+        self.assertEqual(
+            drawn_vertices(self.file, None, **kwargs), drawn_vertices(self.file, None, snap=False, **kwargs)
+        )
+
+        kwargs['precision'] = 0
+        snapped = svgis.SVGIS(self.file, **kwargs).compose(inline=False)
+        self.assertLess(len(snapped), len(svgis.SVGIS(self.file, snap=False, **kwargs).compose(inline=False)))
+
+    def testSimplifyLinesAndPoints(self):
+        line = [(x / 10, (x % 3) / 20) for x in range(100)]
+        geometries = [{'type': 'LineString', 'coordinates': line}, {'type': 'MultiPoint', 'coordinates': line}]
+        with tempfile.TemporaryDirectory() as tmp:
+            for geometry in geometries:
+                path = os.path.join(tmp, 'layer.geojson')
+                feature = {'type': 'Feature', 'properties': {}, 'geometry': geometry}
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({'type': 'FeatureCollection', 'features': [feature]}, f)
+
+                for kwargs in ({'simplify_method': 'dp'}, {'simplify_method': 'dp-preserve'}, {'auto_simplify': True}):
+                    simplify = None if kwargs.get('auto_simplify') else 50
+                    result = svgis.SVGIS(path, crs=self.lcc, scalar=0.001, simplify=simplify, **kwargs).compose()
+                    self.assertRegex(result, '<polyline|<circle')
+
+    def testBatchSimplify(self):
+        files = [self.file, 'tests/fixtures/tl_2015_11_place.json']
+        kwargs = {'crs': self.lcc, 'scalar': 0.01, 'simplify': 50, 'simplify_method': 'dp'}
+        drawing = svgis.SVGIS(files, **kwargs)
+        if not hasattr(drawing.simplifier, 'batch'):
+            self.skipTest('Shapely 2 not installed')
+
+        # Simplifying batches of features draws the same as simplifying each feature.
+        batched = drawing.compose(inline=False)
+        feature_by_feature = svgis.SVGIS(files, **kwargs)
+        # A partial doesn't carry the simplifier's batch attribute.
+        feature_by_feature.simplifier = functools.partial(drawing.simplifier)
+        self.assertEqual(batched, feature_by_feature.compose(inline=False))
+
+        unsimplified = svgis.SVGIS(files, crs=self.lcc, scalar=0.01).compose(inline=False)
+        self.assertLess(len(batched), len(unsimplified))
+
+    def testBatchClip(self):
+        files = [self.file, 'tests/fixtures/tl_2015_11_place.json']
+        kwargs = {'bounds': (-90, 37, -75, 43), 'crs': self.lcc, 'scalar': 0.001}
+        drawing = svgis.SVGIS(files, **kwargs)
+        batched = drawing.compose(inline=False)
+        if not hasattr(drawing.clipper, 'batch'):
+            self.skipTest('Shapely 2 not installed')
+
+        # Clipping batches of features draws the same shapes as clipping each feature.
+        feature_by_feature = svgis.SVGIS(files, **kwargs)
+        feature_by_feature.clipper = functools.partial(drawing.clipper)
+        expected = feature_by_feature.compose(inline=False)
+        self.assertEqual(batched.count('<polygon'), expected.count('<polygon'))
+        self.assertEqual(batched.count('<path'), expected.count('<path'))
+        self.assertLess(len(batched), len(svgis.SVGIS(files, clip=False, **kwargs).compose(inline=False)))
+
+    def testProjectUnique(self):
+        files = [self.file, 'tests/fixtures/tl_2015_11_place.json']
+        drawing = svgis.SVGIS(files, crs='EPSG:2790', scalar=0.01, project_unique=True)
+        with fiona.open(self.file) as layer:
+            drawing.set_in_crs(layer.crs)
+            drawing.set_out_crs(layer.bounds)
+            if not hasattr(drawing._reprojector(layer.crs), 'batch'):
+                self.skipTest('numpy not installed')
+
+        unique = drawing.compose(inline=False)
+        expected = svgis.SVGIS(files, crs='EPSG:2790', scalar=0.01).compose(inline=False)
+        self.assertEqual(unique.count('<polygon'), expected.count('<polygon'))
+        self.assertEqual(unique.count(','), expected.count(','))
+
+    def testCoverageSimplify(self):
+        kwargs = {'crs': self.lcc, 'scalar': 0.01}
+        drawing = svgis.SVGIS(self.file, simplify=20, simplify_method='coverage', **kwargs)
+        if drawing.simplifier is None:
+            self.skipTest('visvalingamwyatt not installed')
+
+        with fiona.open(self.file) as layer:
+            drawing.set_in_crs(layer.crs)
+            drawing.set_out_crs(layer.bounds)
+            names = [name for name, _ in drawing._stages(layer, layer.bounds, 0.01)]
+        # Borders are simplified before they're clipped.
+        self.assertLess(names.index('simplify'), names.index('clip'))
+
+        unsimplified = svgis.SVGIS(self.file, **kwargs).compose(inline=False)
+        self.assertLess(len(drawing.compose(inline=False)), len(unsimplified))
+
+    @staticmethod
+    def _write_points(path, coordinates, ranks):
+        features = [
+            {
+                'type': 'Feature',
+                'properties': {'name': f'p{i}', 'rank': r},
+                'geometry': {'type': 'Point', 'coordinates': c},
+            }
+            for i, (c, r) in enumerate(zip(coordinates, ranks))
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'FeatureCollection', 'features': features}, f)
+
+    @staticmethod
+    def _order(path, **kwargs):
+        result = svgis.SVGIS(path, crs='file', id_field='name', **kwargs).compose(inline=False)
+        return re.findall(r'id="(p\d+)"', result)
+
+    def testSortField(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'points.geojson')
+            self._write_points(path, [(i, i) for i in range(4)], [3, None, 1, 2])
+
+            self.assertEqual(self._order(path), ['p0', 'p1', 'p2', 'p3'])
+            self.assertEqual(self._order(path, sort_field='rank'), ['p2', 'p3', 'p0', 'p1'])
+            self.assertEqual(self._order(path, sort_field='-rank'), ['p0', 'p3', 'p2', 'p1'])
+            self.assertEqual(self._order(path, sort_field=['points:-rank'], max_memory=10), ['p0', 'p3', 'p2', 'p1'])
+            self.assertEqual(self._order(path, sort_field='rank', max_bytes=10**6), ['p2', 'p3', 'p0', 'p1'])
+            self.assertEqual(self._order(path, sort_field={'other': 'rank'}), ['p0', 'p1', 'p2', 'p3'])
+
+    def testHilbert(self):
+        # Corners of a square, out of order.
+        coordinates = [(0, 0), (1, 1), (0, 1), (1, 0)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'points.geojson')
+            self._write_points(path, coordinates, [1, 1, 2, 2])
+
+            self.assertEqual(self._order(path, hilbert=True), ['p0', 'p2', 'p1', 'p3'])
+            self.assertEqual(self._order(path, hilbert=True, max_memory=10), ['p0', 'p2', 'p1', 'p3'])
+            self.assertEqual(self._order(path, hilbert=True, max_bytes=10**6), ['p0', 'p2', 'p1', 'p3'])
+            self.assertEqual(self._order(path, hilbert=True, sort_field='rank'), ['p0', 'p1', 'p2', 'p3'])
+
+    def testSample(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'points.geojson')
+            self._write_points(path, [(i, i) for i in range(10)], [None] * 10)
+
+            sample = self._order(path, sample=0.25)
+            indices = [int(p[1:]) for p in sample]
+            self.assertIn(len(sample), (2, 3))
+            self.assertEqual({b - a for a, b in zip(indices, indices[1:])}, {4})
+            self.assertEqual(self._order(path, sample=0.25, seed=0), sample)
+            self.assertGreater(len({tuple(self._order(path, sample=0.25, seed=i)) for i in range(10)}), 1)
+
+            self.assertLessEqual(len(self._order(path, max_features=3)), 3)
+            self.assertEqual(len(self._order(path, sample=0.5, max_features=2)), 2)
+            self.assertEqual(len(self._order(path, sample=1)), 10)
+
+            # Fractions between 1/n strides still pick about the right number of features.
+            for fraction in (0.3, 0.6, 0.7, 0.9):
+                self.assertEqual(len(self._order(path, sample=fraction)), round(10 * fraction))
+
+            # Only features within the bounds count toward max_features.
+            self.assertEqual(len(self._order(path, max_features=5, bounds=(0, 0, 4, 4))), 5)
+
     def testIssue8(self):
         '''Test for coordinate testing bug in: https://github.com/fitnr/svgis/issues/8'''
         s = svgis.SVGIS('tests/fixtures/issue-8.geojson', crs='file')
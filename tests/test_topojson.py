@@ -0,0 +1,75 @@
+"""Tests on reading TopoJSON."""
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
+import re
+import unittest
+
+from svgis import errors, svgis, topojson
+
+
+class TopoJSONTestCase(unittest.TestCase):
+    file = 'tests/fixtures/squares.topojson'
+
+    def testIsTopoJSON(self):
+        self.assertTrue(topojson.is_topojson(self.file))
+        self.assertTrue(topojson.is_topojson(self.file + '#border'))
+        self.assertFalse(topojson.is_topojson('tests/fixtures/cb_2014_us_nation_20m.json'))
+
+    def testLayer(self):
+        with topojson.Layer(self.file) as layer:
+            self.assertEqual(layer.name, 'squares')
+            self.assertEqual(len(layer), 2)
+            self.assertEqual(layer.bounds, (-80.0, 40.0, -78.0, 41.0))
+            self.assertEqual(layer.schema['properties'], {'name': 'str', 'rank': 'int'})
+
+            features = dict(layer.items())
+            self.assertEqual([f['id'] for f in features.values()], ['a', 'b'])
+            # The shared arc is reversed in the second square.
+            a, b = (f['geometry']['coordinates'][0].tolist() for f in features.values())
+            self.assertEqual(a[:3], b[2::-1])
+
+            self.assertEqual([f['id'] for _, f in layer.items(bbox=(-79.9, 40.1, -79.5, 40.5))], ['a'])
+            self.assertEqual(layer.count(bbox=(-79.9, 40.1, -79.5, 40.5)), 1)
+
+        with topojson.Layer(self.file + '#centers') as layer:
+            self.assertEqual(next(layer.items())[1]['geometry']['coordinates'].tolist(), [[-79.5, 40.5], [-78.5, 40.5]])
+
+        with self.assertRaises(errors.SvgisError):
+            topojson.Layer(self.file + '#missing')
+
+    def testTransform(self):
+        calls = []
+
+        def shift(geometry):
+            calls.append(geometry['type'])
+            return dict(geometry, coordinates=geometry['coordinates'] + 1)
+
+        with topojson.Layer(self.file) as layer:
+            layer.transform(shift)
+            self.assertEqual(calls, ['LineString'] * 3)
+            geometry = next(layer.items())[1]['geometry']
+            self.assertEqual(geometry['coordinates'][0][0].tolist(), [-78, 41])
+
+            # Bounding box queries are in the original coordinates.
+            self.assertEqual(layer.count(bbox=(-79.9, 40.1, -79.5, 40.5)), 1)
+
+    def testDraw(self):
+        result = svgis.SVGIS(self.file, crs='EPSG:2790', scalar=0.001).compose(inline=False)
+        polygons = re.findall(r'<polygon points="([^"]+)"', result)
+        self.assertEqual(len(polygons), 2)
+
+        # Both sides of the shared border are drawn with the same coordinates.
+        a, b = (p.split() for p in polygons)
+        self.assertEqual(a[:3], b[2::-1])
+
+    def testIterCompose(self):
+        expected = svgis.SVGIS(self.file, crs='EPSG:2790', scalar=0.001).compose(inline=False)
+        drawing = svgis.SVGIS(self.file, crs='EPSG:2790', scalar=0.001)
+        self.assertEqual(''.join(drawing.iter_compose(inline=False)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
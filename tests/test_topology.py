@@ -0,0 +1,89 @@
+"""Tests on coverage simplification."""
+# This file is part of svgis.
+# https://github.com/fitnr/svgis
+# Licensed under the GNU General Public License v3 (GPLv3) license:
+# http://opensource.org/licenses/GPL-3.0
+# Copyright (c) 2016, Neil Freeman <contact@fakeisthenewreal.org>
+import math
+import unittest
+
+from svgis import topology
+
+try:
+    import visvalingamwyatt
+
+    VW = True
+except ImportError:
+    VW = False
+
+try:
+    import shapely
+    from shapely.geometry import shape
+
+    SHAPELY = True
+except ImportError:
+    SHAPELY = False
+
+
+def _edge(start, end, count=20):
+    '''A wiggly line between two points.'''
+    (x0, y0), (x1, y1) = start, end
+    points = []
+    for i in range(count + 1):
+        t = i / count
+        wiggle = 0.05 * math.sin(i * 1.7 + x0 * 3 + y0 * 5) if 0 < i < count else 0
+        points.append((x0 + (x1 - x0) * t + wiggle * (y1 - y0), y0 + (y1 - y0) * t + wiggle * (x1 - x0)))
+    return points
+
+
+def _grid(size=3):
+    '''A coverage of square-ish polygons with wiggly shared borders.'''
+    polygons = []
+    for i in range(size):
+        for j in range(size):
+            bottom = _edge((i, j), (i + 1, j))
+            right = _edge((i + 1, j), (i + 1, j + 1))
+            top = _edge((i, j + 1), (i + 1, j + 1))[::-1]
+            left = _edge((i, j), (i, j + 1))[::-1]
+            ring = bottom + right[1:] + top[1:] + left[1:]
+            polygons.append({'type': 'Polygon', 'coordinates': [ring]})
+    return polygons
+
+
+class TopologyTestCase(unittest.TestCase):
+    def testArcs(self):
+        polygons = _grid(2)
+        found, refs = topology.arcs([p['coordinates'][0] for p in polygons])
+        # Four inner borders, and four outer borders that bend around the corners.
+        self.assertEqual(len(found), 8)
+        self.assertEqual([len(r) for r in refs], [3, 3, 3, 3])
+        self.assertEqual(len({i for ring in refs for i, _ in ring}), 8)
+
+    @unittest.skipIf(not VW, "visvalingamwyatt is not installed")
+    def testSimplify(self):
+        polygons = _grid()
+        simplified = topology.simplify(polygons + [None, {'type': 'Point', 'coordinates': (0, 0)}], 0.2)
+        self.assertEqual(simplified[-2:], [None, {'type': 'Point', 'coordinates': (0, 0)}])
+        self.assertLess(len(simplified[0]['coordinates'][0]), len(polygons[0]['coordinates'][0]) / 2)
+
+    @unittest.skipIf(not VW or not SHAPELY, "visvalingamwyatt or shapely is not installed")
+    def testNoGaps(self):
+        polygons = [shape(g) for g in topology.simplify(_grid(), 0.2)]
+        union = shapely.union_all(polygons)
+        self.assertEqual(union.geom_type, 'Polygon')
+        self.assertEqual(len(union.interiors), 0)
+        self.assertAlmostEqual(union.area, sum(p.area for p in polygons))
+
+    @unittest.skipIf(not VW, "visvalingamwyatt is not installed")
+    def testSimplifier(self):
+        func = topology.simplifier(0.5)
+        self.assertIsNone(func.batch_size)
+        batch = func.batch(_grid())
+        for polygon, expected in zip(batch, topology.simplify(_grid(), 0.5)):
+            self.assertEqual(polygon['coordinates'][0].tolist(), expected['coordinates'][0].tolist())
+
+        self.assertLess(len(func(_grid()[0])['coordinates'][0]), len(_grid()[0]['coordinates'][0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
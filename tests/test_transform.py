@@ -7,7 +7,7 @@
 import functools
 import unittest
 
-from svgis import transform
+from svgis import errors, transform
 
 try:
     import shapely.geometry
@@ -22,6 +22,12 @@ try:
     VW = True
 except ImportError:
     VW = False
+try:
+    import numpy
+
+    NO_NUMPY = False
+except ImportError:
+    NO_NUMPY = True
 
 
 class ClipTestCase(unittest.TestCase):
@@ -54,6 +60,134 @@ class ClipTestCase(unittest.TestCase):
         self.assertTrue(result.equals(self.fixture), f"{result} == {self.fixture}")
 
 
+@unittest.skipIf(NO_NUMPY, "numpy is not installed")
+class RectClipTestCase(unittest.TestCase):
+    """Test clipping with numpy"""
+
+    def setUp(self):
+        self.bounds = (1, 1, 9, 9)
+
+    def testClipRing(self):
+        ring = [(2, 2), (100, 2), (11, 11), (12, 12), (2, 10), (2, 2)]
+        clipped = transform.clip_ring(ring, self.bounds)
+        self.assertEqual(clipped[0].tolist(), clipped[-1].tolist())
+        self.assertEqual(clipped[:, 0].min(), 2)
+        self.assertEqual(clipped[:, 0].max(), 9)
+        self.assertEqual(clipped[:, 1].max(), 9)
+        self.assertIsNone(transform.clip_ring([(20, 20), (30, 20), (30, 30), (20, 20)], self.bounds))
+
+        inside = [(2, 2), (3, 2), (3, 3), (2, 2)]
+        self.assertEqual(transform.clip_ring(inside, self.bounds).tolist(), [list(c) for c in inside])
+
+        # A ring that wraps around the box leaves nothing but the edge of the box.
+        wrapped = [(-5, -5), (15, -5), (15, 0), (0, 0), (0, 10), (15, 10), (15, 15), (-5, 15), (-5, -5)]
+        self.assertIsNone(transform.clip_ring(wrapped, self.bounds))
+
+    @unittest.skipIf(NO_SHAPELY, "Shapely not installed")
+    def testClipRingArea(self):
+        # A concave ring that leaves the box and comes back.
+        ring = [(0, 0), (10, 0), (10, 10), (8, 10), (8, 5), (5, 5), (5, 10), (0, 10), (0, 0)]
+        clipped = shapely.geometry.Polygon(transform.clip_ring(ring, self.bounds))
+        expected = shapely.geometry.box(*self.bounds).intersection(shapely.geometry.Polygon(ring))
+        self.assertAlmostEqual(clipped.area, expected.area)
+
+    def testClipLine(self):
+        line = [(0, 5), (5, 5), (10, 5), (10, 7), (5, 7), (5, 20)]
+        parts = transform.clip_line(line, self.bounds)
+        self.assertEqual([p.tolist() for p in parts], [[[1, 5], [5, 5], [9, 5]], [[9, 7], [5, 7], [5, 9]]])
+        self.assertEqual(transform.clip_line([(20, 20), (30, 30)], self.bounds), [])
+
+    def testClipper(self):
+        clipper = transform.clipper(self.bounds)
+        self.assertIsNone(clipper({'type': 'Point', 'coordinates': (10, 10)}))
+        points = clipper({'type': 'MultiPoint', 'coordinates': [(2, 2), (10, 10)]})
+        self.assertEqual(points['coordinates'].tolist(), [[2, 2]])
+
+        line = clipper({'type': 'LineString', 'coordinates': [(0, 5), (10, 5), (10, 7), (0, 7)]})
+        self.assertEqual(line['type'], 'MultiLineString')
+        self.assertIsNone(clipper({'type': 'LineString', 'coordinates': [(20, 20), (30, 30)]}))
+
+        square = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+        outside = [(20, 20), (30, 20), (30, 30), (20, 20)]
+        multi = clipper({'type': 'MultiPolygon', 'coordinates': [[square], [outside]]})
+        self.assertEqual(len(multi['coordinates']), 1)
+
+        collection = {'type': 'GeometryCollection', 'geometries': [{'type': 'Polygon', 'coordinates': [outside]}]}
+        self.assertIsNone(clipper(collection))
+
+    def testClipBatch(self):
+        clipper = transform.clipper(self.bounds)
+        batch = getattr(clipper, 'batch', None)
+        if batch is None:
+            self.skipTest('Shapely 2 not installed')
+
+        square = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+        geometries = [
+            {'type': 'Polygon', 'coordinates': [square]},
+            None,
+            {'type': 'MultiPolygon', 'coordinates': [[square], [[(20, 20), (30, 20), (30, 30), (20, 20)]]]},
+            {'type': 'LineString', 'coordinates': [(0, 5), (10, 5), (10, 7), (0, 7)]},
+            {'type': 'MultiPoint', 'coordinates': [(2, 2), (10, 10)]},
+            {'type': 'Polygon', 'coordinates': [[(2, 2), (3, 2), (3, 3), (2, 2)]]},
+            {'type': 'LineString', 'coordinates': [(20, 20), (30, 30)]},
+        ]
+        result = batch(geometries)
+        self.assertEqual(len(result), len(geometries))
+        self.assertIsNone(result[1])
+        self.assertIsNone(result[6])
+        self.assertIs(result[5], geometries[5])
+
+        # Batches are clipped like single geometries.
+        for geometry, clipped in zip(geometries, result):
+            if geometry is None or geometry is geometries[6]:
+                continue
+            expected = shapely.geometry.shape(clipper(geometry))
+            self.assertAlmostEqual(shapely.geometry.shape(clipped).area, expected.area)
+            self.assertAlmostEqual(shapely.geometry.shape(clipped).length, expected.length)
+
+        self.assertEqual(result[0]['type'], 'Polygon')
+        self.assertEqual(result[3]['type'], 'MultiLineString')
+
+    def testClipperBoxes(self):
+        inside = {'type': 'Polygon', 'coordinates': [[(2, 2), (3, 2), (3, 3), (2, 2)]]}
+        outside = {'type': 'Polygon', 'coordinates': [[(20, 20), (30, 20), (30, 30), (20, 20)]]}
+        methods = ['numpy'] + ([] if NO_SHAPELY else ['shapely'])
+        for method in methods:
+            clipper = transform.clipper(self.bounds, method)
+            # Geometries inside the box aren't clipped, those outside are dropped.
+            self.assertIs(clipper(inside), inside)
+            self.assertIsNone(clipper(outside))
+
+    @unittest.skipIf(NO_SHAPELY, "Shapely not installed")
+    def testNumpyClipper(self):
+        # Without a batch, the numpy method clips the geometries itself.
+        clipper = transform.clipper(self.bounds, 'numpy')
+        crossing = {'type': 'Polygon', 'coordinates': [[(5, 5), (20, 5), (20, 20), (5, 20), (5, 5)]]}
+        clipped = shapely.geometry.shape(clipper(crossing))
+        self.assertAlmostEqual(clipped.area, 16)
+
+        line = clipper({'type': 'LineString', 'coordinates': [(0, 5), (10, 5)]})
+        self.assertAlmostEqual(shapely.geometry.shape(line).length, 8)
+
+
+class CullTestCase(unittest.TestCase):
+    small = {'type': 'Polygon', 'coordinates': [[(0, 0), (0.5, 0), (0.5, 0.5), (0, 0)]]}
+    big = {'type': 'LineString', 'coordinates': [(0, 0), (2, 0.1)]}
+    point = {'type': 'Point', 'coordinates': (0, 0)}
+
+    def testCull(self):
+        self.assertIsNone(transform.culler(None))
+        cull = transform.culler(1)
+        self.assertIsNone(cull(self.small))
+        self.assertIs(cull(self.big), self.big)
+        self.assertIs(cull(self.point), self.point)
+
+    def testCullToPoint(self):
+        cull = transform.culler(1, point=True)
+        self.assertEqual(cull(self.small), {'type': 'Point', 'coordinates': (0.25, 0.25)})
+        self.assertIs(cull(self.big), self.big)
+
+
 class SimplifyTestCase(unittest.TestCase):
     """Test svgis.transform.simplifier"""
 
@@ -66,11 +200,159 @@ class SimplifyTestCase(unittest.TestCase):
         c = transform.simplifier(50)
         self.assertIsInstance(c, functools.partial)
 
+    @unittest.skipIf(not VW, "visvalingamwyatt is not installed")
+    def testSimplifySmallRings(self):
+        big = [(x, (x % 3) / 2) for x in range(40)] + [(39, 10), (0, 10), (0, 0)]
+        small = [(50, 50), (51, 50), (51, 51), (50, 50)]
+        geom = {'type': 'MultiPolygon', 'coordinates': [[big], [small]]}
+        simplified = transform.simplifier(5)(geom)
+        self.assertLess(len(simplified['coordinates'][0][0]), len(big))
+        self.assertEqual(simplified['coordinates'][1][0], small)
+
+    @unittest.skipIf(not VW, "visvalingamwyatt is not installed")
+    def testBudget(self):
+        self.assertIsNone(transform.budgeter(None))
+        line = {'type': 'LineString', 'coordinates': [(x, (x % 3) / 2) for x in range(100)]}
+        budget = transform.budgeter(20)
+        simplified = budget(line)
+        self.assertLessEqual(len(simplified['coordinates']), 20)
+        self.assertGreater(len(simplified['coordinates']), 10)
+        self.assertIs(transform.budgeter(100)(line), line)
+
+    @unittest.skipIf(NO_SHAPELY, "Shapely not installed")
+    def testToleranceSimplifier(self):
+        line = {'type': 'LineString', 'coordinates': [(0, 0), (1, 0.01), (2, -0.01), (3, 0.5), (4, 0)]}
+        simplified = transform.tolerance_simplifier(0.1)(line)
+        self.assertEqual([tuple(c) for c in simplified['coordinates']], [(0, 0), (2, -0.01), (3, 0.5), (4, 0)])
+
+    @unittest.skipIf(NO_SHAPELY or not hasattr(shapely, 'simplify'), "Shapely 2 not installed")
+    def testSimplifyMethods(self):
+        line = {'type': 'LineString', 'coordinates': [(x, (x % 3) / 2) for x in range(100)]}
+        for method in ('dp', 'dp-preserve'):
+            simplified = transform.simplifier(50, method)(line)
+            self.assertLess(len(simplified['coordinates']), 100)
+            self.assertGreater(len(simplified['coordinates']), 2)
+
+        self.assertIsNone(transform.simplifier(100, 'dp'))
+
+        # Batches of geometries are simplified like single geometries.
+        polygon = {'type': 'Polygon', 'coordinates': [line['coordinates'] + [(99, 10), (0, 10), (0, 0)]]}
+        geometries = [line, None, polygon]
+        for func in (transform.simplifier(30, 'dp'), transform.tolerance_simplifier(0.5)):
+            expected = [shapely.geometry.shape(func(g)).wkt if g else g for g in geometries]
+            result = [shapely.geometry.shape(g).wkt if g else g for g in func.batch(geometries)]
+            self.assertEqual(result, expected)
+
+        # As are multipart geometries, and geometries that can't be simplified in a group.
+        multi = {'type': 'MultiLineString', 'coordinates': [line['coordinates'], [(0, 0), (0, 5)]]}
+        point = {'type': 'Point', 'coordinates': (0, 0)}
+        func = transform.simplifier(30, 'dp')
+        batch = func.batch([multi, point])
+        self.assertEqual(shapely.geometry.shape(batch[0]).wkt, shapely.geometry.shape(func(multi)).wkt)
+        self.assertEqual(batch[1], point)
+
+        with self.assertRaises(errors.SvgisError):
+            transform.simplifier(50, 'foo')
+
+    @unittest.skipIf(not VW, "visvalingamwyatt is not installed")
+    def testLevelOfDetail(self):
+        line = {'type': 'LineString', 'coordinates': [(x, (x % 3) / 2) for x in range(100)]}
+        square = [(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)]
+        polygon = {'type': 'Polygon', 'coordinates': [square]}
+
+        lod = transform.effective_areas(line)
+        self.assertEqual(len(lod['areas']), 100)
+        self.assertEqual(lod['areas'][0], float('inf'))
+
+        simplified = transform.lod_simplifier(ratio=0.3)(lod)
+        self.assertNotIn('areas', simplified)
+        self.assertEqual(len(simplified['coordinates']), 30)
+        self.assertEqual(tuple(simplified['coordinates'][-1]), (99, 0))
+
+        simplified = transform.lod_simplifier(threshold=0.5)(lod)
+        self.assertLess(len(simplified['coordinates']), 100)
+        self.assertEqual(transform.lod_simplifier()(lod), line)
+
+        # Rings aren't simplified away.
+        simplified = transform.lod_simplifier(threshold=10)(transform.effective_areas(polygon))
+        self.assertEqual(simplified, polygon)
+
     @unittest.skipIf(VW, "visvalingamwyatt is installed")
     def testSimplifyTypeNoVW(self):
         c = transform.simplifier(50)
         self.assertIsNone(c)
 
 
+@unittest.skipIf(NO_NUMPY, "numpy is not installed")
+class SnapTestCase(unittest.TestCase):
+    """Test svgis.transform.snapper"""
+
+    def testSnapNone(self):
+        self.assertIsNone(transform.snapper(None))
+
+    def testSnap(self):
+        snap = transform.snapper(1)
+        line = {'type': 'LineString', 'coordinates': [(0, 0), (0.01, 0.02), (1.04, 0), (1.06, 0.01)]}
+        self.assertEqual(snap(line)['coordinates'].tolist(), [[0, 0], [1, 0], [1.1, 0]])
+        self.assertIsNone(snap({'type': 'LineString', 'coordinates': [(0, 0), (0.01, 0.02)]}))
+        self.assertEqual(snap({'type': 'Point', 'coordinates': (0.26, 1.04)})['coordinates'], (0.3, 1.0))
+
+        square = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+        tiny = [(0.5, 0.5), (0.51, 0.5), (0.51, 0.51), (0.5, 0.5)]
+        sliver = [(2, 0), (2, 1), (2.01, 0.5), (2, 0)]
+        polygon = {'type': 'Polygon', 'coordinates': [square, tiny]}
+        self.assertEqual(len(snap(polygon)['coordinates']), 1)
+
+        multi = {'type': 'MultiPolygon', 'coordinates': [[square], [sliver]]}
+        self.assertEqual(len(snap(multi)['coordinates']), 1)
+        self.assertIsNone(snap({'type': 'Polygon', 'coordinates': [sliver, square]}))
+
+        collection = {'type': 'GeometryCollection', 'geometries': [polygon, {'type': 'Polygon', 'coordinates': [tiny]}]}
+        self.assertEqual(len(snap(collection)['geometries']), 1)
+
+
+@unittest.skipIf(NO_NUMPY, "numpy is not installed")
+class ProjectTestCase(unittest.TestCase):
+    """Test svgis.transform.reprojector"""
+
+    def setUp(self):
+        self.square = [(-88, 41), (-87, 41), (-87, 42), (-88, 42), (-88, 41)]
+        self.neighbor = [(-87, 41), (-86, 41), (-86, 42), (-87, 42), (-87, 41)]
+        self.geometries = [
+            {'type': 'Polygon', 'coordinates': [self.square]},
+            None,
+            {'type': 'MultiPolygon', 'coordinates': [[self.neighbor]]},
+            {'type': 'GeometryCollection', 'geometries': [{'type': 'Point', 'coordinates': (-87, 41)}]},
+        ]
+
+    def testCoordinateArrays(self):
+        for geometry in self.geometries[::2] + self.geometries[3]['geometries']:
+            arrays = transform.coordinate_arrays(geometry)
+            self.assertEqual(transform.with_arrays(geometry, iter(arrays))['type'], geometry['type'])
+
+        arrays = transform.coordinate_arrays(self.geometries[3])
+        self.assertEqual(len(arrays), 1)
+        point = transform.with_arrays(self.geometries[3], iter(arrays))['geometries'][0]
+        self.assertEqual(tuple(point['coordinates']), (-87, 41))
+
+    def testReproject(self):
+        func = transform.reprojector('EPSG:4269', 'EPSG:2790')
+        result = func.batch(self.geometries)
+        self.assertIsNone(result[1])
+
+        for geometry, projected in zip(self.geometries, result):
+            if geometry is not None:
+                expected = transform.coordinate_arrays(func(geometry))
+                for a, b in zip(transform.coordinate_arrays(projected), expected):
+                    self.assertEqual(a.tolist(), b.tolist())
+
+        # Coordinates shared by neighbors are projected to the same place.
+        square, neighbor = result[0]['coordinates'][0], result[2]['coordinates'][0][0]
+        self.assertEqual(tuple(square[1]), tuple(neighbor[0]))
+        self.assertEqual(tuple(square[2]), tuple(neighbor[3]))
+        self.assertEqual(tuple(result[3]['geometries'][0]['coordinates']), tuple(square[1]))
+        self.assertGreater(square[1][0], square[0][0])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -42,6 +42,31 @@ class UtilsTestCase(unittest.TestCase):
 
         self.assertSequenceEqual(list(utils.dedupe(test)), fixture)
 
+    def test_drop_collinear(self):
+        line = [(0, 0), (1, 0), (2, 0.001), (2, 0), (3, 0), (3, 1), (3, 0.5), (3, 2)]
+        self.assertEqual(utils.drop_collinear(line), line)
+
+        # Vertices on a straight line at the precision are dropped, but not where the line doubles back.
+        self.assertEqual(utils.drop_collinear(line, 2).tolist(), [[0, 0], [3, 0], [3, 1], [3, 0.5], [3, 2]])
+        self.assertEqual(len(utils.drop_collinear(line, 3)), len(line))
+
+        ring = [(0, 0), (1, 0), (2, 0), (2, 2), (0, 2), (0, 1), (0, 0)]
+        self.assertEqual(utils.drop_collinear(ring, 0).tolist(), [[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]])
+
+    def test_hilbert(self):
+        points = [(x, y) for y in range(4) for x in range(4)]
+        distances = utils.hilbert(points, order=2)
+        self.assertEqual(sorted(distances), list(range(16)))
+        self.assertEqual(distances[0], 0)
+        self.assertEqual(distances[3], 15)
+        # Consecutive cells along the curve are neighbors.
+        cells = [points[i] for i in distances.argsort()]
+        for a, b in zip(cells, cells[1:]):
+            self.assertEqual(abs(a[0] - b[0]) + abs(a[1] - b[1]), 1)
+
+        distances = utils.hilbert([(0, 0), (float('nan'), float('nan')), (1, 1)])
+        self.assertEqual(distances.argmax(), 1)
+
 
 if __name__ == '__main__':
     unittest.main()